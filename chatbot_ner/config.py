@@ -71,6 +71,61 @@ ES_AUTH_NAME = os.environ.get('ES_AUTH_NAME')
 ES_AUTH_PASSWORD = os.environ.get('ES_AUTH_PASSWORD')
 ES_BULK_MSG_SIZE = os.environ.get('ES_BULK_MSG_SIZE', '10000')
 ES_SEARCH_SIZE = os.environ.get('ES_SEARCH_SIZE', '10000')
+# Bulk indexing settings used by populate/repopulate
+ES_BULK_THREAD_COUNT = os.environ.get('ES_BULK_THREAD_COUNT', '1')
+ES_BULK_CHUNK_BYTES = os.environ.get('ES_BULK_CHUNK_BYTES', '104857600')
+ES_POPULATE_PROCESSES = os.environ.get('ES_POPULATE_PROCESSES', '1')
+ES_DELETE_BY_QUERY_SLICES = os.environ.get('ES_DELETE_BY_QUERY_SLICES', '0')
+# Number of slices scrolled in parallel when transferring entities between elasticsearch servers
+ES_TRANSFER_SLICES = os.environ.get('ES_TRANSFER_SLICES', '4')
+# Full text search (text entity detection) response settings
+ES_FULL_TEXT_SEARCH_SIZE = os.environ.get('ES_FULL_TEXT_SEARCH_SIZE') or ES_SEARCH_SIZE
+ES_HIGHLIGHT_FRAGMENTS = os.environ.get('ES_HIGHLIGHT_FRAGMENTS', '20')
+ES_SLIM_RESPONSES = os.environ.get('ES_SLIM_RESPONSES', 'true').lower() not in ('false', '0', 'no')
+# Entities with more records are searched with at most ES_FUZZY_MAX_EXPANSIONS expansions per fuzzy term, 0 disables
+ES_LARGE_ENTITY_RECORDS = int(os.environ.get('ES_LARGE_ENTITY_RECORDS') or 10000)
+ES_FUZZY_MAX_EXPANSIONS = int(os.environ.get('ES_FUZZY_MAX_EXPANSIONS') or 10)
+# Client connection pool of each worker process
+ES_POOL_MAXSIZE = int(os.environ.get('ES_POOL_MAXSIZE') or 10)
+ES_TCP_KEEPALIVE = os.environ.get('ES_TCP_KEEPALIVE', 'true').lower() not in ('false', '0', 'no')
+ES_SNIFF_ON_START = os.environ.get('ES_SNIFF_ON_START', 'false').lower() in ('true', '1', 'yes')
+ES_SNIFFER_TIMEOUT = int(os.environ.get('ES_SNIFFER_TIMEOUT') or 0) or None
+# Index holding a version document per entity, bumped on every write so that other hosts drop stale cached results
+ES_VERSIONS_INDEX_NAME = os.environ.get('ES_VERSIONS_INDEX_NAME') or (
+    '%s_versions' % ES_INDEX_NAME if ES_INDEX_NAME else None)
+# Index layout, changing either requires deleting, creating and populating the datastore again
+ES_ROUTE_BY_ENTITY = os.environ.get('ES_ROUTE_BY_ENTITY', 'false').lower() in ('true', '1', 'yes')
+ES_LANGUAGE_INDICES = tuple(language_script.strip()
+                            for language_script in (os.environ.get('ES_LANGUAGE_INDICES') or '').split(',')
+                            if language_script.strip())
+
+# Memory engine settings (Used only when ENGINE=memory)
+MEMORY_ENTITY_DATA_DIRECTORY = os.environ.get('MEMORY_ENTITY_DATA_DIRECTORY') or \
+    os.path.join(BASE_DIR, 'data', 'entity_data')
+
+# Sqlite engine settings (Used only when ENGINE=sqlite)
+SQLITE_DATABASE_PATH = os.environ.get('SQLITE_DATABASE_PATH') or \
+    os.path.join(BASE_DIR, 'data', 'entity_data.sqlite3')
+SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE') or 268435456)
+SQLITE_SNAPSHOT_DIRECTORY = os.environ.get('SQLITE_SNAPSHOT_DIRECTORY') or None
+SQLITE_SNAPSHOT_CHECK_INTERVAL = int(os.environ.get('SQLITE_SNAPSHOT_CHECK_INTERVAL') or 5)
+
+# Cache for DataStore.get_similar_dictionary results, set DATASTORE_CACHE_SIZE=0 to disable
+DATASTORE_CACHE_SIZE = int(os.environ.get('DATASTORE_CACHE_SIZE') or 10000)
+DATASTORE_CACHE_TTL = int(os.environ.get('DATASTORE_CACHE_TTL') or 300)
+# Seconds between polls of entity versions written by other hosts (ENGINE=elasticsearch), 0 disables polling
+DATASTORE_VERSION_POLL_INTERVAL = int(os.environ.get('DATASTORE_VERSION_POLL_INTERVAL') or 10)
+# Cache of parsed elasticsearch highlight fragments, set DATASTORE_HIGHLIGHT_CACHE_SIZE=0 to disable
+DATASTORE_HIGHLIGHT_CACHE_SIZE = int(os.environ.get('DATASTORE_HIGHLIGHT_CACHE_SIZE') or 100000)
+# Threads running datastore calls made through datastore.aio.AsyncDataStore (python 3 only)
+DATASTORE_ASYNC_WORKERS = int(os.environ.get('DATASTORE_ASYNC_WORKERS') or 32)
+# Exact match fast path for text entities with ENGINE=elasticsearch, one of 'off', 'fuzzy' (fuzzy search only the
+# parts of a text not matched exactly) or 'exact' (no fuzzy search)
+DATASTORE_EXACT_MATCH = (os.environ.get('DATASTORE_EXACT_MATCH') or 'off').lower()
+DATASTORE_EXACT_MATCH_ENTITIES = int(os.environ.get('DATASTORE_EXACT_MATCH_ENTITIES') or 100)
+# Vocabularies of entities used to skip text entity searches that can not match, set DATASTORE_VOCABULARY_ENTITIES=0
+# to disable
+DATASTORE_VOCABULARY_ENTITIES = int(os.environ.get('DATASTORE_VOCABULARY_ENTITIES') or 100)
 
 # Crf Model Specific (Mandatory to use CRF Model)
 CRF_MODELS_PATH = os.environ.get('MODELS_PATH')
@@ -84,6 +139,26 @@ except ValueError:
     ES_BULK_MSG_SIZE = 10000
     ES_SEARCH_SIZE = 10000
 
+try:
+    ES_FULL_TEXT_SEARCH_SIZE = int(ES_FULL_TEXT_SEARCH_SIZE)
+    ES_HIGHLIGHT_FRAGMENTS = int(ES_HIGHLIGHT_FRAGMENTS)
+except ValueError:
+    ES_FULL_TEXT_SEARCH_SIZE = ES_SEARCH_SIZE
+    ES_HIGHLIGHT_FRAGMENTS = 20
+
+try:
+    ES_BULK_THREAD_COUNT = int(ES_BULK_THREAD_COUNT)
+    ES_BULK_CHUNK_BYTES = int(ES_BULK_CHUNK_BYTES)
+    ES_POPULATE_PROCESSES = int(ES_POPULATE_PROCESSES)
+    ES_DELETE_BY_QUERY_SLICES = int(ES_DELETE_BY_QUERY_SLICES)
+    ES_TRANSFER_SLICES = int(ES_TRANSFER_SLICES)
+except ValueError:
+    ES_BULK_THREAD_COUNT = 1
+    ES_BULK_CHUNK_BYTES = 104857600
+    ES_POPULATE_PROCESSES = 1
+    ES_DELETE_BY_QUERY_SLICES = 0
+    ES_TRANSFER_SLICES = 4
+
 # Optional Vars
 ES_INDEX_1 = os.environ.get('ES_INDEX_1')
 ES_INDEX_2 = os.environ.get('ES_INDEX_2')
@@ -113,6 +188,14 @@ if not GOOGLE_TRANSLATE_API_KEY:
 
 CHATBOT_NER_DATASTORE = {
     'engine': ENGINE,
+    'cache_size': DATASTORE_CACHE_SIZE,
+    'cache_ttl': DATASTORE_CACHE_TTL,
+    'version_poll_interval': DATASTORE_VERSION_POLL_INTERVAL,
+    'highlight_cache_size': DATASTORE_HIGHLIGHT_CACHE_SIZE,
+    'async_workers': DATASTORE_ASYNC_WORKERS,
+    'exact_match': DATASTORE_EXACT_MATCH,
+    'exact_match_entities': DATASTORE_EXACT_MATCH_ENTITIES,
+    'vocabulary_entities': DATASTORE_VOCABULARY_ENTITIES,
     'elasticsearch': {
         'connection_url': ES_URL,  # Elastic Search URL
         'name': ES_INDEX_NAME,  # Index name used
@@ -124,6 +207,11 @@ CHATBOT_NER_DATASTORE = {
         'max_retries': 1,
         'timeout': 20,
         'request_timeout': 20,
+        'maxsize': ES_POOL_MAXSIZE,  # Connections kept open to each node by each process
+        'tcp_keepalive': ES_TCP_KEEPALIVE,
+        'sniff_on_start': ES_SNIFF_ON_START,
+        'sniffer_timeout': ES_SNIFFER_TIMEOUT,
+        'versions_index_name': ES_VERSIONS_INDEX_NAME,
 
         # Transfer Specific constants (ignore if only one elasticsearch is setup)
         # For detailed explanation datastore.elastic_search.transfer.py
@@ -136,6 +224,19 @@ CHATBOT_NER_DATASTORE = {
         # Training Data ES constants
         'elasticsearch_crf_data_index_name': ELASTICSEARCH_CRF_DATA_INDEX_NAME,
         'elasticsearch_crf_data_doc_type': ELASTICSEARCH_CRF_DATA_DOC_TYPE,
+    },
+    'memory': {
+        # Directory of entity data csv files loaded into each process on connect
+        'entity_data_directory_path': MEMORY_ENTITY_DATA_DIRECTORY,
+    },
+    'sqlite': {
+        # Database file shared by all processes on the host, created by create_datastore
+        'database_path': SQLITE_DATABASE_PATH,
+        # Bytes of the database file memory mapped by each process, pages are shared through the OS page cache
+        'mmap_size': SQLITE_MMAP_SIZE,
+        # If set, read only snapshots built by build_datastore_snapshot are read from here instead of database_path
+        'snapshot_directory': SQLITE_SNAPSHOT_DIRECTORY,
+        'snapshot_check_interval': SQLITE_SNAPSHOT_CHECK_INTERVAL,
     }
 }
 
@@ -0,0 +1,16 @@
+"""
+Gunicorn server hooks, used by start_server.sh with --config
+"""
+
+
+def post_fork(server, worker):
+    """
+    Connect the datastore of each worker process before it serves its first request. A datastore connected in the
+    master (e.g. with --preload) would otherwise have its sockets shared by all workers.
+    """
+    from datastore.datastore import DataStore
+    try:
+        DataStore().reconnect()
+    except Exception as e:
+        # The datastore connects again on first use, a worker should still start when the engine is unreachable
+        worker.log.warning('DataStore could not connect after fork: %s' % e)
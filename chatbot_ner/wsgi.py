@@ -12,3 +12,22 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "chatbot_ner.settings")
 
 from django.core.wsgi import get_wsgi_application
 application = get_wsgi_application()
+
+try:
+    from uwsgidecorators import postfork
+except ImportError:
+    postfork = None
+
+if postfork is not None:
+    @postfork
+    def reconnect_datastore():
+        """
+        uwsgi loads the application in the master and forks workers from it, connect each worker on its own. See
+        post_fork in chatbot_ner/gunicorn_config.py
+        """
+        from datastore.datastore import DataStore
+        try:
+            DataStore().reconnect()
+        except Exception as e:
+            from chatbot_ner.config import ner_logger
+            ner_logger.warning('DataStore could not connect after fork: %s' % e)
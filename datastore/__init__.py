@@ -1 +1,3 @@
-from datastore import DataStore
+from __future__ import absolute_import
+
+from datastore.datastore import DataStore
@@ -0,0 +1,111 @@
+from __future__ import absolute_import
+
+# std imports
+import asyncio
+import functools
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+# 3rd party imports
+import six
+
+# Local imports
+from chatbot_ner.config import CHATBOT_NER_DATASTORE
+from datastore.constants import ASYNC_WORKERS
+from datastore.datastore import DataStore
+from lib.singleton import Singleton
+
+log_prefix = 'datastore.aio'
+
+
+def chain(future, callback, loop=None):
+    """
+    Future resolved with callback(result of future), callback is run on the event loop thread. If callback returns a
+    future, e.g. of a further AsyncDataStore call, the chained future is resolved with the result of that future
+
+    Args:
+        future (asyncio.Future): future to wait for
+        callback (callable): function called with the result of future
+        loop (asyncio.AbstractEventLoop, optional): event loop of future. Defaults to the current event loop
+
+    Returns:
+        asyncio.Future: resolved with the return value of callback, or with the exception raised by future or callback
+    """
+    loop = loop or asyncio.get_event_loop()
+    chained = loop.create_future()
+
+    def _on_done(done, callback=None):
+        if chained.cancelled():
+            return
+        if done.cancelled():
+            chained.cancel()
+            return
+        if done.exception() is not None:
+            chained.set_exception(done.exception())
+            return
+        if callback is None:
+            chained.set_result(done.result())
+            return
+        try:
+            result = callback(done.result())
+        except Exception as e:
+            chained.set_exception(e)
+            return
+        if asyncio.isfuture(result):
+            result.add_done_callback(_on_done)
+        else:
+            chained.set_result(result)
+
+    future.add_done_callback(functools.partial(_on_done, callback=callback))
+    return chained
+
+
+class AsyncDataStore(six.with_metaclass(Singleton, object)):
+    """
+    Asyncio counterpart of DataStore, for use from coroutines of an async server. Has the same public methods as
+    DataStore, each returning an awaitable asyncio.Future instead of the result, e.g.
+
+        values = await AsyncDataStore().get_similar_dictionary(entity_name='city', texts=['i live in delhi'],
+                                                               fuzziness_threshold=1)
+
+    Engine calls are blocking, they are run on a bounded thread pool shared by all event loops of the process so that
+    the event loop keeps serving other requests while a call waits on the datastore. All calls go through the
+    DataStore singleton, so connections and caches are shared with synchronous callers. Generator methods (iter_*)
+    are not available since their results are consumed lazily, use the corresponding get_* or *_page methods instead.
+
+    Attributes:
+        max_workers (int): maximum number of datastore calls running at the same time
+    """
+
+    def __init__(self, max_workers=None):
+        """
+        Args:
+            max_workers (int, optional): size of the thread pool. Defaults to 'async_workers' of CHATBOT_NER_DATASTORE
+        """
+        self.max_workers = max_workers or CHATBOT_NER_DATASTORE.get(ASYNC_WORKERS) or 1
+        self._datastore = DataStore()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name.startswith('iter_'):
+            raise AttributeError('%s object has no attribute %r' % (type(self).__name__, name))
+
+        method = getattr(self._datastore, name)
+        if not callable(method) or inspect.isgeneratorfunction(method):
+            raise AttributeError('%s object has no attribute %r' % (type(self).__name__, name))
+
+        @functools.wraps(method)
+        def run_in_executor(*args, **kwargs):
+            loop = asyncio.get_event_loop()
+            return loop.run_in_executor(self._executor, functools.partial(method, *args, **kwargs))
+
+        return run_in_executor
+
+    def shutdown(self, wait=True):
+        """
+        Stop the thread pool, calls made after this fail
+
+        Args:
+            wait (bool, optional): wait for running calls to finish. Defaults to True
+        """
+        self._executor.shutdown(wait=wait)
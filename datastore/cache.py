@@ -0,0 +1,319 @@
+from __future__ import absolute_import
+
+# std imports
+import collections
+import threading
+import time
+
+log_prefix = 'datastore.cache'
+
+
+class ResultCache(object):
+    """
+    Thread safe, bounded LRU cache with a time to live for results of DataStore.get_similar_dictionary
+
+    Keys are tuples whose first element is the entity name, so that all results of an entity can be dropped at once
+    when its data is modified through DataStore. Entries also expire ttl seconds after they were stored, which bounds
+    how long results stay stale when entity data is modified by some other process.
+
+    Attributes:
+        max_size (int): maximum number of entries kept, least recently used entries are evicted first.
+                        0 disables the cache
+        ttl (int or float): seconds after which an entry expires. 0 or None means entries never expire
+        hits (int): number of lookups answered from the cache
+        misses (int): number of lookups not found (or expired) in the cache
+    """
+
+    def __init__(self, max_size, ttl=None, timer=time.time):
+        """
+        Args:
+            max_size (int): maximum number of entries kept. 0 disables the cache
+            ttl (int or float, optional): seconds after which an entry expires. 0 or None means entries never expire
+            timer (callable, optional): function returning current time in seconds, used to check expiry
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._timer = timer
+        self._lock = threading.Lock()
+        # key -> (expires at or None, value), ordered from least to most recently used
+        self._entries = collections.OrderedDict()
+        # entity name -> set of keys
+        self._entity_keys = collections.defaultdict(set)
+
+    @property
+    def enabled(self):
+        return self.max_size > 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        """
+        Lookup key, marking it as most recently used
+
+        Args:
+            key (tuple): key with entity name as the first element
+            default (optional): value returned if key is not cached or has expired
+
+        Returns:
+            cached value for key or default
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and (entry[0] is None or entry[0] > self._timer()):
+                self._entries[key] = entry
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                self._entity_keys[key[0]].discard(key)
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """
+        Store value for key, evicting least recently used entries if the cache is full
+
+        Args:
+            key (tuple): key with entity name as the first element
+            value: value to cache
+        """
+        if not self.enabled:
+            return
+        expires_at = self._timer() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires_at, value)
+            self._entity_keys[key[0]].add(key)
+            while len(self._entries) > self.max_size:
+                evicted_key, _ = self._entries.popitem(last=False)
+                self._entity_keys[evicted_key[0]].discard(evicted_key)
+
+    def invalidate_entity(self, entity_name):
+        """
+        Drop all cached entries of entity_name
+
+        Args:
+            entity_name (str): name of the entity
+        """
+        with self._lock:
+            for key in self._entity_keys.pop(entity_name, ()):
+                self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        Drop all cached entries. Hit and miss counters are left as they are
+        """
+        with self._lock:
+            self._entries.clear()
+            self._entity_keys.clear()
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: with 'hits', 'misses', 'size' and 'max_size' keys
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'max_size': self.max_size}
+
+
+class HighlightCache(ResultCache):
+    """
+    ResultCache of highlight fragments of elasticsearch search results parsed to normalized variants, keyed by
+    (entity name, fragment). Parsing the same fragment again on every request then becomes a dictionary lookup.
+    Also accumulates the time spent parsing search results.
+
+    Attributes:
+        parse_time (float): total seconds spent parsing search results
+        parse_count (int): number of search results parsed
+    """
+
+    def __init__(self, max_size, ttl=None, timer=time.time):
+        super(HighlightCache, self).__init__(max_size=max_size, ttl=ttl, timer=timer)
+        self.parse_time = 0.0
+        self.parse_count = 0
+
+    def add_parse_time(self, seconds, count=1):
+        """
+        Record time spent parsing search results
+
+        Args:
+            seconds (float): time taken
+            count (int, optional): number of search results parsed in that time, defaults to 1
+        """
+        with self._lock:
+            self.parse_time += seconds
+            self.parse_count += count
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: with 'hits', 'misses', 'size', 'max_size', 'parse_time' and 'parse_count' keys
+        """
+        stats = super(HighlightCache, self).get_stats()
+        stats.update({'parse_time': self.parse_time, 'parse_count': self.parse_count})
+        return stats
+
+
+class _Call(object):
+    """
+    Result of a call shared by SingleFlight, available once done is set
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent identical calls, so that threads asking for a key that is already being fetched by another
+    thread wait for that fetch and share its result instead of fetching it again. Unlike ResultCache nothing is kept
+    once the fetch is done, keys are only shared while in flight.
+
+    Attributes:
+        calls (int): number of keys fetched
+        shared (int): number of keys answered by a fetch made by some other call
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._lock = threading.Lock()
+        # key -> _Call of the fetch in flight
+        self._calls = {}
+
+    def do(self, keys, function):
+        """
+        Get results of keys, fetching the keys not already in flight with a single call to function
+
+        Args:
+            keys (list): hashable keys to get results of
+            function (callable): called with the list of indices of keys (in keys) to fetch, must return a list of
+                                 results in the same order. Not called if all keys are already in flight
+
+        Returns:
+            list: results, one per key in the same order as keys
+
+        Raises:
+            Exception raised by function, also raised for every call waiting on the keys it was fetching
+        """
+        calls, own_calls, led_indices = [], {}, []
+        with self._lock:
+            for index, key in enumerate(keys):
+                call = own_calls.get(key)
+                if call is None:
+                    call = self._calls.get(key)
+                    if call is None:
+                        call = self._calls[key] = own_calls[key] = _Call()
+                        led_indices.append(index)
+                        self.calls += 1
+                    else:
+                        self.shared += 1
+                calls.append(call)
+
+        # Fetch own keys before waiting on others, so that two calls waiting on each other's keys can not deadlock
+        if led_indices:
+            try:
+                for index, result in zip(led_indices, function(led_indices)):
+                    calls[index].result = result
+            except Exception as e:
+                for index in led_indices:
+                    calls[index].error = e
+                raise
+            finally:
+                with self._lock:
+                    for index in led_indices:
+                        self._calls.pop(keys[index], None)
+                for index in led_indices:
+                    calls[index].done.set()
+
+        results = []
+        for call in calls:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            results.append(call.result)
+        return results
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: with 'calls', 'shared' and 'in_flight' keys
+        """
+        return {'calls': self.calls, 'shared': self.shared, 'in_flight': len(self._calls)}
+
+
+class VersionPoller(object):
+    """
+    Daemon thread fetching versions of all entities every interval seconds and calling on_change with the name of
+    every entity whose version changed, appeared or disappeared since the previous fetch. The first fetch only records
+    the versions. Used to drop cached results of entities modified by other processes long before they expire.
+
+    Attributes:
+        interval (int or float): seconds between two fetches
+        polls (int): number of fetches done
+        changes (int): number of entity version changes seen
+    """
+
+    def __init__(self, get_versions, on_change, interval, logger):
+        """
+        Args:
+            get_versions (callable): returns a dict mapping entity name to its version
+            on_change (callable): called with an entity name when its version changed
+            interval (int or float): seconds between two fetches
+            logger: logging object to log at exception level when a fetch fails
+        """
+        self.interval = interval
+        self.polls = 0
+        self.changes = 0
+        self._get_versions = get_versions
+        self._on_change = on_change
+        self._logger = logger
+        self._versions = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def poll(self):
+        """
+        Fetch versions once and call on_change for every changed entity
+
+        Returns:
+            list: names of the entities whose version changed
+        """
+        versions = self._get_versions()
+        changed = []
+        if self._versions is not None:
+            changed = [entity_name for entity_name in set(self._versions) | set(versions)
+                       if self._versions.get(entity_name) != versions.get(entity_name)]
+        self._versions = versions
+        self.polls += 1
+        self.changes += len(changed)
+        for entity_name in changed:
+            self._on_change(entity_name)
+        return changed
+
+    def _run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                self._logger.exception('%s: failed to poll entity versions: %s' % (log_prefix, e))
+            if self._stopped.wait(self.interval) or self._stopped.is_set():
+                return
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='entity-version-poller')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: with 'polls', 'changes' and 'entities' keys
+        """
+        return {'polls': self.polls, 'changes': self.changes, 'entities': len(self._versions or ())}
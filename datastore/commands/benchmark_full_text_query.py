@@ -0,0 +1,88 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from datastore import DataStore
+from datastore.constants import ELASTICSEARCH, ELASTICSEARCH_DOC_TYPE, ELASTICSEARCH_FULL_TEXT_QUERY_FILTER_PATH
+from datastore.elastic_search.query import get_full_text_query_msearch_body
+
+
+class Command(BaseCommand):
+    help = 'Compare response size and JSON decode time of the elasticsearch searches made for text entity detection ' \
+           'with and without slim responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--entity_name',
+            default=None,
+            help='name of the entity to search',
+        )
+
+        parser.add_argument(
+            '--sentences',
+            default=None,
+            help='comma separated sentences to search the entity in',
+        )
+
+        parser.add_argument(
+            '--fuzziness_threshold',
+            default='auto:4,7',
+            help='fuzziness of the match query. Default value is auto:4,7',
+        )
+
+        parser.add_argument(
+            '--repeat',
+            default=10,
+            type=int,
+            help='number of times each request is made. Default value is 10',
+        )
+
+    def _benchmark(self, db, body, params, repeat):
+        """
+        Make the msearch request repeat times
+
+        Returns:
+            tuple: response size in bytes and average seconds taken to decode the response
+        """
+        url = '/%s/%s/_msearch' % (db._store_name, db._connection_settings[ELASTICSEARCH_DOC_TYPE])
+        connection = db._client_or_connection.transport.get_connection()
+        size, decode_time = 0, 0.0
+        for _ in range(repeat):
+            _, _, raw_data = connection.perform_request('GET', url, params=params, body=body)
+            start_time = time.time()
+            json.loads(raw_data)
+            decode_time += time.time() - start_time
+            size = len(raw_data)
+        return size, decode_time / repeat
+
+    def handle(self, *args, **options):
+        if not options.get('entity_name') or not options.get('sentences'):
+            self.stdout.write(self.style.ERROR('arguments --entity_name and --sentences required'))
+            return
+
+        db = DataStore()
+        if db._engine != ELASTICSEARCH:
+            self.stdout.write(self.style.ERROR('benchmark needs ENGINE=elasticsearch'))
+            return
+        db._connect()
+
+        entity_names_and_sentences = [(options['entity_name'], sentence.strip())
+                                      for sentence in options['sentences'].split(',') if sentence.strip()]
+        results = []
+        for slim_response in (False, True):
+            body = get_full_text_query_msearch_body(index_name=db._store_name,
+                                                    doc_type=db._connection_settings[ELASTICSEARCH_DOC_TYPE],
+                                                    entity_names_and_sentences=entity_names_and_sentences,
+                                                    fuzziness_threshold=options['fuzziness_threshold'],
+                                                    slim_response=slim_response) + '\n'
+            params = {'filter_path': ELASTICSEARCH_FULL_TEXT_QUERY_FILTER_PATH} if slim_response else {}
+            size, decode_time = self._benchmark(db=db, body=body, params=params, repeat=options['repeat'])
+            results.append((size, decode_time))
+            self.stdout.write('%s responses: %d bytes, %.2f ms to decode'
+                              % ('slim' if slim_response else 'full', size, decode_time * 1000))
+
+        (full_size, full_decode_time), (slim_size, slim_decode_time) = results
+        if slim_size and slim_decode_time:
+            self.stdout.write('slim responses are %.1fx smaller and decode %.1fx faster'
+                              % (float(full_size) / slim_size, full_decode_time / slim_decode_time))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+
+from chatbot_ner.config import ner_logger, CHATBOT_NER_DATASTORE
+from datastore import DataStore
+from datastore.constants import SQLITE
+from datastore.sqlite.snapshot import build_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Build a read only snapshot of entity data read from the configured datastore, for use by ENGINE=sqlite ' \
+           'with SQLITE_SNAPSHOT_DIRECTORY set. Processes using snapshots switch to the new one without a restart'
+
+    def add_arguments(self, parser):
+        snapshot_directory = CHATBOT_NER_DATASTORE.get(SQLITE, {}).get('snapshot_directory')
+        parser.add_argument(
+            '--snapshot_directory',
+            default=snapshot_directory,
+            help='directory to build the snapshot in. Default value is %s' % snapshot_directory,
+        )
+
+        parser.add_argument(
+            '--entity_names',
+            default=None,
+            help='comma separated names of the entities to include. Default is all entities',
+        )
+
+        parser.add_argument(
+            '--keep',
+            default=2,
+            type=int,
+            help='number of most recent snapshots to keep. Default value is 2',
+        )
+
+    def handle(self, *args, **options):
+        if not options.get('snapshot_directory'):
+            self.stdout.write(self.style.ERROR('argument --snapshot_directory or setting SQLITE_SNAPSHOT_DIRECTORY '
+                                               'required'))
+            return
+
+        db = DataStore()
+        if options.get('entity_names'):
+            entity_names = [entity_name.strip() for entity_name in options['entity_names'].split(',')
+                            if entity_name.strip()]
+        else:
+            entity_names = db.get_entity_names()
+
+        def get_records(entity_name):
+            return (hit['_source'] for hit in db.iter_entity_data(entity_name=entity_name))
+
+        snapshot_path = build_snapshot(snapshot_directory=options['snapshot_directory'], entity_names=entity_names,
+                                       get_records=get_records, logger=ner_logger, keep=max(options['keep'], 1))
+        self.stdout.write('Successfully built snapshot of %d entities at "%s"' % (len(entity_names), snapshot_path))
@@ -26,6 +26,13 @@ class Command(BaseCommand):
             help='comma separated file paths to individual csv files',
         )
 
+        parser.add_argument(
+            '--diff',
+            action='store_true',
+            default=False,
+            help='only write records that changed instead of deleting and re-adding all records of the entities',
+        )
+
     def handle(self, *args, **options):
         entity_data_directory_path = None
         csv_file_paths = None
@@ -42,7 +49,8 @@ class Command(BaseCommand):
                 csv_file_paths = [csv_file_path for csv_file_path in csv_file_paths if csv_file_path and
                                   csv_file_path.endswith('.csv')]
             db = DataStore()
-            db.repopulate(entity_data_directory_path=entity_data_directory_path, csv_file_paths=csv_file_paths)
+            db.repopulate(entity_data_directory_path=entity_data_directory_path, csv_file_paths=csv_file_paths,
+                          diff=options.get('diff', False))
             if entity_data_directory_path:
                 self.stdout.write(
                     'Successfully Repopulated entity data from csv files at "%s"' % entity_data_directory_path)
@@ -1,17 +1,63 @@
 import elasticsearch
 import os
 from chatbot_ner.settings import BASE_DIR
-from chatbot_ner.config import ES_BULK_MSG_SIZE, ES_SEARCH_SIZE
+from chatbot_ner.config import (ES_BULK_MSG_SIZE, ES_SEARCH_SIZE, ES_FULL_TEXT_SEARCH_SIZE, ES_HIGHLIGHT_FRAGMENTS,
+                                ES_SLIM_RESPONSES, ES_BULK_THREAD_COUNT, ES_BULK_CHUNK_BYTES, ES_POPULATE_PROCESSES,
+                                ES_DELETE_BY_QUERY_SLICES, ES_TRANSFER_SLICES, ES_ROUTE_BY_ENTITY,
+                                ES_LANGUAGE_INDICES, ES_LARGE_ENTITY_RECORDS, ES_FUZZY_MAX_EXPANSIONS)
 
 DEFAULT_ENTITY_DATA_DIRECTORY = os.path.join(os.path.join(BASE_DIR, 'data'), 'entity_data')
 ELASTICSEARCH = 'elasticsearch'
+MEMORY = 'memory'
+SQLITE = 'sqlite'
 ELASTICSEARCH_SEARCH_SIZE = ES_SEARCH_SIZE
 ELASTICSEARCH_BULK_HELPER_MESSAGE_SIZE = ES_BULK_MSG_SIZE
+ELASTICSEARCH_BULK_THREAD_COUNT = ES_BULK_THREAD_COUNT
+ELASTICSEARCH_BULK_CHUNK_BYTES = ES_BULK_CHUNK_BYTES
+ELASTICSEARCH_POPULATE_PROCESSES = ES_POPULATE_PROCESSES
+# 0 deletes entities with bulk requests streamed while scrolling, more uses sliced delete by query
+ELASTICSEARCH_DELETE_BY_QUERY_SLICES = ES_DELETE_BY_QUERY_SLICES
+# Seconds between progress checks of a delete by query task
+ELASTICSEARCH_TASK_POLL_INTERVAL = 1
+ELASTICSEARCH_TRANSFER_SLICES = ES_TRANSFER_SLICES
+# Pages of hits per slice fetched ahead of the bulk writes to the destination during a transfer
+ELASTICSEARCH_TRANSFER_PAGES_PER_SLICE = 2
+ELASTICSEARCH_FULL_TEXT_SEARCH_SIZE = ES_FULL_TEXT_SEARCH_SIZE
+ELASTICSEARCH_HIGHLIGHT_FRAGMENTS = ES_HIGHLIGHT_FRAGMENTS
+ELASTICSEARCH_SLIM_RESPONSES = ES_SLIM_RESPONSES
+# Search plans of large entities, see datastore.elastic_search.query.QueryPlanner
+ELASTICSEARCH_LARGE_ENTITY_RECORDS = ES_LARGE_ENTITY_RECORDS
+ELASTICSEARCH_FUZZY_MAX_EXPANSIONS = ES_FUZZY_MAX_EXPANSIONS
+# Documents of an entity are routed to a single shard, see datastore.elastic_search.partition
+ELASTICSEARCH_ROUTE_BY_ENTITY = ES_ROUTE_BY_ENTITY
+# Languages with a sub-index of their own behind the index name as an alias, see datastore.elastic_search.partition
+ELASTICSEARCH_LANGUAGE_INDICES = ES_LANGUAGE_INDICES
+# Parts of msearch responses of full text queries that are read, see datastore.elastic_search.query
+ELASTICSEARCH_FULL_TEXT_QUERY_FILTER_PATH = ','.join(['responses.error', 'responses.hits.total',
+                                                      'responses.hits.hits._source.value',
+                                                      'responses.hits.hits.highlight.variants'])
+
+# Values of DATASTORE_EXACT_MATCH, see DataStore._search_with_exact_match
+EXACT_MATCH_OFF = 'off'
+EXACT_MATCH_FUZZY = 'fuzzy'
+EXACT_MATCH_ONLY = 'exact'
 
 # settings dictionary key constants
 ENGINE = 'engine'
+CACHE_SIZE = 'cache_size'
+CACHE_TTL = 'cache_ttl'
+VERSION_POLL_INTERVAL = 'version_poll_interval'
+HIGHLIGHT_CACHE_SIZE = 'highlight_cache_size'
+ASYNC_WORKERS = 'async_workers'
+EXACT_MATCH = 'exact_match'
+EXACT_MATCH_ENTITIES = 'exact_match_entities'
+VOCABULARY_ENTITIES = 'vocabulary_entities'
 ELASTICSEARCH_INDEX_NAME = 'name'
+ELASTICSEARCH_VERSIONS_INDEX_NAME = 'versions_index_name'
 ELASTICSEARCH_DOC_TYPE = 'doc_type'
 ELASTICSEARCH_VERSION_MAJOR, ELASTICSEARCH_VERSION_MINOR, ELASTICSEARCH_VERSION_OTHER = elasticsearch.VERSION
 ELASTICSEARCH_CRF_DATA_INDEX_NAME = 'elasticsearch_crf_data_index_name'
 ELASTICSEARCH_CRF_DATA_DOC_TYPE = 'elasticsearch_crf_data_doc_type'
+MEMORY_ENTITY_DATA_DIRECTORY = 'entity_data_directory_path'
+SQLITE_DATABASE_PATH = 'database_path'
+SQLITE_MMAP_SIZE = 'mmap_size'
@@ -1,13 +1,32 @@
-import elastic_search
+from __future__ import absolute_import
+
+import collections
+import os
+import threading
+
+import six
+
+from datastore import elastic_search
+from datastore import memory
+from datastore import sqlite
+from datastore import utils
+from datastore.cache import HighlightCache, ResultCache, SingleFlight, VersionPoller
 from chatbot_ner.config import ner_logger, CHATBOT_NER_DATASTORE
+from datastore.exact_match import ExactMatchIndex
+from datastore.vocabulary import Vocabulary
 from lib.singleton import Singleton
 from .constants import (ELASTICSEARCH, ENGINE, ELASTICSEARCH_INDEX_NAME, DEFAULT_ENTITY_DATA_DIRECTORY,
-                        ELASTICSEARCH_DOC_TYPE, ELASTICSEARCH_CRF_DATA_INDEX_NAME, ELASTICSEARCH_CRF_DATA_DOC_TYPE)
+                        ELASTICSEARCH_DOC_TYPE, ELASTICSEARCH_CRF_DATA_INDEX_NAME, ELASTICSEARCH_CRF_DATA_DOC_TYPE,
+                        MEMORY, SQLITE, CACHE_SIZE, CACHE_TTL, HIGHLIGHT_CACHE_SIZE, EXACT_MATCH,
+                        EXACT_MATCH_ENTITIES, EXACT_MATCH_FUZZY, EXACT_MATCH_ONLY, VOCABULARY_ENTITIES,
+                        ELASTICSEARCH_VERSIONS_INDEX_NAME, VERSION_POLL_INTERVAL, ELASTICSEARCH_LARGE_ENTITY_RECORDS,
+                        ELASTICSEARCH_FUZZY_MAX_EXPANSIONS)
+from language_utilities.constant import ENGLISH_LANG
 from .exceptions import (DataStoreSettingsImproperlyConfiguredException, EngineNotImplementedException,
                          EngineConnectionException, NonESEngineTransferException, IndexNotFoundException)
 
 
-class DataStore(object):
+class DataStore(six.with_metaclass(Singleton, object)):
     """
     Singleton class to connect to engine storing entity related data
 
@@ -22,14 +41,32 @@ class DataStore(object):
         NAME                                             USES
         --------------------------------------------------------------------------------------------------
         1. elasticsearch                                 https://github.com/elastic/elasticsearch-py
+        2. memory                                        In-process fuzzy index (datastore.memory), no server needed
+        3. sqlite                                        On-disk indexed sqlite file (datastore.sqlite), shared by all
+                                                         processes on a host through the OS page cache
 
     Attributes:
         _engine: Engine name as read from the environment config
         _connection_settings: Connection settings compiled from variables in the environment config
         _store_name: Name of the database/index to query on the engine server
         _client_or_connection: Low level connection object to the engine, None at initialization
+        _connection_pid: Process in which _client_or_connection was connected. A process forked from it connects
+                         again instead of sharing its sockets or file handles
+        _result_cache: datastore.cache.ResultCache of get_similar_dictionary results
+        _highlight_cache: datastore.cache.HighlightCache of parsed elasticsearch highlight fragments
+        _in_flight: datastore.cache.SingleFlight coalescing concurrent identical get_similar_dictionary searches
+        _exact_match_indices: datastore.cache.ResultCache of datastore.exact_match.ExactMatchIndex keyed by
+                              (entity name,), used by get_similar_dictionary with ENGINE=elasticsearch
+        _vocabularies: datastore.cache.ResultCache of datastore.vocabulary.Vocabulary keyed by (entity name,), used
+                       by may_match with ENGINE=elasticsearch
+        _query_planner: datastore.elastic_search.query.QueryPlanner choosing how text detection searches are run
+                        with ENGINE=elasticsearch
+        _version_poller: datastore.cache.VersionPoller dropping cached results of entities modified by other
+                         processes, running with ENGINE=elasticsearch when a versions index is configured
+        _generation: number of times all cached results were dropped
+        _entity_generations: number of times cached results of each entity were dropped, by entity name. Results
+                             of searches that started before their entity's results were dropped are not cached
     """
-    __metaclass__ = Singleton
 
     def __init__(self):
         """
@@ -47,6 +84,25 @@ class DataStore(object):
         # This can be index name for elastic search, table name for SQL,
         self._store_name = None
         self._client_or_connection = None
+        self._connection_pid = None
+        self._result_cache = ResultCache(max_size=CHATBOT_NER_DATASTORE.get(CACHE_SIZE) or 0,
+                                         ttl=CHATBOT_NER_DATASTORE.get(CACHE_TTL))
+        self._highlight_cache = HighlightCache(max_size=CHATBOT_NER_DATASTORE.get(HIGHLIGHT_CACHE_SIZE) or 0)
+        self._in_flight = SingleFlight()
+        self._exact_match = CHATBOT_NER_DATASTORE.get(EXACT_MATCH)
+        self._exact_match_indices = ResultCache(max_size=CHATBOT_NER_DATASTORE.get(EXACT_MATCH_ENTITIES) or 0,
+                                                ttl=CHATBOT_NER_DATASTORE.get(CACHE_TTL))
+        self._vocabularies = ResultCache(max_size=CHATBOT_NER_DATASTORE.get(VOCABULARY_ENTITIES) or 0,
+                                         ttl=CHATBOT_NER_DATASTORE.get(CACHE_TTL))
+        self._index_builds = SingleFlight()
+        self._query_planner = elastic_search.query.QueryPlanner(
+            large_entity_records=ELASTICSEARCH_LARGE_ENTITY_RECORDS,
+            max_expansions=ELASTICSEARCH_FUZZY_MAX_EXPANSIONS,
+            stats_ttl=CHATBOT_NER_DATASTORE.get(CACHE_TTL) or 0)
+        self._version_poller = None
+        self._generation = 0
+        self._entity_generations = {}
+        self._generations_lock = threading.Lock()
         self._connect()
 
     def _connect(self):
@@ -61,12 +117,66 @@ class DataStore(object):
         if self._engine == ELASTICSEARCH:
             self._store_name = self._connection_settings.get(ELASTICSEARCH_INDEX_NAME, '_all')
             self._client_or_connection = elastic_search.connect.connect(**self._connection_settings)
+            self._start_version_poller()
+        elif self._engine == MEMORY:
+            # The in-process store holds no sockets or file handles, forked processes keep sharing it copy-on-write
+            if self._client_or_connection is None:
+                self._client_or_connection = memory.connect.connect(**self._connection_settings)
+        elif self._engine == SQLITE:
+            self._client_or_connection = sqlite.connect.connect(on_snapshot_swap=self._clear_caches,
+                                                                **self._connection_settings)
         else:
             self._client_or_connection = None
             raise EngineNotImplementedException()
 
         if self._client_or_connection is None:
             raise EngineConnectionException(engine=self._engine)
+        self._connection_pid = os.getpid()
+
+    def _start_version_poller(self):
+        """
+        Start polling entity versions with the current connection, stopping the poller of a previous connection. A
+        forked process does not inherit the thread of its parent, so this runs again on every connect.
+        """
+        if self._version_poller is not None:
+            self._version_poller.stop()
+            self._version_poller = None
+        versions_index_name = self._connection_settings.get(ELASTICSEARCH_VERSIONS_INDEX_NAME)
+        interval = CHATBOT_NER_DATASTORE.get(VERSION_POLL_INTERVAL)
+        if not versions_index_name or not interval or self._client_or_connection is None:
+            return
+        connection = self._client_or_connection
+        self._version_poller = VersionPoller(
+            get_versions=lambda: elastic_search.versions.get_entity_versions(connection=connection,
+                                                                             index_name=versions_index_name),
+            on_change=self._invalidate_entity_caches,
+            interval=interval,
+            logger=ner_logger)
+        self._version_poller.start()
+
+    def reconnect(self):
+        """
+        Drop the current connection and connect again. Meant as a post fork hook of worker processes (see
+        chatbot_ner/gunicorn_config.py), so that each worker opens its own connections before its first request.
+        The inherited connection is not closed as its sockets are still used by the parent process.
+
+        Raises:
+            Same as _connect
+        """
+        if self._engine != MEMORY:
+            self._client_or_connection = None
+        self._connect()
+
+    def get_connection_stats(self):
+        """
+        Returns:
+            dict: process the connection was opened in ('pid') and, for elasticsearch, requests sent ('requests'),
+                  connections opened ('new_connections') and requests sent over an already open connection
+                  ('reused_connections') by this process
+        """
+        if self._engine == ELASTICSEARCH and self._client_or_connection is not None:
+            return elastic_search.connect.get_connection_stats(self._client_or_connection)
+        return {'pid': self._connection_pid}
 
     def create(self, **kwargs):
         """
@@ -96,17 +206,23 @@ class DataStore(object):
             DataStoreSettingsImproperlyConfiguredException if connection settings are invalid or missing
             All other exceptions raised by elasticsearch-py library
         """
-        if self._client_or_connection is None:
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
             self._connect()
 
         if self._engine == ELASTICSEARCH:
             self._check_doc_type_for_elasticsearch()
-            elastic_search.create.create_entity_index(connection=self._client_or_connection,
-                                                      index_name=self._store_name,
-                                                      doc_type=self._connection_settings[ELASTICSEARCH_DOC_TYPE],
-                                                      logger=ner_logger,
-                                                      ignore=[400, 404],
-                                                      **kwargs)
+            index_names = elastic_search.partition.get_index_names(self._store_name)
+            for index_name in index_names:
+                elastic_search.create.create_entity_index(connection=self._client_or_connection,
+                                                          index_name=index_name,
+                                                          doc_type=self._connection_settings[ELASTICSEARCH_DOC_TYPE],
+                                                          logger=ner_logger,
+                                                          ignore=[400, 404],
+                                                          **kwargs)
+            if index_names != [self._store_name]:
+                # Searches and reads of all languages go through the alias, writes to the index of their language
+                elastic_search.create.create_alias(connection=self._client_or_connection, index_list=index_names,
+                                                   alias_name=self._store_name, logger=ner_logger)
             crf_data_index = self._connection_settings.get(ELASTICSEARCH_CRF_DATA_INDEX_NAME)
             if crf_data_index is not None:
                 self._check_doc_type_for_crf_data_elasticsearch()
@@ -119,6 +235,8 @@ class DataStore(object):
                     ignore=[400, 404],
                     **kwargs
                 )
+        elif self._engine == SQLITE:
+            sqlite.create.create_tables(connection=self._client_or_connection, logger=ner_logger)
 
     def populate(self, entity_data_directory_path=DEFAULT_ENTITY_DATA_DIRECTORY, csv_file_paths=None, **kwargs):
         """
@@ -137,7 +255,7 @@ class DataStore(object):
             All other exceptions raised by elasticsearch-py library
 
         """
-        if self._client_or_connection is None:
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
             self._connect()
 
         if self._engine == ELASTICSEARCH:
@@ -150,6 +268,19 @@ class DataStore(object):
                                                                csv_file_paths=csv_file_paths,
                                                                logger=ner_logger,
                                                                **kwargs)
+        elif self._engine == MEMORY:
+            memory.populate.create_all_dictionary_data(connection=self._client_or_connection,
+                                                       entity_data_directory_path=entity_data_directory_path,
+                                                       csv_file_paths=csv_file_paths,
+                                                       logger=ner_logger)
+        elif self._engine == SQLITE:
+            sqlite.populate.create_all_dictionary_data(connection=self._client_or_connection,
+                                                       entity_data_directory_path=entity_data_directory_path,
+                                                       csv_file_paths=csv_file_paths,
+                                                       logger=ner_logger)
+
+        self._clear_caches()
+        self._entity_modified(self._get_csv_entity_names(entity_data_directory_path, csv_file_paths))
 
     def delete(self, **kwargs):
         """
@@ -171,15 +302,25 @@ class DataStore(object):
             All exceptions raised by elasticsearch-py library
 
         """
-        if self._client_or_connection is None:
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
             self._connect()
 
         if self._engine == ELASTICSEARCH:
             elastic_search.create.delete_index(connection=self._client_or_connection,
-                                               index_name=self._store_name,
+                                               index_name=elastic_search.partition.get_index_names(self._store_name),
                                                logger=ner_logger,
                                                ignore=[400, 404],
                                                **kwargs)
+            versions_index_name = self._connection_settings.get(ELASTICSEARCH_VERSIONS_INDEX_NAME)
+            if versions_index_name:
+                elastic_search.versions.delete_entity_versions(connection=self._client_or_connection,
+                                                               index_name=versions_index_name)
+        elif self._engine == MEMORY:
+            self._client_or_connection.clear()
+        elif self._engine == SQLITE:
+            sqlite.create.delete_tables(connection=self._client_or_connection, logger=ner_logger)
+
+        self._clear_caches()
 
     def get_entity_dictionary(self, entity_name, **kwargs):
         """
@@ -214,7 +355,7 @@ class DataStore(object):
                 ...
                 u'koramangala': [u'koramangala']}
         """
-        if self._client_or_connection is None:
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
             self._connect()
         results_dictionary = {}
         if self._engine == ELASTICSEARCH:
@@ -227,12 +368,23 @@ class DataStore(object):
                                                                        entity_name=entity_name,
                                                                        request_timeout=request_timeout,
                                                                        **kwargs)
+        elif self._engine == MEMORY:
+            results_dictionary = memory.query.dictionary_query(connection=self._client_or_connection,
+                                                               entity_name=entity_name)
+        elif self._engine == SQLITE:
+            results_dictionary = sqlite.query.dictionary_query(connection=self._client_or_connection,
+                                                               entity_name=entity_name)
 
         return results_dictionary
 
     def get_similar_dictionary(self, entity_name, texts, fuzziness_threshold="auto:4,7",
                                search_language_script=None, **kwargs):
         """
+        Results are cached per (entity_name, text, fuzziness_threshold, search_language_script), see
+        datastore.cache.ResultCache. Only texts not found in the cache are sent to the engine, texts already being
+        searched by another thread are not searched again but share its result. The cache is bypassed when extra
+        kwargs are passed.
+
         Args:
             entity_name: the name of the entity to lookup in the datastore for getting entity values and their variants
             texts(list of strings): the text for which variants need to be find out
@@ -264,10 +416,339 @@ class DataStore(object):
                      u'pune': u'pune'}
                  ]
         """
-        results_list = []
-        if self._client_or_connection is None:
+        if kwargs:
+            return self._search_similar_dictionary(entity_name=entity_name, texts=texts,
+                                                   fuzziness_threshold=fuzziness_threshold,
+                                                   search_language_script=search_language_script, **kwargs)
+
+        keys = [(entity_name, u' '.join(text.lower().split()), fuzziness_threshold, search_language_script)
+                for text in texts]
+        results_list = [self._result_cache.get(key) for key in keys]
+        missed_indices = [index for index, result in enumerate(results_list) if result is None]
+        if missed_indices:
+            def search(indices):
+                missed_texts = [texts[missed_indices[index]] for index in indices]
+                return self._search_similar_dictionary(entity_name=entity_name, texts=missed_texts,
+                                                       fuzziness_threshold=fuzziness_threshold,
+                                                       search_language_script=search_language_script)
+
+            missed_results = self._search_in_flight(keys=[keys[index] for index in missed_indices], search=search)
+            for index, result in zip(missed_indices, missed_results):
+                results_list[index] = result
+
+        # Callers get their own copies so that the cached dictionaries can not be modified
+        return [collections.OrderedDict(result) for result in results_list]
+
+    def get_similar_dictionary_multi(self, entity_names, texts, fuzziness_threshold="auto:4,7",
+                                     search_language_script=None, **kwargs):
+        """
+        Same as get_similar_dictionary but for several entities at once. For elasticsearch all (entity, text) pairs
+        not found in the result cache are sent in a single msearch request instead of one request per entity
+
+        Args:
+            entity_names (list): names of the entities to lookup in the datastore
+            texts (list of strings): the text for which variants need to be find out
+            fuzziness_threshold: fuzziness allowed for search results on entity value variants
+            search_language_script: language of elasticsearch documents which are eligible for match
+            kwargs:
+                For Elasticsearch:
+                    Refer
+                    https://elasticsearch-py.readthedocs.io/en/master/api.html#elasticsearch.Elasticsearch.msearch
+
+        Returns:
+            dict: mapping each entity name to a list of collections.OrderedDict, one per text, same as the output of
+                  get_similar_dictionary for that entity
+
+        Example:
+            db = DataStore()
+            db.get_similar_dictionary_multi(entity_names=['city', 'restaurant'], texts=['dinner at taj in mumbai'])
+
+            Output:
+                {
+                    'city': [{u'mumbai': u'Mumbai'}],
+                    'restaurant': [{u'taj': u'Taj'}]
+                }
+        """
+        pairs = [(entity_name, text) for entity_name in collections.OrderedDict.fromkeys(entity_names)
+                 for text in texts]
+
+        if kwargs:
+            results_list = self._search_similar_dictionary_multi(entity_names_and_texts=pairs,
+                                                                 fuzziness_threshold=fuzziness_threshold,
+                                                                 search_language_script=search_language_script,
+                                                                 **kwargs)
+        else:
+            keys = [(entity_name, u' '.join(text.lower().split()), fuzziness_threshold, search_language_script)
+                    for entity_name, text in pairs]
+            results_list = [self._result_cache.get(key) for key in keys]
+            missed_indices = [index for index, result in enumerate(results_list) if result is None]
+            if missed_indices:
+                def search(indices):
+                    return self._search_similar_dictionary_multi(
+                        entity_names_and_texts=[pairs[missed_indices[index]] for index in indices],
+                        fuzziness_threshold=fuzziness_threshold,
+                        search_language_script=search_language_script)
+
+                missed_results = self._search_in_flight(keys=[keys[index] for index in missed_indices],
+                                                        search=search)
+                for index, result in zip(missed_indices, missed_results):
+                    results_list[index] = result
+
+        results = collections.OrderedDict((entity_name, []) for entity_name, _ in pairs)
+        for (entity_name, _), result in zip(pairs, results_list):
+            results[entity_name].append(collections.OrderedDict(result))
+        return results
+
+    def _search_in_flight(self, keys, search):
+        """
+        Get results of result cache keys missing from the cache, sharing searches with other threads of this process
+        that are searching the same keys at the same time, see datastore.cache.SingleFlight. Results searched by this
+        thread are stored in the result cache before the threads waiting on them are released
+
+        Args:
+            keys (list of tuples): result cache keys to search
+            search (callable): called with the list of indices of keys (in keys) to search, returns their results
+
+        Returns:
+            list: results, one per key in the same order as keys
+        """
+        # Read before searching, so that results of entities modified while they are searched are not cached, and
+        # searches started before the modification are not shared with threads that ask after it
+        generations = [self._get_generation(entity_name=key[0]) for key in keys]
+
+        def search_and_cache(indices):
+            results = search(indices)
+            for index, result in zip(indices, results):
+                if self._get_generation(entity_name=keys[index][0]) == generations[index]:
+                    self._result_cache.set(keys[index], result)
+            return results
+
+        return self._in_flight.do(keys=[key + generation for key, generation in zip(keys, generations)],
+                                  function=search_and_cache)
+
+    def _get_generation(self, entity_name):
+        """
+        Args:
+            entity_name (str): name of the entity
+
+        Returns:
+            tuple: generation of cached results of entity_name, changes every time they are dropped
+        """
+        with self._generations_lock:
+            return self._generation, self._entity_generations.get(entity_name, 0)
+
+    def _search_similar_dictionary_multi(self, entity_names_and_texts, fuzziness_threshold,
+                                         search_language_script=None, **kwargs):
+        """
+        Query the engine for get_similar_dictionary_multi, bypassing the result cache
+
+        Args:
+            entity_names_and_texts (list of tuples): (entity_name, text) pairs to search
+            fuzziness_threshold: fuzziness allowed for search results on entity value variants
+            search_language_script: language of elasticsearch documents which are eligible for match
+
+        Returns:
+            list of collections.OrderedDict: one dictionary per pair, in the same order
+        """
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
             self._connect()
         if self._engine == ELASTICSEARCH:
+            if not kwargs and self._use_exact_match():
+                return self._search_with_exact_match(entity_names_and_texts=entity_names_and_texts,
+                                                     fuzziness_threshold=fuzziness_threshold,
+                                                     search_language_script=search_language_script)
+            self._check_doc_type_for_elasticsearch()
+            request_timeout = self._connection_settings.get('request_timeout', 20)
+            return elastic_search.query.full_text_query_multi(
+                connection=self._client_or_connection,
+                index_name=self._store_name,
+                doc_type=self._connection_settings[ELASTICSEARCH_DOC_TYPE],
+                entity_names_and_sentences=entity_names_and_texts,
+                fuzziness_threshold=fuzziness_threshold,
+                search_language_script=search_language_script,
+                request_timeout=request_timeout,
+                highlight_cache=self._highlight_cache,
+                planner=self._query_planner,
+                **kwargs)
+
+        # Embedded engines have no round trips to save, search each pair on its own
+        return [self._search_similar_dictionary(entity_name=entity_name, texts=[text],
+                                                fuzziness_threshold=fuzziness_threshold,
+                                                search_language_script=search_language_script)[0]
+                for entity_name, text in entity_names_and_texts]
+
+    def _clear_caches(self):
+        """
+        Drop all cached results and in process indices of all entities
+        """
+        with self._generations_lock:
+            self._generation += 1
+        self._result_cache.clear()
+        self._highlight_cache.clear()
+        self._exact_match_indices.clear()
+        self._vocabularies.clear()
+        self._query_planner.clear()
+
+    def _invalidate_entity_caches(self, entity_name):
+        """
+        Drop cached results and in process indices of a single entity
+        """
+        with self._generations_lock:
+            self._entity_generations[entity_name] = self._entity_generations.get(entity_name, 0) + 1
+        self._result_cache.invalidate_entity(entity_name)
+        self._highlight_cache.invalidate_entity(entity_name)
+        self._exact_match_indices.invalidate_entity(entity_name)
+        self._vocabularies.invalidate_entity(entity_name)
+        self._query_planner.invalidate_entity(entity_name)
+
+    def _entity_modified(self, entity_names, connection=None):
+        """
+        Drop cached results of modified entities in this process and, with ENGINE=elasticsearch, bump their versions
+        so that other processes drop theirs on their next version poll. Failing to bump versions is logged and not
+        raised, as the data itself was written and other processes still pick it up once their cached results expire
+
+        Args:
+            entity_names (iterable): names of the modified entities
+            connection (elasticsearch.client.Elasticsearch, optional): client of the cluster the entities were
+                                                                       modified in. Defaults to the current one
+        """
+        entity_names = list(entity_names)
+        for entity_name in entity_names:
+            self._invalidate_entity_caches(entity_name)
+
+        versions_index_name = self._connection_settings.get(ELASTICSEARCH_VERSIONS_INDEX_NAME)
+        if self._engine != ELASTICSEARCH or not versions_index_name or not entity_names:
+            return
+        try:
+            elastic_search.versions.bump_entity_versions(connection=connection or self._client_or_connection,
+                                                         index_name=versions_index_name,
+                                                         doc_type=self._connection_settings[ELASTICSEARCH_DOC_TYPE],
+                                                         entity_names=entity_names)
+        except Exception as e:
+            ner_logger.exception('datastore: failed to bump versions of %s: %s' % (entity_names, e))
+
+    def _use_exact_match(self):
+        return self._exact_match in (EXACT_MATCH_FUZZY, EXACT_MATCH_ONLY) and self._exact_match_indices.enabled
+
+    def _get_entity_index(self, indices, index_class, entity_name):
+        """
+        Get an in process index of entity_name, building it from all records of the entity if it is not cached.
+        Concurrent builds of the same index are coalesced
+
+        Args:
+            indices (datastore.cache.ResultCache): cache of indices of index_class keyed by (entity name,)
+            index_class (type): class of the index, called with an iterable of records of the entity
+            entity_name (str): name of the entity
+
+        Returns:
+            instance of index_class over all records of the entity
+        """
+        key = (entity_name,)
+        index = indices.get(key)
+        if index is not None:
+            return index
+
+        # an index built from records read before a write to the entity is returned to the callers that asked
+        # before that write, but neither cached nor joined by callers that ask after it
+        generation = self._get_generation(entity_name=entity_name)
+
+        def build(_):
+            records = (hit['_source'] for hit in self.iter_entity_data(entity_name=entity_name))
+            built_index = index_class(records)
+            if self._get_generation(entity_name=entity_name) == generation:
+                indices.set(key, built_index)
+            return [built_index]
+
+        return self._index_builds.do(keys=[(index_class.__name__, entity_name) + generation], function=build)[0]
+
+    def may_match(self, entity_name, texts, fuzziness_threshold="auto:4,7"):
+        """
+        Check which of the texts could match some variant of entity_name with get_similar_dictionary, using an in
+        process vocabulary of the entity (see datastore.vocabulary.Vocabulary) instead of searching the datastore.
+        Always True for all texts unless ENGINE=elasticsearch and DATASTORE_VOCABULARY_ENTITIES is set
+
+        Args:
+            entity_name (str): name of the entity
+            texts (list of strings): texts that would be passed to get_similar_dictionary
+            fuzziness_threshold: fuzziness that would be passed to get_similar_dictionary
+
+        Returns:
+            list of bool: one per text, False if get_similar_dictionary is certain to find nothing in that text
+        """
+        if self._engine != ELASTICSEARCH or not self._vocabularies.enabled:
+            return [True] * len(texts)
+
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
+            self._connect()
+        vocabulary = self._get_entity_index(indices=self._vocabularies, index_class=Vocabulary,
+                                            entity_name=entity_name)
+        # Same fuzziness as elasticsearch is searched with, older versions only support plain "auto"
+        fuzziness_threshold = elastic_search.query.get_dynamic_fuzziness_threshold(fuzziness_threshold)
+        return [vocabulary.may_match(text=text, fuzziness_threshold=fuzziness_threshold) for text in texts]
+
+    def _search_with_exact_match(self, entity_names_and_texts, fuzziness_threshold, search_language_script=None):
+        """
+        Find variants occurring exactly in the texts with the in process exact match indices of the entities. With
+        EXACT_MATCH_FUZZY, tokens of a text not covered by any exact match are then fuzzy searched in elasticsearch,
+        all such searches being sent in a single msearch request, and the fuzzy results are added after the exact
+        matches. Texts fully covered by exact matches are not sent to elasticsearch at all
+
+        Args:
+            entity_names_and_texts (list of tuples): (entity_name, text) pairs to search
+            fuzziness_threshold: fuzziness allowed for search results on entity value variants
+            search_language_script: language of records which are eligible for match, records in english are always
+                                    eligible
+
+        Returns:
+            list of collections.OrderedDict: one dictionary per pair, in the same order
+        """
+        language_scripts = None
+        if search_language_script is not None:
+            language_scripts = {search_language_script, ENGLISH_LANG}
+
+        results_list, fuzzy_indices, fuzzy_pairs = [], [], []
+        for entity_name, text in entity_names_and_texts:
+            index = self._get_entity_index(indices=self._exact_match_indices, index_class=ExactMatchIndex,
+                                           entity_name=entity_name)
+            variants_to_values, unmatched_text = index.search(text=text, language_scripts=language_scripts)
+            if unmatched_text and self._exact_match == EXACT_MATCH_FUZZY:
+                fuzzy_indices.append(len(results_list))
+                fuzzy_pairs.append((entity_name, unmatched_text))
+            results_list.append(variants_to_values)
+
+        if fuzzy_pairs:
+            self._check_doc_type_for_elasticsearch()
+            request_timeout = self._connection_settings.get('request_timeout', 20)
+            fuzzy_results = elastic_search.query.full_text_query_multi(
+                connection=self._client_or_connection,
+                index_name=self._store_name,
+                doc_type=self._connection_settings[ELASTICSEARCH_DOC_TYPE],
+                entity_names_and_sentences=fuzzy_pairs,
+                fuzziness_threshold=fuzziness_threshold,
+                search_language_script=search_language_script,
+                request_timeout=request_timeout,
+                highlight_cache=self._highlight_cache,
+                planner=self._query_planner)
+            for index, variants_to_values in zip(fuzzy_indices, fuzzy_results):
+                for variant, value in variants_to_values.items():
+                    results_list[index].setdefault(variant, value)
+        return results_list
+
+    def _search_similar_dictionary(self, entity_name, texts, fuzziness_threshold, search_language_script=None,
+                                   **kwargs):
+        """
+        Query the engine for get_similar_dictionary, bypassing the result cache. See get_similar_dictionary for
+        arguments and return value
+        """
+        results_list = []
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
+            self._connect()
+        if self._engine == ELASTICSEARCH and not kwargs and self._use_exact_match():
+            results_list = self._search_with_exact_match(
+                entity_names_and_texts=[(entity_name, text) for text in texts],
+                fuzziness_threshold=fuzziness_threshold,
+                search_language_script=search_language_script)
+        elif self._engine == ELASTICSEARCH:
             self._check_doc_type_for_elasticsearch()
             request_timeout = self._connection_settings.get('request_timeout', 20)
             results_list = elastic_search.query.full_text_query(connection=self._client_or_connection,
@@ -279,9 +760,84 @@ class DataStore(object):
                                                                 fuzziness_threshold=fuzziness_threshold,
                                                                 search_language_script=search_language_script,
                                                                 request_timeout=request_timeout,
+                                                                highlight_cache=self._highlight_cache,
+                                                                planner=self._query_planner,
                                                                 **kwargs)
+        elif self._engine == MEMORY:
+            results_list = memory.query.full_text_query(connection=self._client_or_connection,
+                                                        entity_name=entity_name,
+                                                        sentences=texts,
+                                                        fuzziness_threshold=fuzziness_threshold,
+                                                        search_language_script=search_language_script)
+        elif self._engine == SQLITE:
+            results_list = sqlite.query.full_text_query(connection=self._client_or_connection,
+                                                        entity_name=entity_name,
+                                                        sentences=texts,
+                                                        fuzziness_threshold=fuzziness_threshold,
+                                                        search_language_script=search_language_script)
         return results_list
 
+    def get_cache_stats(self):
+        """
+        Returns:
+            dict: hit and miss counters and current size of the get_similar_dictionary result cache
+        """
+        return self._result_cache.get_stats()
+
+    def get_in_flight_stats(self):
+        """
+        Returns:
+            dict: number of get_similar_dictionary results searched ('calls'), results shared with a concurrent
+                  identical search instead of searching again ('shared') and searches currently in flight
+                  ('in_flight')
+        """
+        return self._in_flight.get_stats()
+
+    def get_exact_match_stats(self):
+        """
+        Returns:
+            dict: hit and miss counters and current size of the cache of exact match indices, along with the mode set
+                  by DATASTORE_EXACT_MATCH ('mode')
+        """
+        stats = self._exact_match_indices.get_stats()
+        stats['mode'] = self._exact_match
+        return stats
+
+    def get_vocabulary_stats(self):
+        """
+        Returns:
+            dict: hit and miss counters and current size of the cache of entity vocabularies used by may_match
+        """
+        return self._vocabularies.get_stats()
+
+    def get_query_plan_stats(self):
+        """
+        Returns:
+            dict: number of text detection searches run with bounded fuzzy expansions ('bounded_fuzzy') and with
+                  the full fuzzy query ('fuzzy'), along with number of entities whose record count is known
+                  ('entities')
+        """
+        return self._query_planner.get_stats()
+
+    def get_version_stats(self):
+        """
+        Returns:
+            dict: number of entity version polls done ('polls'), entity version changes seen ('changes') and
+                  entities with a version ('entities'), empty if versions are not polled
+        """
+        if self._version_poller is None:
+            return {}
+        return self._version_poller.get_stats()
+
+    def get_highlight_stats(self):
+        """
+        Returns:
+            dict: hit and miss counters and current size of the cache of parsed elasticsearch highlight fragments,
+                  along with total seconds spent parsing search results ('parse_time') and number of search results
+                  parsed ('parse_count')
+        """
+        return self._highlight_cache.get_stats()
+
     def delete_entity(self, entity_name, **kwargs):
         """
         Deletes the entity data for entity named entity_named from the datastore
@@ -294,7 +850,7 @@ class DataStore(object):
                     Refer http://elasticsearch-py.readthedocs.io/en/master/helpers.html#elasticsearch.helpers.bulk
 
         """
-        if self._client_or_connection is None:
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
             self._connect()
 
         if self._engine == ELASTICSEARCH:
@@ -307,8 +863,19 @@ class DataStore(object):
                                                           logger=ner_logger,
                                                           ignore=[400, 404],
                                                           **kwargs)
-
-    def repopulate(self, entity_data_directory_path=DEFAULT_ENTITY_DATA_DIRECTORY, csv_file_paths=None, **kwargs):
+        elif self._engine == MEMORY:
+            memory.populate.delete_entity_by_name(connection=self._client_or_connection,
+                                                  entity_name=entity_name,
+                                                  logger=ner_logger)
+        elif self._engine == SQLITE:
+            sqlite.populate.delete_entity_by_name(connection=self._client_or_connection,
+                                                  entity_name=entity_name,
+                                                  logger=ner_logger)
+
+        self._entity_modified([entity_name])
+
+    def repopulate(self, entity_data_directory_path=DEFAULT_ENTITY_DATA_DIRECTORY, csv_file_paths=None, diff=False,
+                   **kwargs):
         """
         Deletes the existing data and repopulates it for entities from csv files stored in directory path indicated by
         entity_data_directory_path and from csv files at file paths in csv_file_paths list
@@ -317,6 +884,8 @@ class DataStore(object):
             entity_data_directory_path: Directory path containing CSV files to populate the datastore from.
                                         See the CSV file structure explanation in the datastore docs
             csv_file_paths: Optional, list of absolute file paths to csv files
+            diff: Optional, only write records whose content changed instead of deleting and re-adding all records
+                  of the entities. Only supported by elasticsearch, other engines ignore it. Default is False
             kwargs:
                 For Elasticsearch:
                     Refer http://elasticsearch-py.readthedocs.io/en/master/helpers.html#elasticsearch.helpers.bulk
@@ -325,7 +894,7 @@ class DataStore(object):
             DataStoreSettingsImproperlyConfiguredException if connection settings are invalid or missing
             All other exceptions raised by elasticsearch-py library
         """
-        if self._client_or_connection is None:
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
             self._connect()
 
         if self._engine == ELASTICSEARCH:
@@ -336,10 +905,42 @@ class DataStore(object):
                                                                      ELASTICSEARCH_DOC_TYPE],
                                                                  entity_data_directory_path=entity_data_directory_path,
                                                                  csv_file_paths=csv_file_paths,
+                                                                 diff=diff,
                                                                  logger=ner_logger,
                                                                  ignore=[400, 404],
                                                                  **kwargs)
             # TODO: repopulate code for crf index missing
+        elif self._engine == MEMORY:
+            memory.populate.recreate_all_dictionary_data(connection=self._client_or_connection,
+                                                         entity_data_directory_path=entity_data_directory_path,
+                                                         csv_file_paths=csv_file_paths,
+                                                         logger=ner_logger)
+        elif self._engine == SQLITE:
+            sqlite.populate.recreate_all_dictionary_data(connection=self._client_or_connection,
+                                                         entity_data_directory_path=entity_data_directory_path,
+                                                         csv_file_paths=csv_file_paths,
+                                                         logger=ner_logger)
+
+        self._clear_caches()
+        self._entity_modified(self._get_csv_entity_names(entity_data_directory_path, csv_file_paths))
+
+    @staticmethod
+    def _get_csv_entity_names(entity_data_directory_path=None, csv_file_paths=None):
+        # Entity data csv files are named after their entity, see datastore.elastic_search.populate
+        return [os.path.splitext(os.path.basename(csv_file_path))[0]
+                for csv_file_path in utils.get_csv_file_paths(entity_data_directory_path=entity_data_directory_path,
+                                                              csv_file_paths=csv_file_paths)]
+
+    def _get_update_index_name(self):
+        """
+        Returns:
+            str: name of the index entity data updates are written to, the index the transfer alias currently points
+                 to, or the index name itself when it is the alias of per-language sub-indices, as writes then pick
+                 the sub-index of their language (see datastore.elastic_search.partition)
+        """
+        if elastic_search.partition.get_index_names(self._store_name) != [self._store_name]:
+            return self._store_name
+        return elastic_search.connect.get_current_live_index(self._store_name)
 
     def _check_doc_type_for_elasticsearch(self):
         """
@@ -370,11 +971,15 @@ class DataStore(object):
         Returns:
              boolean, True if DataStore structure exists, False otherwise
         """
-        if self._client_or_connection is None:
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
             self._connect()
 
         if self._engine == ELASTICSEARCH:
             return elastic_search.create.exists(connection=self._client_or_connection, index_name=self._store_name)
+        elif self._engine == MEMORY:
+            return True
+        elif self._engine == SQLITE:
+            return sqlite.create.exists(connection=self._client_or_connection)
 
         return False
 
@@ -389,12 +994,12 @@ class DataStore(object):
                 For Elasticsearch:
                 Refer http://elasticsearch-py.readthedocs.io/en/master/helpers.html#elasticsearch.helpers.bulk
         """
-        if self._client_or_connection is None:
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
             self._connect()
 
         if self._engine == ELASTICSEARCH:
             self._check_doc_type_for_elasticsearch()
-            update_index = elastic_search.connect.get_current_live_index(self._store_name)
+            update_index = self._get_update_index_name()
             elastic_search.populate.entity_data_update(connection=self._client_or_connection,
                                                        index_name=update_index,
                                                        doc_type=self._connection_settings[
@@ -404,6 +1009,43 @@ class DataStore(object):
                                                        entity_name=entity_name,
                                                        language_script=language_script,
                                                        **kwargs)
+        elif self._engine == MEMORY:
+            memory.populate.entity_data_update(connection=self._client_or_connection,
+                                               entity_data=entity_data,
+                                               entity_name=entity_name,
+                                               language_script=language_script,
+                                               logger=ner_logger)
+        elif self._engine == SQLITE:
+            sqlite.populate.entity_data_update(connection=self._client_or_connection,
+                                               entity_data=entity_data,
+                                               entity_name=entity_name,
+                                               language_script=language_script,
+                                               logger=ner_logger)
+
+        self._entity_modified([entity_name])
+
+    def get_entity_names(self, **kwargs):
+        """
+        Fetch names of all entities in the datastore
+
+        Returns:
+            (list): sorted list of entity names
+        """
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
+            self._connect()
+
+        if self._engine == ELASTICSEARCH:
+            self._check_doc_type_for_elasticsearch()
+            request_timeout = self._connection_settings.get('request_timeout', 20)
+            return elastic_search.query.get_entity_names(connection=self._client_or_connection,
+                                                         index_name=self._store_name,
+                                                         doc_type=self._connection_settings[ELASTICSEARCH_DOC_TYPE],
+                                                         request_timeout=request_timeout,
+                                                         **kwargs)
+        elif self._engine == MEMORY:
+            return memory.query.get_entity_names(connection=self._client_or_connection)
+        elif self._engine == SQLITE:
+            return sqlite.query.get_entity_names(connection=self._client_or_connection)
 
     def get_entity_supported_languages(self, entity_name, **kwargs):
         """
@@ -413,7 +1055,7 @@ class DataStore(object):
         Returns:
             (list): List of str language codes
         """
-        if self._client_or_connection is None:
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
             self._connect()
 
         if self._engine == ELASTICSEARCH:
@@ -429,6 +1071,12 @@ class DataStore(object):
             )
 
             return results_dictionary
+        elif self._engine == MEMORY:
+            return memory.query.get_entity_supported_languages(connection=self._client_or_connection,
+                                                               entity_name=entity_name)
+        elif self._engine == SQLITE:
+            return sqlite.query.get_entity_supported_languages(connection=self._client_or_connection,
+                                                               entity_name=entity_name)
 
     def get_entity_unique_values(self, entity_name, **kwargs):
         """
@@ -438,7 +1086,7 @@ class DataStore(object):
         Returns:
             (list): list of values in this entity
         """
-        if self._client_or_connection is None:
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
             self._connect()
 
         if self._engine == ELASTICSEARCH:
@@ -454,6 +1102,102 @@ class DataStore(object):
             )
 
             return results_dictionary
+        elif self._engine == MEMORY:
+            return memory.query.get_entity_unique_values(connection=self._client_or_connection,
+                                                         entity_name=entity_name,
+                                                         **kwargs)
+        elif self._engine == SQLITE:
+            return sqlite.query.get_entity_unique_values(connection=self._client_or_connection,
+                                                         entity_name=entity_name,
+                                                         **kwargs)
+
+    def get_entity_unique_values_page(self, entity_name, size, after=None, **kwargs):
+        """
+        Get one page of the sorted unique values in this entity
+        Args:
+            entity_name (str): Name of the entity for which the unique values are to be fetched
+            size (int): maximum number of values to fetch
+            after (str, optional): fetch values sorted after this value, the last value of the previous page.
+                If None, the first page is fetched
+            kwargs: value_search_term, variant_search_term and empty_variants_only filters
+        Returns:
+            (tuple): list of values, and the value to pass as after for the next page or None on the last page
+        """
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
+            self._connect()
+
+        if self._engine == ELASTICSEARCH:
+            self._check_doc_type_for_elasticsearch()
+            request_timeout = self._connection_settings.get('request_timeout', 20)
+            return elastic_search.query.get_entity_unique_values_page(
+                connection=self._client_or_connection,
+                index_name=self._store_name,
+                doc_type=self._connection_settings[ELASTICSEARCH_DOC_TYPE],
+                entity_name=entity_name,
+                size=size,
+                after=after,
+                request_timeout=request_timeout,
+                **kwargs
+            )
+        elif self._engine == MEMORY:
+            return memory.query.get_entity_unique_values_page(connection=self._client_or_connection,
+                                                              entity_name=entity_name, size=size, after=after,
+                                                              **kwargs)
+        elif self._engine == SQLITE:
+            return sqlite.query.get_entity_unique_values_page(connection=self._client_or_connection,
+                                                              entity_name=entity_name, size=size, after=after,
+                                                              **kwargs)
+
+    def iter_entity_unique_values(self, entity_name, **kwargs):
+        """
+        Iterate over the sorted unique values in this entity, fetching one page at a time where the engine
+        supports it
+        Args:
+            entity_name (str): Name of the entity for which the unique values are to be fetched
+            kwargs: value_search_term, variant_search_term and empty_variants_only filters
+        Returns:
+            (iterator): values in this entity
+        """
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
+            self._connect()
+
+        if self._engine == ELASTICSEARCH:
+            self._check_doc_type_for_elasticsearch()
+            request_timeout = self._connection_settings.get('request_timeout', 20)
+            return elastic_search.query.iter_entity_unique_values(
+                connection=self._client_or_connection,
+                index_name=self._store_name,
+                doc_type=self._connection_settings[ELASTICSEARCH_DOC_TYPE],
+                entity_name=entity_name,
+                request_timeout=request_timeout,
+                **kwargs
+            )
+        return iter(self.get_entity_unique_values(entity_name=entity_name, **kwargs))
+
+    def get_entity_unique_values_count(self, entity_name, **kwargs):
+        """
+        Count unique values in this entity
+        Args:
+            entity_name (str): Name of the entity for which the unique values are to be counted
+            kwargs: value_search_term, variant_search_term and empty_variants_only filters
+        Returns:
+            (int): number of values in this entity
+        """
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
+            self._connect()
+
+        if self._engine == ELASTICSEARCH:
+            self._check_doc_type_for_elasticsearch()
+            request_timeout = self._connection_settings.get('request_timeout', 20)
+            return elastic_search.query.get_entity_unique_values_count(
+                connection=self._client_or_connection,
+                index_name=self._store_name,
+                doc_type=self._connection_settings[ELASTICSEARCH_DOC_TYPE],
+                entity_name=entity_name,
+                request_timeout=request_timeout,
+                **kwargs
+            )
+        return len(self.get_entity_unique_values(entity_name=entity_name, **kwargs))
 
     def delete_entity_data_by_values(self, entity_name, values=None, **kwargs):
         """
@@ -465,12 +1209,12 @@ class DataStore(object):
         Returns:
             None
         """
-        if self._client_or_connection is None:
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
             self._connect()
 
         if self._engine == ELASTICSEARCH:
             self._check_doc_type_for_elasticsearch()
-            update_index = elastic_search.connect.get_current_live_index(self._store_name)
+            update_index = self._get_update_index_name()
             request_timeout = self._connection_settings.get('request_timeout', 20)
             elastic_search.populate.delete_entity_data_by_values(
                 connection=self._client_or_connection,
@@ -481,6 +1225,16 @@ class DataStore(object):
                 request_timeout=request_timeout,
                 **kwargs
             )
+        elif self._engine == MEMORY:
+            memory.populate.delete_entity_data_by_values(connection=self._client_or_connection,
+                                                         entity_name=entity_name,
+                                                         values=values)
+        elif self._engine == SQLITE:
+            sqlite.populate.delete_entity_data_by_values(connection=self._client_or_connection,
+                                                         entity_name=entity_name,
+                                                         values=values)
+
+        self._entity_modified([entity_name])
 
     def add_entity_data(self, entity_name, value_variant_records, **kwargs):
         """
@@ -492,12 +1246,12 @@ class DataStore(object):
         Returns:
             None
         """
-        if self._client_or_connection is None:
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
             self._connect()
 
         if self._engine == ELASTICSEARCH:
             self._check_doc_type_for_elasticsearch()
-            update_index = elastic_search.connect.get_current_live_index(self._store_name)
+            update_index = self._get_update_index_name()
             elastic_search.populate.add_entity_data(
                 connection=self._client_or_connection,
                 index_name=update_index,
@@ -506,6 +1260,62 @@ class DataStore(object):
                 value_variant_records=value_variant_records,
                 **kwargs
             )
+        elif self._engine == MEMORY:
+            memory.populate.add_entity_data(connection=self._client_or_connection,
+                                            entity_name=entity_name,
+                                            value_variant_records=value_variant_records)
+        elif self._engine == SQLITE:
+            sqlite.populate.add_entity_data(connection=self._client_or_connection,
+                                            entity_name=entity_name,
+                                            value_variant_records=value_variant_records)
+
+        self._entity_modified([entity_name])
+
+    def upsert_entity_data(self, entity_name, value_variant_records, values_to_delete=None, replace=False, **kwargs):
+        """
+        Write the specified records under this entity in place of all existing records of their values
+        Args:
+            entity_name (str): Name of the entity
+            value_variant_records (list): List of dicts with the value, variants and language script
+                Sample Dict: {'value': 'value', 'language_script': 'en', variants': ['variant 1', 'variant 2']}
+            values_to_delete (list, optional): values whose records are deleted in all languages
+            replace (bool, optional): if True, all other records of the entity are deleted as well.
+                Defaults to False
+        Returns:
+            None
+        """
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
+            self._connect()
+
+        if self._engine == ELASTICSEARCH:
+            self._check_doc_type_for_elasticsearch()
+            update_index = self._get_update_index_name()
+            request_timeout = self._connection_settings.get('request_timeout', 20)
+            elastic_search.populate.upsert_entity_data(
+                connection=self._client_or_connection,
+                index_name=update_index,
+                doc_type=self._connection_settings[ELASTICSEARCH_DOC_TYPE],
+                entity_name=entity_name,
+                value_variant_records=value_variant_records,
+                values_to_delete=values_to_delete,
+                replace=replace,
+                request_timeout=request_timeout,
+                **kwargs
+            )
+        elif self._engine == MEMORY:
+            memory.populate.upsert_entity_data(connection=self._client_or_connection,
+                                               entity_name=entity_name,
+                                               value_variant_records=value_variant_records,
+                                               values_to_delete=values_to_delete,
+                                               replace=replace)
+        elif self._engine == SQLITE:
+            sqlite.populate.upsert_entity_data(connection=self._client_or_connection,
+                                               entity_name=entity_name,
+                                               value_variant_records=value_variant_records,
+                                               values_to_delete=values_to_delete,
+                                               replace=replace)
+
+        self._entity_modified([entity_name])
 
     def get_entity_data(self, entity_name, values=None, **kwargs):
         """
@@ -517,7 +1327,7 @@ class DataStore(object):
         Returns:
             (list): List of records with entity data matching the filters
         """
-        if self._client_or_connection is None:
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
             self._connect()
 
         if self._engine == ELASTICSEARCH:
@@ -534,6 +1344,50 @@ class DataStore(object):
             )
 
             return results_dictionary
+        elif self._engine == MEMORY:
+            return memory.query.get_entity_data(connection=self._client_or_connection,
+                                                entity_name=entity_name,
+                                                values=values)
+        elif self._engine == SQLITE:
+            return sqlite.query.get_entity_data(connection=self._client_or_connection,
+                                                entity_name=entity_name,
+                                                values=values)
+
+    def iter_entity_data(self, entity_name, values=None, **kwargs):
+        """
+        Same as get_entity_data but returns a generator over the records, so that records of large entities can be
+        processed without holding all of them in memory
+
+        Args:
+            entity_name (str): Name of the entity for which the entity data is to be fetched
+            values (list): List of values for which the entity data is to be fetched
+        Returns:
+            generator: records with entity data matching the filters, with '_id' and '_source' keys
+        """
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
+            self._connect()
+
+        if self._engine == ELASTICSEARCH:
+            self._check_doc_type_for_elasticsearch()
+            request_timeout = self._connection_settings.get('request_timeout', 20)
+            return elastic_search.query.iter_entity_data(
+                connection=self._client_or_connection,
+                index_name=self._store_name,
+                doc_type=self._connection_settings[ELASTICSEARCH_DOC_TYPE],
+                entity_name=entity_name,
+                values=values,
+                request_timeout=request_timeout,
+                **kwargs
+            )
+        elif self._engine == MEMORY:
+            # Records are held in memory by this engine anyway
+            return iter(memory.query.get_entity_data(connection=self._client_or_connection,
+                                                     entity_name=entity_name,
+                                                     values=values))
+        elif self._engine == SQLITE:
+            return sqlite.query.iter_entity_data(connection=self._client_or_connection,
+                                                 entity_name=entity_name,
+                                                 values=values)
 
     def transfer_entities_elastic_search(self, entity_list):
         """
@@ -552,6 +1406,8 @@ class DataStore(object):
         destination = CHATBOT_NER_DATASTORE.get(self._engine).get('destination_url')
         es_object = elastic_search.transfer.ESTransfer(source=es_url, destination=destination)
         es_object.transfer_specific_entities(list_of_entities=entity_list)
+        # Processes reading from the destination cluster poll the versions index of the destination
+        self._entity_modified(entity_list, connection=es_object.get_destination_connection())
 
     def get_crf_data_for_entity_name(self, entity_name, **kwargs):
         """
@@ -586,7 +1442,7 @@ class DataStore(object):
             }
         """
         ner_logger.debug('Datastore, get_entity_training_data, entity_name %s' % entity_name)
-        if self._client_or_connection is None:
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
             self._connect()
         results_dictionary = {}
         if self._engine == ELASTICSEARCH:
@@ -606,6 +1462,40 @@ class DataStore(object):
             ner_logger.debug('Datastore, get_entity_training_data, results_dictionary %s' % str(entity_name))
         return results_dictionary
 
+    def iter_crf_data_for_entity_name(self, entity_name, **kwargs):
+        """
+        Same as get_crf_data_for_entity_name but returns a generator over (sentence, entities) pairs, so that
+        training data of large entities can be processed without holding all of it in memory
+
+        Args:
+            entity_name (str): Entity name for which training data needs to be obtained
+            kwargs:
+                For Elasticsearch:
+                    Refer https://elasticsearch-py.readthedocs.io/en/master/api.html#elasticsearch.Elasticsearch.search
+        Returns:
+            generator: (sentence, list of entities in the sentence) tuples
+
+        Raises:
+             IndexNotFoundException if es_training_index was not found in connection settings
+        """
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
+            self._connect()
+        if self._engine == ELASTICSEARCH:
+            es_training_index = self._connection_settings.get(ELASTICSEARCH_CRF_DATA_INDEX_NAME)
+            if es_training_index is None:
+                raise IndexNotFoundException('Index for ELASTICSEARCH_CRF_DATA_INDEX_NAME not found. '
+                                             'Please configure the same')
+            self._check_doc_type_for_crf_data_elasticsearch()
+            request_timeout = self._connection_settings.get('request_timeout', 20)
+            return elastic_search.query.iter_crf_data_for_entity_name(
+                connection=self._client_or_connection,
+                index_name=es_training_index,
+                doc_type=self._connection_settings[ELASTICSEARCH_CRF_DATA_DOC_TYPE],
+                entity_name=entity_name,
+                request_timeout=request_timeout,
+                **kwargs)
+        return iter([])
+
     def update_entity_crf_data(self, entity_name, entity_list, language_script, sentence_list, **kwargs):
         """
         This method is used to populate the training data for a given entity
@@ -621,7 +1511,7 @@ class DataStore(object):
         Raises:
             IndexNotFoundException if es_training_index was not found in connection settings
         """
-        if self._client_or_connection is None:
+        if self._client_or_connection is None or self._connection_pid != os.getpid():
             self._connect()
 
         if self._engine == ELASTICSEARCH:
@@ -1,5 +1,9 @@
-import connect
-import create
-import populate
-import query
-import transfer
\ No newline at end of file
+from __future__ import absolute_import
+
+from datastore.elastic_search import connect
+from datastore.elastic_search import create
+from datastore.elastic_search import partition
+from datastore.elastic_search import populate
+from datastore.elastic_search import query
+from datastore.elastic_search import transfer
+from datastore.elastic_search import versions
@@ -1,4 +1,6 @@
-from utils import filter_kwargs
+from __future__ import absolute_import
+
+from datastore.elastic_search.utils import filter_kwargs
 
 log_prefix = 'datastore.elastic_search.create'
 
@@ -9,7 +11,7 @@ def delete_index(connection, index_name, logger, **kwargs):
 
     Args:
         connection: Elasticsearch client object
-        index_name: The name of the index
+        index_name (str or list): The name of the index, or a list of names of indices to delete
         logger: logging object to log at debug and exception level
         kwargs:
             body: The configuration for the index (settings and mappings)
@@ -139,6 +141,11 @@ def create_entity_index(connection, index_name, doc_type, logger, **kwargs):
                     'type': 'text',
                     'analyzer': 'my_analyzer',
                     'norms': {'enabled': False},  # Needed if we want to give longer variants higher scores
+                },
+                # Hash of entity_data, value, language_script and variants, see datastore.utils.get_content_hash
+                'content_hash': {
+                    'type': 'keyword',
+                    'index': False,
                 }
             }
         }
@@ -205,6 +212,6 @@ def create_alias(connection, index_list, alias_name, logger, **kwargs):
         **kwargs:
             https://www.elastic.co/guide/en/elasticsearch/reference/current/indices-aliases.html
     """
-    logger.debug('Alias creation %s started %s' % alias_name)
+    logger.debug('Alias creation %s started' % alias_name)
     connection.indices.put_alias(index=index_list, name=alias_name, **kwargs)
     logger.debug('Alias %s now points to indices %s' % (alias_name, str(index_list)))
@@ -0,0 +1,84 @@
+from __future__ import absolute_import
+
+# Local imports
+from datastore import constants
+
+log_prefix = 'datastore.elastic_search.partition'
+
+# Sub-index of records in languages that have no sub-index of their own
+OTHER_LANGUAGES = 'other'
+
+
+def get_routing(entity_name):
+    """
+    Args:
+        entity_name (str): name of the entity
+
+    Returns:
+        str: routing value of documents of entity_name, None if documents are not routed by entity (the default, see
+             ES_ROUTE_BY_ENTITY setting)
+    """
+    if constants.ELASTICSEARCH_ROUTE_BY_ENTITY:
+        return entity_name
+    return None
+
+
+def get_routing_kwargs(entity_name):
+    """
+    Args:
+        entity_name (str): name of the entity
+
+    Returns:
+        dict: routing keyword argument for search, scroll and delete by query requests of a single entity, empty if
+              documents are not routed by entity
+    """
+    routing = get_routing(entity_name)
+    return {'routing': routing} if routing is not None else {}
+
+
+def get_write_index_name(index_name, language_script):
+    """
+    Args:
+        index_name (str): name of the index, or of the alias of the per-language sub-indices
+        language_script (str): language of the record to write
+
+    Returns:
+        str: name of the concrete index records of language_script are written to, index_name itself unless
+             per-language sub-indices are configured (see ES_LANGUAGE_INDICES setting)
+    """
+    if not constants.ELASTICSEARCH_LANGUAGE_INDICES:
+        return index_name
+    if language_script not in constants.ELASTICSEARCH_LANGUAGE_INDICES:
+        language_script = OTHER_LANGUAGES
+    return '%s_%s' % (index_name, language_script)
+
+
+def get_search_index_name(index_name, language_scripts=None):
+    """
+    Args:
+        index_name (str): name of the index, or of the alias of the per-language sub-indices
+        language_scripts (list, optional): languages of the records to search, all languages if None
+
+    Returns:
+        str: comma separated names of the indices holding records of language_scripts, index_name itself if all
+             languages are searched or per-language sub-indices are not configured
+    """
+    if not constants.ELASTICSEARCH_LANGUAGE_INDICES or not language_scripts:
+        return index_name
+    return ','.join(sorted(set(get_write_index_name(index_name, language_script)
+                               for language_script in language_scripts)))
+
+
+def get_index_names(index_name):
+    """
+    Args:
+        index_name (str): name of the index, or of the alias of the per-language sub-indices
+
+    Returns:
+        list: names of all concrete indices behind index_name, [index_name] if per-language sub-indices are not
+              configured
+    """
+    if not constants.ELASTICSEARCH_LANGUAGE_INDICES:
+        return [index_name]
+    return [get_write_index_name(index_name, language_script)
+            for language_script in list(constants.ELASTICSEARCH_LANGUAGE_INDICES) + [OTHER_LANGUAGES]]
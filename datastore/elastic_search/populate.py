@@ -1,27 +1,35 @@
 from __future__ import absolute_import
 
 # std imports
+import multiprocessing
 import os
+import time
 from collections import defaultdict
 
 # 3rd party imports
 from elasticsearch import helpers
 
 # Local imports
-from chatbot_ner.config import ner_logger
+from chatbot_ner.config import ner_logger, CHATBOT_NER_DATASTORE
 from datastore import constants
-from datastore.elastic_search.query import get_entity_data
-from datastore.utils import get_files_from_directory, read_csv, remove_duplicate_data
+from datastore.elastic_search.partition import get_routing, get_routing_kwargs, get_write_index_name
+from datastore.elastic_search.query import iter_entity_data, scroll_hits
+from datastore.utils import (get_content_hash, get_csv_file_paths, get_document_id, iter_csv_rows,
+                             remove_duplicate_data)
 from language_utilities.constant import ENGLISH_LANG
 from ner_constants import DICTIONARY_DATA_VARIANTS
 
 log_prefix = 'datastore.elastic_search.populate'
 
+# 'value' is mapped dynamically, so its 'value.keyword' sub field has ignore_above 256 and longer values are not
+# indexed in it. Records of such values can not be found with a term query on 'value.keyword'
+VALUE_KEYWORD_MAX_LENGTH = 256
+
 
 def create_all_dictionary_data(connection, index_name, doc_type, logger, entity_data_directory_path=None,
-                               csv_file_paths=None, **kwargs):
+                               csv_file_paths=None, process_count=None, **kwargs):
     """
-    Indexes all entity data from csv files stored at entity_data_directory_path, one file at a time
+    Indexes all entity data from csv files stored at entity_data_directory_path, process_count files at a time
     Args:
         connection: Elasticsearch client object
         index_name: The name of the index
@@ -30,30 +38,23 @@ def create_all_dictionary_data(connection, index_name, doc_type, logger, entity_
         entity_data_directory_path: Optional, Path of the directory containing the entity data csv files.
                                     Default is None
         csv_file_paths: Optional, list of file paths to csv files. Default is None
+        process_count: Optional, number of files indexed concurrently, each in its own process.
+                       Defaults to ES_POPULATE_PROCESSES setting
         kwargs:
             Refer http://elasticsearch-py.readthedocs.io/en/master/helpers.html#elasticsearch.helpers.bulk
 
     """
     logger.debug('%s: +++ Started: create_all_dictionary_data() +++' % log_prefix)
-    if entity_data_directory_path:
-        logger.debug('%s: \t== Fetching from variants/ ==' % log_prefix)
-        csv_files = get_files_from_directory(entity_data_directory_path)
-        for csv_file in csv_files:
-            csv_file_path = os.path.join(entity_data_directory_path, csv_file)
-            create_dictionary_data_from_file(connection=connection, index_name=index_name, doc_type=doc_type,
-                                             csv_file_path=csv_file_path, update=False, logger=logger, **kwargs)
-    if csv_file_paths:
-        for csv_file_path in csv_file_paths:
-            if csv_file_path and csv_file_path.endswith('.csv'):
-                create_dictionary_data_from_file(connection=connection, index_name=index_name, doc_type=doc_type,
-                                                 csv_file_path=csv_file_path, update=False, logger=logger, **kwargs)
+    _create_dictionary_data_from_files(connection=connection, index_name=index_name, doc_type=doc_type,
+                                       csv_file_paths=get_csv_file_paths(entity_data_directory_path, csv_file_paths),
+                                       update=False, logger=logger, process_count=process_count, **kwargs)
     logger.debug('%s: +++ Finished: create_all_dictionary_data() +++' % log_prefix)
 
 
 def recreate_all_dictionary_data(connection, index_name, doc_type, logger, entity_data_directory_path=None,
-                                 csv_file_paths=None, **kwargs):
+                                 csv_file_paths=None, process_count=None, diff=False, **kwargs):
     """
-    Re-indexes all entity data from csv files stored at entity_data_directory_path, one file at a time
+    Re-indexes all entity data from csv files stored at entity_data_directory_path, process_count files at a time
     Args:
         connection: Elasticsearch client object
         index_name: The name of the index
@@ -62,26 +63,116 @@ def recreate_all_dictionary_data(connection, index_name, doc_type, logger, entit
         entity_data_directory_path: Optional, Path of the directory containing the entity data csv files.
                                     Default is None
         csv_file_paths: Optional, list of file paths to csv files. Default is None
+        process_count: Optional, number of files indexed concurrently, each in its own process.
+                       Defaults to ES_POPULATE_PROCESSES setting
+        diff: Optional, if True only records that changed are written, see sync_dictionary_data. Otherwise all
+              documents of the entity are deleted and indexed again. Default is False
         kwargs:
             Refer http://elasticsearch-py.readthedocs.io/en/master/helpers.html#elasticsearch.helpers.bulk
 
     """
     logger.debug('%s: +++ Started: recreate_all_dictionary_data() +++' % log_prefix)
-    if entity_data_directory_path:
-        logger.debug('%s: \t== Fetching from variants/ ==' % log_prefix)
-        csv_files = get_files_from_directory(entity_data_directory_path)
-        for csv_file in csv_files:
-            csv_file_path = os.path.join(entity_data_directory_path, csv_file)
-            create_dictionary_data_from_file(connection=connection, index_name=index_name, doc_type=doc_type,
-                                             csv_file_path=csv_file_path, update=True, logger=logger, **kwargs)
-    if csv_file_paths:
-        for csv_file_path in csv_file_paths:
-            if csv_file_path and csv_file_path.endswith('.csv'):
-                create_dictionary_data_from_file(connection=connection, index_name=index_name, doc_type=doc_type,
-                                                 csv_file_path=csv_file_path, update=True, logger=logger, **kwargs)
+    _create_dictionary_data_from_files(connection=connection, index_name=index_name, doc_type=doc_type,
+                                       csv_file_paths=get_csv_file_paths(entity_data_directory_path, csv_file_paths),
+                                       update=True, logger=logger, process_count=process_count, diff=diff, **kwargs)
     logger.debug('%s: +++ Finished: recreate_all_dictionary_data() +++' % log_prefix)
 
 
+def _create_dictionary_data_from_files(connection, index_name, doc_type, csv_file_paths, update, logger,
+                                       process_count=None, diff=False, **kwargs):
+    """
+    Indexes entity data of all csv files at csv_file_paths, in a pool of process_count processes if more than one,
+    and logs the indexing rate
+
+    Args:
+        connection: Elasticsearch client object, used only when files are indexed in this process
+        index_name: The name of the index
+        doc_type: The type of the documents being indexed
+        csv_file_paths: list of file paths to csv files
+        update: boolean, True if this is a update type operation, False if create/index type operation
+        logger: logging object to log at debug and exception level
+        process_count: Optional, number of processes. Defaults to ES_POPULATE_PROCESSES setting
+        diff: Optional, only write records that changed when update is True. Default is False
+        kwargs:
+            Refer http://elasticsearch-py.readthedocs.io/en/master/helpers.html#elasticsearch.helpers.bulk
+    """
+    if process_count is None:
+        process_count = constants.ELASTICSEARCH_POPULATE_PROCESSES
+    process_count = min(process_count, len(csv_file_paths))
+
+    start_time = time.time()
+    if process_count > 1:
+        # Connections can not be shared with child processes, each process connects on its own
+        pool = multiprocessing.Pool(processes=process_count)
+        try:
+            counts = pool.map(_create_dictionary_data_from_file_in_process,
+                              [(index_name, doc_type, csv_file_path, update, diff, kwargs)
+                               for csv_file_path in csv_file_paths])
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        counts = [create_dictionary_data_from_file(connection=connection, index_name=index_name, doc_type=doc_type,
+                                                   csv_file_path=csv_file_path, update=update, diff=diff,
+                                                   logger=logger, **kwargs)
+                  for csv_file_path in csv_file_paths]
+
+    elapsed_time = time.time() - start_time
+    documents_count = sum(counts)
+    logger.info('%s: \t++ Wrote %d documents from %d files in %.2f seconds (%.1f docs/sec) ++'
+                % (log_prefix, documents_count, len(csv_file_paths), elapsed_time,
+                   documents_count / elapsed_time if elapsed_time else 0.0))
+
+
+def _create_dictionary_data_from_file_in_process(args):
+    """
+    Entry point of pool processes started by _create_dictionary_data_from_files, connects to elasticsearch with the
+    configured settings and indexes one csv file
+
+    Args:
+        args (tuple): index_name, doc_type, csv_file_path, update, diff and kwargs for
+                      create_dictionary_data_from_file
+
+    Returns:
+        int: number of documents written
+    """
+    # Imported here as datastore.elastic_search.connect depends on modules that import this one
+    from datastore.elastic_search.connect import connect
+
+    index_name, doc_type, csv_file_path, update, diff, kwargs = args
+    connection = connect(**CHATBOT_NER_DATASTORE[constants.ELASTICSEARCH])
+    return create_dictionary_data_from_file(connection=connection, index_name=index_name, doc_type=doc_type,
+                                            csv_file_path=csv_file_path, update=update, diff=diff, logger=ner_logger,
+                                            **kwargs)
+
+
+def iter_variants_from_csv(csv_file_path, dictionary_key, logger):
+    """
+    Generator over rows of the entity data csv file at csv_file_path, reading one row at a time. Entity values are
+    first column of the csv file and their corresponding variants are stored in the second column delimited by '|'
+
+    Args:
+        csv_file_path: absolute file path of the csv file populate entity data from
+        dictionary_key: name of the entity to be put the values under
+        logger: logging object to log at debug and exception level
+
+    Yields:
+        tuple: (entity value, list of its non empty variants) for each row. Rows with the same value are not merged
+    """
+    csv_rows = iter_csv_rows(csv_file_path)
+    next(csv_rows, None)
+    for data_row in csv_rows:
+        try:
+            data = map(str.strip, data_row[1].split('|'))
+            # remove empty strings
+            data = [variant for variant in data if variant]
+            yield data_row[0].strip().replace('.', ' '), data
+
+        except Exception as e:
+            logger.exception('%s: \t\t== Exception in dict creation for keyword: %s -- %s -- %s =='
+                             % (log_prefix, dictionary_key, data_row, e))
+
+
 def get_variants_dictionary_value_from_key(csv_file_path, dictionary_key, logger, **kwargs):
     """
     Reads the csv file at csv_file_path and create a dictionary mapping
@@ -100,18 +191,11 @@ def get_variants_dictionary_value_from_key(csv_file_path, dictionary_key, logger
     """
     dictionary_value = defaultdict(list)
     try:
-        csv_reader = read_csv(csv_file_path)
-        next(csv_reader)
-        for data_row in csv_reader:
-            try:
-                data = map(str.strip, data_row[1].split('|'))
-                # remove empty strings
-                data = [variant for variant in data if variant]
-                dictionary_value[data_row[0].strip().replace('.', ' ')].extend(data)
-
-            except Exception as e:
-                logger.exception('%s: \t\t== Exception in dict creation for keyword: %s -- %s -- %s =='
-                                 % (log_prefix, dictionary_key, data_row, e))
+        # Rows of the same value anywhere in the file are indexed as one document, so the values of a file are
+        # collected before indexing
+        for value, variants in iter_variants_from_csv(csv_file_path=csv_file_path, dictionary_key=dictionary_key,
+                                                      logger=logger):
+            dictionary_value[value].extend(variants)
 
     except Exception as e:
         logger.exception(
@@ -150,32 +234,173 @@ def add_data_elastic_search(
          'entity_data': 'city',
          'value': 'Baripada Town'',
          'variants': ['Baripada', 'Baripada Town', '']
+         'content_hash': '3b0bb2f5...',
          '_op_type': 'index'
          }
 
+    Returns:
+        int: number of documents indexed
     """
-    str_query = []
+    actions = (_get_dictionary_data_index_action(index_name=index_name, doc_type=doc_type,
+                                                 dictionary_key=dictionary_key, value=value,
+                                                 variants=dictionary_value[value], language_script=language_script)
+               for value in dictionary_value)
+    result = bulk_actions(connection=connection, actions=actions, **kwargs)
+    logger.debug('%s: \t++ %s status %s ++' % (log_prefix, dictionary_key, result))
+    return result[0]
+
+
+def _get_dictionary_data_index_action(index_name, doc_type, dictionary_key, value, variants, language_script):
+    """
+    Bulk index action for a entity value document, see add_data_elastic_search. Documents are keyed by
+    datastore.utils.get_document_id, so indexing a value again replaces its document. The document is written to the
+    index and shard of its language and entity, see datastore.elastic_search.partition
+    """
+    action = {'_index': get_write_index_name(index_name, language_script),
+              '_id': get_document_id(dictionary_key, value, language_script),
+              'entity_data': dictionary_key,
+              'dict_type': DICTIONARY_DATA_VARIANTS,
+              'value': value,
+              'variants': variants,
+              "language_script": language_script,
+              'content_hash': get_content_hash(dictionary_key, value, language_script, variants),
+              '_type': doc_type,
+              '_op_type': 'index'
+              }
+    routing = get_routing(dictionary_key)
+    if routing is not None:
+        action['_routing'] = routing
+    return action
+
+
+def _get_delete_action(index_name, doc_type, entity_name, _id):
+    """
+    Bulk delete action for a document of entity_name, index_name must be the concrete index holding the document
+    """
+    action = {'_index': index_name, '_type': doc_type, '_id': _id, '_op_type': 'delete'}
+    routing = get_routing(entity_name)
+    if routing is not None:
+        action['_routing'] = routing
+    return action
+
+
+def sync_dictionary_data(connection, index_name, doc_type, dictionary_key, dictionary_value, language_script, logger,
+                         **kwargs):
+    """
+    Make the indexed documents of entity dictionary_key match dictionary_value while only writing the documents
+    that change. Content hashes stored on the indexed documents are compared with hashes of dictionary_value, values
+    whose hash differs are indexed again and documents of values not in dictionary_value (or of other language
+    scripts) are deleted. Documents indexed before documents were keyed by datastore.utils.get_document_id are
+    replaced by ones that are. The end result is the same as deleting the entity and adding dictionary_value,
+    without the entity being partially deleted in between.
+
+    Args:
+        connection: Elasticsearch client object
+        index_name: The name of the index
+        doc_type:  The type of the documents being indexed
+        dictionary_key: name of the entity
+        dictionary_value: dictionary, mapping entity value to a list of its variants
+        language_script (str): Language code of the entity script
+        logger: logging object to log at debug and exception level
+        kwargs:
+            Refer http://elasticsearch-py.readthedocs.io/en/master/helpers.html#elasticsearch.helpers.bulk
+
+    Returns:
+        tuple: number of documents indexed, deleted and left unchanged
+    """
+    # Values are compared as unicode, which is how they are returned by elasticsearch
+    values = {}
     for value in dictionary_value:
-        query_dict = {'_index': index_name,
-                      'entity_data': dictionary_key,
-                      'dict_type': DICTIONARY_DATA_VARIANTS,
-                      'value': value,
-                      'variants': dictionary_value[value],
-                      "language_script": language_script,
-                      '_type': doc_type,
-                      '_op_type': 'index'
-                      }
-        str_query.append(query_dict)
-        if len(str_query) > constants.ELASTICSEARCH_BULK_HELPER_MESSAGE_SIZE:
-            result = helpers.bulk(connection, str_query, stats_only=True, **kwargs)
-            logger.debug('%s: \t++ %s status %s ++' % (log_prefix, dictionary_key, result))
-            str_query = []
-    if str_query:
-        result = helpers.bulk(connection, str_query, stats_only=True, **kwargs)
-        logger.debug('%s: \t++ %s status %s ++' % (log_prefix, dictionary_key, result))
+        values[value.decode('utf-8') if isinstance(value, bytes) else value] = value
+
+    data = {
+        'query': {
+            'term': {
+                'entity_data': {
+                    'value': dictionary_key
+                }
+            }
+        },
+        '_source': ['value', 'language_script', 'content_hash'],
+    }
+    unchanged_values, delete_hits = set(), []
+    for hit in scroll_hits(connection, scroll='2m', index=index_name, doc_type=doc_type, body=data,
+                           size=constants.ELASTICSEARCH_SEARCH_SIZE, **get_routing_kwargs(dictionary_key)):
+        source = hit['_source']
+        value = source.get('value')
+        if value in values and source.get('language_script') == language_script and \
+                hit['_id'] == get_document_id(dictionary_key, values[value], language_script):
+            variants = dictionary_value[values[value]]
+            if source.get('content_hash') == get_content_hash(dictionary_key, values[value], language_script,
+                                                              variants):
+                unchanged_values.add(value)
+        else:
+            delete_hits.append((hit['_index'], hit['_id']))
+
+    index_actions = (_get_dictionary_data_index_action(index_name=index_name, doc_type=doc_type,
+                                                       dictionary_key=dictionary_key, value=values[value],
+                                                       variants=dictionary_value[values[value]],
+                                                       language_script=language_script)
+                     for value in values if value not in unchanged_values)
+    indexed, _ = bulk_actions(connection=connection, actions=index_actions, **kwargs)
+
+    delete_actions = (_get_delete_action(index_name=hit_index_name, doc_type=doc_type, entity_name=dictionary_key,
+                                         _id=_id)
+                      for hit_index_name, _id in delete_hits)
+    deleted, _ = bulk_actions(connection=connection, actions=delete_actions, **kwargs)
+
+    logger.debug('%s: \t++ %s indexed %d, deleted %d, unchanged %d ++'
+                 % (log_prefix, dictionary_key, indexed, deleted, len(unchanged_values)))
+    return indexed, deleted, len(unchanged_values)
+
+
+def bulk_actions(connection, actions, thread_count=None, chunk_bytes=None, ignore_missing=False, **kwargs):
+    """
+    Send bulk actions to elasticsearch while they are being generated, in requests of at most
+    ES_BULK_MSG_SIZE actions and chunk_bytes bytes, from thread_count threads when more than one
+
+    Args:
+        connection: Elasticsearch client object
+        actions (iterable): bulk actions, can be a generator
+        thread_count (int, optional): number of threads sending requests. Defaults to ES_BULK_THREAD_COUNT setting
+        chunk_bytes (int, optional): maximum size of a request in bytes. Defaults to ES_BULK_CHUNK_BYTES setting
+        ignore_missing (bool, optional): if True, deleting a document that does not exist is neither counted nor
+                                         raised as an error. Defaults to False
+        kwargs:
+            Refer http://elasticsearch-py.readthedocs.io/en/master/helpers.html#elasticsearch.helpers.streaming_bulk
 
+    Returns:
+        tuple: number of successful and failed actions, same as elasticsearch.helpers.bulk with stats_only=True
 
-def create_dictionary_data_from_file(connection, index_name, doc_type, csv_file_path, update, logger, **kwargs):
+    Raises:
+        elasticsearch.helpers.BulkIndexError if any action failed, unless raise_on_error=False is passed
+    """
+    if thread_count is None:
+        thread_count = constants.ELASTICSEARCH_BULK_THREAD_COUNT
+    if chunk_bytes is None:
+        chunk_bytes = constants.ELASTICSEARCH_BULK_CHUNK_BYTES
+    raise_on_error = kwargs.pop('raise_on_error', True)
+    kwargs = dict(kwargs, chunk_size=constants.ELASTICSEARCH_BULK_HELPER_MESSAGE_SIZE, max_chunk_bytes=chunk_bytes,
+                  raise_on_error=raise_on_error and not ignore_missing)
+    if thread_count > 1:
+        results = helpers.parallel_bulk(connection, actions, thread_count=thread_count, **kwargs)
+    else:
+        results = helpers.streaming_bulk(connection, actions, **kwargs)
+
+    success, errors = 0, []
+    for ok, item in results:
+        if ok:
+            success += 1
+        elif not (ignore_missing and item.get('delete', {}).get('status') == 404):
+            errors.append(item)
+
+    if errors and raise_on_error and ignore_missing:
+        raise helpers.BulkIndexError('%i document(s) failed to index.' % len(errors), errors)
+    return success, len(errors)
+
+
+def create_dictionary_data_from_file(connection, index_name, doc_type, csv_file_path, update, logger, diff=False,
+                                     **kwargs):
     """
     Indexes all entity data from the csv file at path csv_file_path
     Args:
@@ -185,30 +410,64 @@ def create_dictionary_data_from_file(connection, index_name, doc_type, csv_file_
         csv_file_path: absolute file path of the csv file to populate entity data from
         update: boolean, True if this is a update type operation, False if create/index type operation
         logger: logging object to log at debug and exception level
+        diff: Optional, if True and update is True only records that changed are written, see
+              sync_dictionary_data. Default is False
         kwargs:
             Refer http://elasticsearch-py.readthedocs.io/en/master/helpers.html#elasticsearch.helpers.bulk
+
+    Returns:
+        int: number of documents written
     """
 
     base_file_name = os.path.basename(csv_file_path)
     dictionary_key = os.path.splitext(base_file_name)[0]
 
+    if update and diff:
+        dictionary_value = get_variants_dictionary_value_from_key(csv_file_path=csv_file_path,
+                                                                  dictionary_key=dictionary_key, logger=logger,
+                                                                  **kwargs)
+        indexed, deleted, _ = sync_dictionary_data(connection=connection, index_name=index_name, doc_type=doc_type,
+                                                   dictionary_key=dictionary_key,
+                                                   dictionary_value=remove_duplicate_data(dictionary_value),
+                                                   language_script=ENGLISH_LANG, logger=logger, **kwargs)
+        return indexed + deleted
+
     if update:
         delete_entity_by_name(connection=connection, index_name=index_name, doc_type=doc_type,
                               entity_name=dictionary_key, logger=logger, **kwargs)
     dictionary_value = get_variants_dictionary_value_from_key(csv_file_path=csv_file_path,
                                                               dictionary_key=dictionary_key, logger=logger,
                                                               **kwargs)
-    if dictionary_value:
-        add_data_elastic_search(connection=connection, index_name=index_name, doc_type=doc_type,
-                                dictionary_key=dictionary_key,
-                                dictionary_value=remove_duplicate_data(dictionary_value),
-                                language_script=ENGLISH_LANG,
-                                logger=logger, **kwargs)
-    if os.path.exists(csv_file_path) and os.path.splitext(csv_file_path)[1] == '.csv':
-        os.path.basename(csv_file_path)
+    if not dictionary_value:
+        return 0
+    return add_data_elastic_search(connection=connection, index_name=index_name, doc_type=doc_type,
+                                   dictionary_key=dictionary_key,
+                                   dictionary_value=remove_duplicate_data(dictionary_value),
+                                   language_script=ENGLISH_LANG,
+                                   logger=logger, **kwargs)
 
 
-def delete_entity_by_name(connection, index_name, doc_type, entity_name, logger, **kwargs):
+def delete_entity_by_name(connection, index_name, doc_type, entity_name, logger, slices=None, **kwargs):
+    """
+    Delete all documents of entity_name without holding them in memory, either with a sliced delete by query request
+    or with bulk delete requests sent while scrolling over the documents. Progress is logged at info level
+
+    Args:
+        connection (elasticsearch.client.Elasticsearch): Elasticsearch client object
+        index_name (str): The name of the index
+        doc_type (str): The type of the documents
+        entity_name (str): name of the entity to delete
+        logger: logging object to log at debug and info level
+        slices (int, optional): number of slices of the delete by query request, 0 to use bulk requests instead.
+                                Defaults to ES_DELETE_BY_QUERY_SLICES setting
+        kwargs:
+            Refer http://elasticsearch-py.readthedocs.io/en/master/helpers.html#elasticsearch.helpers.bulk
+
+    Returns:
+        int: number of documents deleted
+    """
+    if slices is None:
+        slices = constants.ELASTICSEARCH_DELETE_BY_QUERY_SLICES
     data = {
         'query': {
             'term': {
@@ -216,34 +475,85 @@ def delete_entity_by_name(connection, index_name, doc_type, entity_name, logger,
                     'value': entity_name
                 }
             }
-        },
-        "size": constants.ELASTICSEARCH_SEARCH_SIZE
+        }
     }
-    results = connection.search(index=index_name, doc_type=doc_type, scroll='2m', body=data)
-    sid = results['_scroll_id']
-    scroll_size = results['hits']['total']
-    delete_bulk_queries = []
-    str_query = []
-    while scroll_size > 0:
-        results = results['hits']['hits']
-        for eid in results:
-            delete_dict = {'_index': index_name,
-                           '_type': doc_type,
-                           '_id': eid["_id"],
-                           '_op_type': 'delete',
-                           }
-            str_query.append(delete_dict)
-            if len(str_query) > constants.ELASTICSEARCH_BULK_HELPER_MESSAGE_SIZE:
-                delete_bulk_queries.append(str_query)
-                str_query = []
-        results = connection.scroll(scroll_id=sid, scroll='2m')
-        sid = results['_scroll_id']
-        scroll_size = len(results['hits']['hits'])
-    if str_query:
-        delete_bulk_queries.append(str_query)
-    for delete_query in delete_bulk_queries:
-        result = helpers.bulk(connection, delete_query, stats_only=True, **kwargs)
-        logger.debug('%s: \t++ %s Entity delete status %s ++' % (log_prefix, entity_name, result))
+    if slices > 0:
+        deleted = _delete_by_query(connection=connection, index_name=index_name, doc_type=doc_type, body=data,
+                                   slices=slices, logger=logger, routing=get_routing(entity_name), **kwargs)
+    else:
+        hits = scroll_hits(connection, scroll='2m', index=index_name, doc_type=doc_type, body=data, _source=False,
+                           size=constants.ELASTICSEARCH_SEARCH_SIZE, **get_routing_kwargs(entity_name))
+        actions = _log_progress((_get_delete_action(index_name=hit['_index'], doc_type=doc_type,
+                                                    entity_name=entity_name, _id=hit['_id'])
+                                 for hit in hits), message='%s: \t++ %s Entity %%d documents deleted ++'
+                                                           % (log_prefix, entity_name), logger=logger)
+        deleted, _ = bulk_actions(connection=connection, actions=actions, ignore_missing=True, **kwargs)
+    logger.debug('%s: \t++ %s Entity deleted %d documents ++' % (log_prefix, entity_name, deleted))
+    return deleted
+
+
+def _log_progress(actions, message, logger, interval=None):
+    """
+    Pass actions through, logging message with the number of actions passed so far every interval actions
+
+    Args:
+        actions (iterable): bulk actions
+        message (str): message with a %d placeholder for the number of actions
+        logger: logging object to log at info level
+        interval (int, optional): Defaults to ES_BULK_MSG_SIZE setting
+
+    Yields:
+        dict: each of actions
+    """
+    interval = interval or constants.ELASTICSEARCH_BULK_HELPER_MESSAGE_SIZE
+    count = 0
+    for action in actions:
+        yield action
+        count += 1
+        if count % interval == 0:
+            logger.info(message % count)
+
+
+def _delete_by_query(connection, index_name, doc_type, body, slices, logger, routing=None, **kwargs):
+    """
+    Run a delete by query request split into slices as a task, logging its progress until it completes
+
+    Args:
+        connection (elasticsearch.client.Elasticsearch): Elasticsearch client object
+        index_name (str): The name of the index
+        doc_type (str): The type of the documents
+        body (dict): query of the documents to delete
+        slices (int): number of slices deleted in parallel
+        logger: logging object to log at info and error level
+        routing (str, optional): routing value of the documents to delete, all shards are searched if None
+        kwargs: only request_timeout and ignore are used
+
+    Returns:
+        int: number of documents deleted
+    """
+    request_kwargs = dict((key, kwargs[key]) for key in ('request_timeout', 'ignore') if key in kwargs)
+    if routing is not None:
+        request_kwargs['routing'] = routing
+    response = connection.delete_by_query(index=index_name, doc_type=doc_type, body=body, conflicts='proceed',
+                                          slices=slices, wait_for_completion=False, **request_kwargs)
+    task_id = response.get('task')
+    if task_id is None:
+        logger.error('%s: delete by query could not be started: %s' % (log_prefix, response))
+        return 0
+
+    while True:
+        task = connection.tasks.get(task_id=task_id)
+        status = task['task']['status']
+        logger.info('%s: \t++ delete by query %s: %d of %d documents deleted ++'
+                    % (log_prefix, task_id, status.get('deleted', 0), status.get('total', 0)))
+        if task.get('completed'):
+            break
+        time.sleep(constants.ELASTICSEARCH_TASK_POLL_INTERVAL)
+
+    result = task.get('response', {})
+    if result.get('failures'):
+        logger.error('%s: delete by query %s failures: %s' % (log_prefix, task_id, result['failures']))
+    return result.get('deleted', status.get('deleted', 0))
 
 
 def entity_data_update(connection, index_name, doc_type, entity_data, entity_name, language_script,
@@ -261,23 +571,12 @@ def entity_data_update(connection, index_name, doc_type, entity_data, entity_nam
         **kwargs: Refer http://elasticsearch-py.readthedocs.io/en/master/helpers.html#elasticsearch.helpers.bulk
     """
     logger.debug('%s: +++ Started: external_api_entity_update() +++' % log_prefix)
-    logger.debug('%s: +++ Started: delete_entity_by_name() +++' % log_prefix)
-    delete_entity_by_name(connection=connection, index_name=index_name, doc_type=doc_type,
-                          entity_name=entity_name, logger=logger, **kwargs)
-    logger.debug('%s: +++ Completed: delete_entity_by_name() +++' % log_prefix)
-
-    if entity_data:
-        dictionary_value = {}
-        for temp_dict in entity_data:
-            dictionary_value[temp_dict['value']] = temp_dict['variants']
-
-        logger.debug('%s: +++ Started: add_data_elastic_search() +++' % log_prefix)
-        add_data_elastic_search(connection=connection, index_name=index_name, doc_type=doc_type,
-                                dictionary_key=entity_name,
-                                dictionary_value=dictionary_value,
-                                language_script=language_script,
-                                logger=logger, **kwargs)
-        logger.debug('%s: +++ Completed: add_data_elastic_search() +++' % log_prefix)
+    # Records replace all existing records of the entity, in any language
+    records = [{'value': temp_dict['value'], 'variants': temp_dict['variants'], 'language_script': language_script}
+               for temp_dict in entity_data or []]
+    upsert_entity_data(connection=connection, index_name=index_name, doc_type=doc_type, entity_name=entity_name,
+                       value_variant_records=records, replace=True, **kwargs)
+    logger.debug('%s: +++ Completed: external_api_entity_update() +++' % log_prefix)
 
 
 def update_entity_crf_data_populate(
@@ -373,7 +672,7 @@ def delete_entity_data_by_values(connection, index_name, doc_type, entity_name,
     Returns:
         None
     """
-    results = get_entity_data(
+    records = iter_entity_data(
         connection=connection,
         index_name=index_name,
         doc_type=doc_type,
@@ -381,27 +680,11 @@ def delete_entity_data_by_values(connection, index_name, doc_type, entity_name,
         values=values,
         **kwargs
     )
-
-    delete_bulk_queries = []
-    str_query = []
-    for record in results:
-        delete_dict = {
-            '_index': index_name,
-            '_type': doc_type,
-            '_id': record["_id"],
-            '_op_type': 'delete',
-        }
-        str_query.append(delete_dict)
-        if len(str_query) == constants.ELASTICSEARCH_BULK_HELPER_MESSAGE_SIZE:
-            delete_bulk_queries.append(str_query)
-            str_query = []
-
-    if str_query:
-        delete_bulk_queries.append(str_query)
-
-    for delete_query in delete_bulk_queries:
-        result = helpers.bulk(connection, delete_query, stats_only=True, **kwargs)
-        ner_logger.debug('delete_entity_data_by_values: entity_name: {0} result {1}'.format(entity_name, str(result)))
+    actions = (_get_delete_action(index_name=record['_index'], doc_type=doc_type, entity_name=entity_name,
+                                  _id=record['_id'])
+               for record in records)
+    result = bulk_actions(connection=connection, actions=actions, ignore_missing=True, **kwargs)
+    ner_logger.debug('delete_entity_data_by_values: entity_name: {0} result {1}'.format(entity_name, str(result)))
 
 
 def add_entity_data(connection, index_name, doc_type, entity_name, value_variant_records, **kwargs):
@@ -418,22 +701,108 @@ def add_entity_data(connection, index_name, doc_type, entity_name, value_variant
     Returns:
         None
     """
-    str_query = []
+    actions = (_get_dictionary_data_index_action(index_name=index_name, doc_type=doc_type, dictionary_key=entity_name,
+                                                 value=record.get('value'), variants=record.get('variants'),
+                                                 language_script=record.get('language_script'))
+               for record in value_variant_records)
+    bulk_actions(connection=connection, actions=actions, **kwargs)
+
+
+def upsert_entity_data(connection, index_name, doc_type, entity_name, value_variant_records, values_to_delete=None,
+                       replace=False, **kwargs):
+    """
+    Write records in place of all existing records of their values and delete all records of values_to_delete.
+    Documents are keyed by datastore.utils.get_document_id, so records are written with bulk index actions without
+    looking up the existing documents first. All other records of the written values and of values_to_delete are
+    then deleted with a single delete by query request, which also removes records indexed with random ids before
+    documents were keyed by get_document_id. Records of values longer than VALUE_KEYWORD_MAX_LENGTH are not indexed
+    in 'value.keyword', they are found with a phrase query on 'value' instead and deleted by id.
+
+    Args:
+        connection (elasticsearch.client.Elasticsearch): Elasticsearch client object
+        index_name (str): The name of the index
+        doc_type (str): The type of the documents that will be indexed
+        entity_name (str): name of the entity
+        value_variant_records (list): List of dicts to be written in ES. Records of languages of the same value that
+            are not in value_variant_records are deleted
+            Sample Dict: {'value': 'value', 'language_script': 'en', variants': ['variant 1', 'variant 2']}
+        values_to_delete (list, optional): values whose records are deleted in all languages
+        replace (bool, optional): if True, all other records of the entity are deleted as well. Defaults to False
+        kwargs:
+            Refer http://elasticsearch-py.readthedocs.io/en/master/helpers.html#elasticsearch.helpers.bulk
+    Returns:
+        None
+    """
+    records = {}
     for record in value_variant_records:
-        query_dict = {
-            '_index': index_name,
-            '_op_type': 'index',
-            '_type': doc_type,
-            'dict_type': DICTIONARY_DATA_VARIANTS,
-            'entity_data': entity_name,
-            'language_script': record.get('language_script'),
-            'value': record.get('value'),
-            'variants': record.get('variants'),
+        records[(record.get('value'), record.get('language_script'))] = record.get('variants')
+
+    actions = [_get_dictionary_data_index_action(index_name=index_name, doc_type=doc_type, dictionary_key=entity_name,
+                                                 value=value, variants=variants, language_script=language_script)
+               for (value, language_script), variants in records.items()]
+    result = bulk_actions(connection=connection, actions=actions, **kwargs)
+    ner_logger.debug('upsert_entity_data: entity_name: {0} result {1}'.format(entity_name, str(result)))
+
+    written_ids = [action['_id'] for action in actions]
+    values = set(values_to_delete or []) | set(value for value, _ in records)
+    keyword_values = sorted(value for value in values if len(value) <= VALUE_KEYWORD_MAX_LENGTH)
+    long_values = values.difference(keyword_values)
+    if long_values and not replace:
+        _delete_records_of_long_values(connection=connection, index_name=index_name, doc_type=doc_type,
+                                       entity_name=entity_name, values=long_values, keep_ids=written_ids, **kwargs)
+
+    if replace or keyword_values:
+        must = [{'term': {'entity_data': {'value': entity_name}}}]
+        if not replace:
+            must.append({'terms': {'value.keyword': keyword_values}})
+        data = {
+            'query': {
+                'bool': {
+                    'must': must,
+                    'must_not': [{'ids': {'values': written_ids}}]
+                }
+            }
         }
-        str_query.append(query_dict)
-        if len(str_query) == constants.ELASTICSEARCH_BULK_HELPER_MESSAGE_SIZE:
-            helpers.bulk(connection, str_query, stats_only=True, **kwargs)
-            str_query = []
+        request_kwargs = dict((key, kwargs[key]) for key in ('request_timeout', 'ignore') if key in kwargs)
+        request_kwargs.update(get_routing_kwargs(entity_name))
+        result = connection.delete_by_query(index=index_name, doc_type=doc_type, body=data, conflicts='proceed',
+                                            **request_kwargs)
+        ner_logger.debug('upsert_entity_data: entity_name: {0} deleted {1}'.format(entity_name, result.get('deleted')))
 
-    if str_query:
-        helpers.bulk(connection, str_query, stats_only=True, **kwargs)
+
+def _delete_records_of_long_values(connection, index_name, doc_type, entity_name, values, keep_ids, **kwargs):
+    """
+    Delete all records of entity_name with one of values, except those with an id in keep_ids. Records are found with
+    a phrase query per value on the analyzed 'value' field and only those whose value is exactly one of values are
+    deleted, by id, see VALUE_KEYWORD_MAX_LENGTH
+
+    Args:
+        connection (elasticsearch.client.Elasticsearch): Elasticsearch client object
+        index_name (str): The name of the index
+        doc_type (str): The type of the documents
+        entity_name (str): name of the entity
+        values (set): values whose records are deleted
+        keep_ids (list): ids of documents that are not deleted
+        kwargs:
+            Refer http://elasticsearch-py.readthedocs.io/en/master/helpers.html#elasticsearch.helpers.bulk
+    """
+    data = {
+        'query': {
+            'bool': {
+                'must': [{'term': {'entity_data': {'value': entity_name}}}],
+                'should': [{'match_phrase': {'value': value}} for value in sorted(values)],
+                'minimum_should_match': 1,
+                'must_not': [{'ids': {'values': keep_ids}}]
+            }
+        },
+        '_source': ['value']
+    }
+    search_kwargs = dict((key, kwargs[key]) for key in ('request_timeout',) if key in kwargs)
+    search_kwargs.update(get_routing_kwargs(entity_name))
+    hits = scroll_hits(connection, index=index_name, doc_type=doc_type, body=data,
+                       size=constants.ELASTICSEARCH_SEARCH_SIZE, **search_kwargs)
+    actions = (_get_delete_action(index_name=hit['_index'], doc_type=doc_type, entity_name=entity_name, _id=hit['_id'])
+               for hit in hits if hit['_source'].get('value') in values)
+    result = bulk_actions(connection=connection, actions=actions, ignore_missing=True, **kwargs)
+    ner_logger.debug('upsert_entity_data: entity_name: {0} deleted records of long values {1}'.format(
+        entity_name, str(result)))
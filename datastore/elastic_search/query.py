@@ -5,9 +5,12 @@ import copy
 from six import string_types
 import re
 import collections
+import threading
+import time
 
 # Local imports
 from datastore import constants
+from datastore.elastic_search.partition import get_routing, get_routing_kwargs, get_search_index_name
 from external_api.constants import SENTENCE_LIST, ENTITY_LIST
 from language_utilities.constant import ENGLISH_LANG
 from lib.nlp.const import TOKENIZER
@@ -15,10 +18,22 @@ import json
 
 log_prefix = 'datastore.elastic_search.query'
 
+# Search plans of QueryPlanner, see _generate_es_search_dictionary
+PLAN_FUZZY = 'fuzzy'
+PLAN_BOUNDED_FUZZY = 'bounded_fuzzy'
+
+# precision_threshold of the cardinality aggregation counting unique values, the maximum elasticsearch allows. Counts
+# from it are only used while they are well below the threshold, see get_entity_unique_values_count
+UNIQUE_VALUES_PRECISION_THRESHOLD = 40000
+
+_whitespace_pattern = re.compile(r'\s+', re.UNICODE)
+_missing = object()
+
 
 def dictionary_query(connection, index_name, doc_type, entity_name, **kwargs):
     """
-    Get all variants data for a entity stored in the index as a dictionary
+    Get all variants data for a entity stored in the index as a dictionary. See iter_dictionary_query to read the
+    data one record at a time
 
     Args:
         connection: Elasticsearch client object
@@ -32,7 +47,25 @@ def dictionary_query(connection, index_name, doc_type, entity_name, **kwargs):
         dictionary, search results of the 'term' query on entity_name, mapping keys to lists containing
         synonyms/variants of the key
     """
-    results_dictionary = {}
+    return dict(iter_dictionary_query(connection=connection, index_name=index_name, doc_type=doc_type,
+                                      entity_name=entity_name, **kwargs))
+
+
+def iter_dictionary_query(connection, index_name, doc_type, entity_name, **kwargs):
+    """
+    Generator over variants data of a entity stored in the index, scrolling over the records one page at a time
+
+    Args:
+        connection: Elasticsearch client object
+        index_name (str): The name of the index
+        doc_type (str): The type of the documents that will be indexed
+        entity_name (str): name of the entity to perform a 'term' query on
+        kwargs:
+            Refer https://elasticsearch-py.readthedocs.io/en/master/api.html#elasticsearch.Elasticsearch.search
+
+    Yields:
+        tuple: (value, list of synonyms/variants of the value) for each record of the entity
+    """
     data = {
         'query': {
             'term': {
@@ -43,15 +76,42 @@ def dictionary_query(connection, index_name, doc_type, entity_name, **kwargs):
         }
     }
     kwargs = dict(kwargs, body=data, doc_type=doc_type, size=constants.ELASTICSEARCH_SEARCH_SIZE, index=index_name,
-                  scroll='1m')
-    search_results = _run_es_search(connection, **kwargs)
+                  **get_routing_kwargs(entity_name))
+    for result in scroll_hits(connection, scroll='1m', **kwargs):
+        yield result['_source']['value'], result['_source']['variants']
 
-    # Parse hits
-    results = search_results['hits']['hits']
-    for result in results:
-        results_dictionary[result['_source']['value']] = result['_source']['variants']
 
-    return results_dictionary
+def get_entity_names(connection, index_name, doc_type, **kwargs):
+    """
+    Fetch names of all entities that have at least one record
+
+    Args:
+        connection (elasticsearch.client.Elasticsearch): Elasticsearch client object
+        index_name (str): The name of the index
+        doc_type (str): The type of the documents that will be indexed
+
+    Returns:
+        (list): sorted list of entity names, at most ES_SEARCH_SIZE setting of them
+    """
+    data = {
+        "aggs": {
+            "entity_names": {
+                "terms": {
+                    "field": "entity_data.keyword",
+                    "size": constants.ELASTICSEARCH_SEARCH_SIZE,
+                    "order": {"_term": "asc"}
+                }
+            }
+        },
+        "size": 0
+    }
+    kwargs = dict(kwargs, body=data, doc_type=doc_type, index=index_name,
+                  filter_path=['aggregations.entity_names.buckets.key'])
+    search_results = _run_es_search(connection, **kwargs)
+    if not search_results:
+        return []
+    buckets = search_results.get('aggregations', {}).get('entity_names', {}).get('buckets', [])
+    return [bucket['key'] for bucket in buckets]
 
 
 def get_entity_supported_languages(connection, index_name, doc_type, entity_name, **kwargs):
@@ -89,7 +149,7 @@ def get_entity_supported_languages(connection, index_name, doc_type, entity_name
     }
     kwargs = dict(
         kwargs, body=data, doc_type=doc_type, size=constants.ELASTICSEARCH_SEARCH_SIZE,
-        index=index_name, filter_path=['aggregations.unique_values.buckets.key']
+        index=index_name, filter_path=['aggregations.unique_values.buckets.key'], **get_routing_kwargs(entity_name)
     )
     search_results = _run_es_search(connection, **kwargs)
     language_list = []
@@ -109,7 +169,24 @@ def get_entity_data(connection, index_name, doc_type, entity_name, values=None,
         values (str, optional): List of values for which data is to be fetched. If None, all
                                 records are fetched
     Returns:
-        (list): List of language codes supported by this entity
+        (list): List of hits with '_id' and '_source' keys
+    """
+    return list(iter_entity_data(connection=connection, index_name=index_name, doc_type=doc_type,
+                                 entity_name=entity_name, values=values, **kwargs))
+
+
+def iter_entity_data(connection, index_name, doc_type, entity_name, values=None, **kwargs):
+    """
+    Generator over entity data of the specific entity, scrolling over the records one page at a time
+    Args:
+        connection (elasticsearch.client.Elasticsearch): Elasticsearch client object
+        index_name (str): The name of the index
+        doc_type (str): The type of the documents that will be indexed
+        entity_name (str): name of the entity for which the data is to be fetched
+        values (str, optional): List of values for which data is to be fetched. If None, all
+                                records are fetched
+    Yields:
+        dict: hit with '_index', '_id' and '_source' keys
     """
     data = {
         "query": {
@@ -138,82 +215,43 @@ def get_entity_data(connection, index_name, doc_type, entity_name, values=None,
     else:
         query_list.append(data)
 
-    results = []
     for query in query_list:
         search_kwargs = dict(kwargs, body=query, doc_type=doc_type,
-                             size=constants.ELASTICSEARCH_SEARCH_SIZE, index=index_name, scroll='1m')
-        search_results = _run_es_search(connection, **search_kwargs)
+                             size=constants.ELASTICSEARCH_SEARCH_SIZE, index=index_name,
+                             **get_routing_kwargs(entity_name))
+        for hit in scroll_hits(connection, scroll='1m', **search_kwargs):
+            yield hit
 
-        # Parse hits
-        if search_results:
-            results.extend(search_results['hits']['hits'])
 
-    return results
-
-
-def get_entity_unique_values(connection, index_name, doc_type, entity_name, value_search_term=None,
-                             variant_search_term=None, empty_variants_only=False, **kwargs):
+def _get_entity_unique_values_query(entity_name, value_search_term=None, variant_search_term=None,
+                                    empty_variants_only=False):
     """
-    Search for values in entity with filters
-
-    Args:
-        connection (elasticsearch.client.Elasticsearch): Elasticsearch client object
-        index_name (str): The name of the index
-        doc_type (str): The type of the documents that will be indexed
-        entity_name (str): name of the entity for which the data is to be fetched
-        value_search_term (str): Filter values with the specific search term
-        variant_search_term (str): Filter variants with the specific search term
-        empty_variants_only (bool): Search for values with empty variants only
-    Returns:
-        list: List of values which match the filters and search criteria
+    Query for records of entity_name matching the filters of get_entity_unique_values
     """
-    # aggs count is set at 3,00,000 because it is a safe limit for now.
-    # If the dictionary sizes increases beyond this, then the count will have to be
-    # increased accordingly.
-    # Also, aggs size doesn't belong in the const file because the number depends
-    # on use case, data and the operation (unique/average/sum/min/max/count etc.)
-    data = {
-        "sort": [
-            {
-                "value.keyword": {
-                    "order": "asc"
-                }
-            }
-        ],
-        "query": {
-            "bool": {
-                "must": [
-                    {
-                        "match": {
-                            "entity_data": entity_name
-                        }
+    query = {
+        "bool": {
+            "must": [
+                {
+                    "match": {
+                        "entity_data": entity_name
                     }
-                ],
-                "minimum_should_match": 0,
-                "should": []
-            }
-        },
-        "aggs": {
-            "unique_values": {
-                "terms": {
-                    "field": "value.keyword",
-                    "size": 300000
                 }
-            }
-        },
-        "size": 0
+            ],
+            "minimum_should_match": 0,
+            "should": []
+        }
     }
 
     if value_search_term:
-        data['query']['bool']['minimum_should_match'] = 1
-        data['query']['bool']['should'].append({
+        query['bool']['minimum_should_match'] = 1
+        query['bool']['should'].append({
             "wildcard": {
                 "value": u"*{0}*".format(value_search_term.lower())
             }
         })
 
     if empty_variants_only:
-        data['query']['bool']['must_not'] = [
+        query['bool']['must_not'] = [
             {
                 "exists": {
                     "field": "variants"
@@ -221,22 +259,175 @@ def get_entity_unique_values(connection, index_name, doc_type, entity_name, valu
             }
         ]
     elif variant_search_term:
-        data['query']['bool']['minimum_should_match'] = 1
-        data['query']['bool']['should'].append({
+        query['bool']['minimum_should_match'] = 1
+        query['bool']['should'].append({
             "match": {
                 "variants": variant_search_term
             }
         })
+    return query
 
-    kwargs = dict(
-        kwargs, body=data, doc_type=doc_type, size=constants.ELASTICSEARCH_SEARCH_SIZE,
-        index=index_name, filter_path=['aggregations.unique_values.buckets.key']
-    )
-    search_results = _run_es_search(connection, **kwargs)
-    values = []
-    if search_results:
-        values = [bucket['key'] for bucket in search_results['aggregations']['unique_values']['buckets']]
-    return values
+
+def _supports_composite_aggregation():
+    """
+    Composite aggregations are available from elasticsearch 6.1
+    """
+    return constants.ELASTICSEARCH_VERSION_MAJOR > 6 or \
+        (constants.ELASTICSEARCH_VERSION_MAJOR == 6 and constants.ELASTICSEARCH_VERSION_MINOR >= 1)
+
+
+def get_entity_unique_values_page(connection, index_name, doc_type, entity_name, size, after=None,
+                                  value_search_term=None, variant_search_term=None, empty_variants_only=False,
+                                  **kwargs):
+    """
+    Fetch one page of the sorted unique values of entity matching the filters. Pages are keyed by the last value of
+    the previous page, so elasticsearch only builds the requested page. Uses a composite aggregation on
+    elasticsearch 6.1+ and field collapsing on older versions
+
+    Args:
+        connection (elasticsearch.client.Elasticsearch): Elasticsearch client object
+        index_name (str): The name of the index
+        doc_type (str): The type of the documents that will be indexed
+        entity_name (str): name of the entity for which the data is to be fetched
+        size (int): maximum number of values to fetch
+        after (str, optional): fetch values sorted after this value. If None, the first page is fetched
+        value_search_term (str): Filter values with the specific search term
+        variant_search_term (str): Filter variants with the specific search term
+        empty_variants_only (bool): Search for values with empty variants only
+
+    Returns:
+        tuple: sorted list of values, and the value to pass as after to fetch the next page, None on the last page
+    """
+    query = _get_entity_unique_values_query(entity_name=entity_name, value_search_term=value_search_term,
+                                            variant_search_term=variant_search_term,
+                                            empty_variants_only=empty_variants_only)
+    if _supports_composite_aggregation():
+        composite = {
+            "size": size,
+            "sources": [{"value": {"terms": {"field": "value.keyword"}}}]
+        }
+        if after is not None:
+            composite['after'] = {"value": after}
+        data = {"query": query, "aggs": {"unique_values": {"composite": composite}}, "size": 0}
+        kwargs = dict(kwargs, body=data, doc_type=doc_type, index=index_name,
+                      filter_path=['aggregations.unique_values.buckets.key'])
+        search_results = connection.search(**kwargs)
+        buckets = search_results.get('aggregations', {}).get('unique_values', {}).get('buckets', [])
+        values = [bucket['key']['value'] for bucket in buckets]
+    else:
+        data = {
+            "query": query,
+            "collapse": {"field": "value.keyword"},
+            "sort": [{"value.keyword": {"order": "asc"}}],
+            "_source": False,
+            "size": size
+        }
+        if after is not None:
+            # search_after can not be combined with collapse, filter out values up to after instead
+            query['bool'].setdefault('filter', []).append({"range": {"value.keyword": {"gt": after}}})
+        kwargs = dict(kwargs, body=data, doc_type=doc_type, index=index_name, filter_path=['hits.hits.sort'])
+        search_results = connection.search(**kwargs)
+        values = [hit['sort'][0] for hit in search_results.get('hits', {}).get('hits', [])]
+
+    next_after = values[-1] if values and len(values) >= size else None
+    return values, next_after
+
+
+def iter_entity_unique_values(connection, index_name, doc_type, entity_name, page_size=None, **kwargs):
+    """
+    Generator over the sorted unique values of entity matching the filters, fetched one page at a time with
+    get_entity_unique_values_page
+
+    Args:
+        connection (elasticsearch.client.Elasticsearch): Elasticsearch client object
+        index_name (str): The name of the index
+        doc_type (str): The type of the documents that will be indexed
+        entity_name (str): name of the entity for which the data is to be fetched
+        page_size (int, optional): number of values fetched per request. Defaults to ES_SEARCH_SIZE setting
+        kwargs: filters and request parameters, see get_entity_unique_values_page
+
+    Yields:
+        str: each value
+    """
+    page_size = page_size or constants.ELASTICSEARCH_SEARCH_SIZE
+    after = None
+    while True:
+        values, after = get_entity_unique_values_page(connection=connection, index_name=index_name,
+                                                      doc_type=doc_type, entity_name=entity_name, size=page_size,
+                                                      after=after, **kwargs)
+        for value in values:
+            yield value
+        if after is None:
+            break
+
+
+def get_entity_unique_values_count(connection, index_name, doc_type, entity_name, value_search_term=None,
+                                   variant_search_term=None, empty_variants_only=False, **kwargs):
+    """
+    Count unique values of entity matching the filters. Values are counted with a cardinality aggregation, which
+    is exact up to about UNIQUE_VALUES_PRECISION_THRESHOLD values. If the aggregation counts more than half of that,
+    the values are counted exactly by iterating over them with iter_entity_unique_values instead
+
+    Args:
+        connection (elasticsearch.client.Elasticsearch): Elasticsearch client object
+        index_name (str): The name of the index
+        doc_type (str): The type of the documents that will be indexed
+        entity_name (str): name of the entity for which the data is to be fetched
+        value_search_term (str): Filter values with the specific search term
+        variant_search_term (str): Filter variants with the specific search term
+        empty_variants_only (bool): Search for values with empty variants only
+
+    Returns:
+        int: number of unique values
+    """
+    query = _get_entity_unique_values_query(entity_name=entity_name, value_search_term=value_search_term,
+                                            variant_search_term=variant_search_term,
+                                            empty_variants_only=empty_variants_only)
+    data = {
+        "query": query,
+        "aggs": {
+            "unique_values_count": {
+                "cardinality": {
+                    "field": "value.keyword",
+                    "precision_threshold": UNIQUE_VALUES_PRECISION_THRESHOLD
+                }
+            }
+        },
+        "size": 0
+    }
+    search_kwargs = dict(kwargs, body=data, doc_type=doc_type, index=index_name,
+                         filter_path=['aggregations.unique_values_count.value'])
+    search_results = connection.search(**search_kwargs)
+    count = search_results.get('aggregations', {}).get('unique_values_count', {}).get('value', 0)
+    if count < UNIQUE_VALUES_PRECISION_THRESHOLD // 2:
+        return count
+
+    return sum(1 for _ in iter_entity_unique_values(connection=connection, index_name=index_name, doc_type=doc_type,
+                                                    entity_name=entity_name, value_search_term=value_search_term,
+                                                    variant_search_term=variant_search_term,
+                                                    empty_variants_only=empty_variants_only, **kwargs))
+
+
+def get_entity_unique_values(connection, index_name, doc_type, entity_name, value_search_term=None,
+                             variant_search_term=None, empty_variants_only=False, **kwargs):
+    """
+    Search for values in entity with filters
+
+    Args:
+        connection (elasticsearch.client.Elasticsearch): Elasticsearch client object
+        index_name (str): The name of the index
+        doc_type (str): The type of the documents that will be indexed
+        entity_name (str): name of the entity for which the data is to be fetched
+        value_search_term (str): Filter values with the specific search term
+        variant_search_term (str): Filter variants with the specific search term
+        empty_variants_only (bool): Search for values with empty variants only
+    Returns:
+        list: Sorted list of values which match the filters and search criteria
+    """
+    return list(iter_entity_unique_values(connection=connection, index_name=index_name, doc_type=doc_type,
+                                          entity_name=entity_name, value_search_term=value_search_term,
+                                          variant_search_term=variant_search_term,
+                                          empty_variants_only=empty_variants_only, **kwargs))
 
 
 def full_text_query(connection, index_name, doc_type, entity_name, sentences, fuzziness_threshold,
@@ -283,20 +474,240 @@ def full_text_query(connection, index_name, doc_type, entity_name, sentences, fu
          u'mumbai': u'mumbai',
          u'pune': u'pune'}
     """
-    index = {'index': index_name, 'type': doc_type}
-    data = []
-    for sentence_ in sentences:
-        query = _generate_es_search_dictionary(entity_name, sentence_, fuzziness_threshold,
-                                               language_script=search_language_script)
-        data.extend([json.dumps(index), json.dumps(query)])
-    data = '\n'.join(data)
+    return full_text_query_multi(connection=connection, index_name=index_name, doc_type=doc_type,
+                                 entity_names_and_sentences=[(entity_name, sentence) for sentence in sentences],
+                                 fuzziness_threshold=fuzziness_threshold,
+                                 search_language_script=search_language_script, **kwargs)
+
+
+def full_text_query_multi(connection, index_name, doc_type, entity_names_and_sentences, fuzziness_threshold,
+                          search_language_script=None, highlight_cache=None, slim_response=None, planner=None,
+                          **kwargs):
+    """
+    Same as full_text_query but searches any number of (entity name, sentence) pairs, possibly of different
+    entities, with a single msearch request
+
+    Args:
+        connection: Elasticsearch client object
+        index_name: The name of the index
+        doc_type: The type of the documents that will be indexed
+        entity_names_and_sentences (list of tuples): (entity_name, sentence) pairs, entity_name is the name of the
+                                                     entity to search in sentence
+        fuzziness_threshold: fuzziness_threshold for elasticsearch match query 'fuzziness' parameter
+        search_language_script: language of elasticsearch documents which are eligible for match
+        highlight_cache (datastore.cache.HighlightCache, optional): cache of parsed highlight fragments, also
+                                                                    records time spent parsing the results
+        slim_response (bool, optional): if True, only values and highlighted variants of hits are returned by
+                                        elasticsearch. Defaults to ES_SLIM_RESPONSES setting
+        planner (QueryPlanner, optional): chooses the search plan of each pair, all pairs are searched with the
+                                          fuzzy plan if None
+        kwargs:
+            Refer https://elasticsearch-py.readthedocs.io/en/master/api.html#elasticsearch.Elasticsearch.msearch
+
+    Returns:
+        list of collections.OrderedDict: one dictionary per pair in entity_names_and_sentences, in the same order,
+                                         mapping highlighted fuzzy entity variant to entity value ordered by
+                                         relevance order returned by elasticsearch
+    """
+    if not entity_names_and_sentences:
+        return []
+
+    if slim_response is None:
+        slim_response = constants.ELASTICSEARCH_SLIM_RESPONSES
+    if planner is not None:
+        planner.update_entity_stats(connection=connection, index_name=index_name, doc_type=doc_type,
+                                    entity_names=[entity_name for entity_name, _ in entity_names_and_sentences],
+                                    request_timeout=kwargs.get('request_timeout'))
+    data = get_full_text_query_msearch_body(index_name=index_name, doc_type=doc_type,
+                                            entity_names_and_sentences=entity_names_and_sentences,
+                                            fuzziness_threshold=fuzziness_threshold,
+                                            search_language_script=search_language_script,
+                                            slim_response=slim_response, planner=planner)
+    if slim_response:
+        kwargs.setdefault('filter_path', constants.ELASTICSEARCH_FULL_TEXT_QUERY_FILTER_PATH)
 
     kwargs = dict(kwargs, body=data, doc_type=doc_type, index=index_name)
     results = _run_es_search(connection, msearch=True, **kwargs)
-    results = _parse_es_search_results(results.get("responses"))
+    start_time = time.time()
+    results = _parse_es_search_results(results.get("responses"),
+                                       entity_names=[entity_name for entity_name, _ in entity_names_and_sentences],
+                                       highlight_cache=highlight_cache)
+    if highlight_cache is not None:
+        highlight_cache.add_parse_time(time.time() - start_time, count=len(results))
     return results
 
 
+def get_full_text_query_msearch_body(index_name, doc_type, entity_names_and_sentences, fuzziness_threshold,
+                                     search_language_script=None, slim_response=False, planner=None):
+    """
+    Build the body of the msearch request made by full_text_query_multi. Each search is sent only to the shard of its
+    entity and to the indices of search_language_script and English, see datastore.elastic_search.partition
+
+    Args:
+        index_name: The name of the index
+        doc_type: The type of the documents that will be indexed
+        entity_names_and_sentences (list of tuples): (entity_name, sentence) pairs
+        fuzziness_threshold: fuzziness_threshold for elasticsearch match query 'fuzziness' parameter
+        search_language_script: language of elasticsearch documents which are eligible for match
+        slim_response (bool, optional): if True, only the value field of documents is returned. Defaults to False
+        planner (QueryPlanner, optional): chooses the search plan of each pair, all pairs are searched with the
+                                          fuzzy plan if None
+
+    Returns:
+        str: newline delimited header and search lines
+    """
+    language_scripts = [search_language_script, ENGLISH_LANG] if search_language_script is not None else None
+    index = {'index': get_search_index_name(index_name, language_scripts=language_scripts), 'type': doc_type}
+    data = []
+    for entity_name, sentence_ in entity_names_and_sentences:
+        plan, max_expansions = PLAN_FUZZY, None
+        if planner is not None:
+            plan = planner.plan(entity_name)
+            max_expansions = planner.max_expansions
+        query = _generate_es_search_dictionary(entity_name, sentence_, fuzziness_threshold,
+                                               language_script=search_language_script, plan=plan,
+                                               max_expansions=max_expansions)
+        if slim_response:
+            query['_source'] = ['value']
+        routing = get_routing(entity_name)
+        header = dict(index, routing=routing) if routing is not None else index
+        data.extend([json.dumps(header), json.dumps(query)])
+    return '\n'.join(data)
+
+
+class QueryPlanner(object):
+    """
+    Chooses how each entity of a text detection search is searched, from the size of the entity, and records which
+    plan ran
+
+        PLAN                 USED WHEN                                        QUERY
+        ---------------------------------------------------------------------------------------------------------
+        bounded_fuzzy        entity has more than large_entity_records        match with fuzziness and at most
+                             records                                          max_expansions expansions per term
+        fuzzy                otherwise                                        match with fuzziness, as before
+
+    Fuzzy expansions of a term grow with the number of distinct terms in the index, which is what makes searches of
+    large entities expensive. Bounding them costs recall: a misspelt term only matches the max_expansions terms of
+    the index closest to it, so a variant is missed when more terms than that are within the allowed edits. Terms
+    that allow no edits are not expanded under either plan. Record counts of entities are fetched for all entities of
+    a search with a single msearch request and kept for stats_ttl seconds. They are only fetched when
+    large_entity_records is set.
+
+    Attributes:
+        large_entity_records (int): entities with more records are searched with the bounded_fuzzy plan, 0 disables
+        max_expansions (int): maximum number of terms each fuzzy term expands to with the bounded_fuzzy plan
+    """
+
+    def __init__(self, large_entity_records=0, max_expansions=10, stats_ttl=300, timer=time.time):
+        """
+        Args:
+            large_entity_records (int, optional): entities with more records are searched with bounded expansions,
+                                                  0 disables it. Defaults to 0
+            max_expansions (int, optional): maximum expansions per fuzzy term of large entities. Defaults to 10
+            stats_ttl (int or float, optional): seconds record counts of entities are kept for. Defaults to 300
+            timer (callable, optional): function returning current time in seconds
+        """
+        self.large_entity_records = large_entity_records
+        self.max_expansions = max_expansions
+        self._stats_ttl = stats_ttl
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._entity_records = {}
+        self._plans = collections.defaultdict(int)
+        self._last_plans = {}
+
+    def update_entity_stats(self, connection, index_name, doc_type, entity_names, **kwargs):
+        """
+        Fetch record counts of entities whose count is missing or expired, with a single msearch request
+
+        Args:
+            connection: Elasticsearch client object
+            index_name: The name of the index
+            doc_type: The type of the documents
+            entity_names (iterable): names of the entities about to be searched
+            kwargs:
+                Refer https://elasticsearch-py.readthedocs.io/en/master/api.html#elasticsearch.Elasticsearch.msearch
+        """
+        if not self.large_entity_records:
+            return
+        now = self._timer()
+        entity_names = sorted(set(entity_name for entity_name in entity_names
+                                  if self._entity_records.get(entity_name, (None, now))[1] <= now))
+        if not entity_names:
+            return
+
+        data = []
+        for entity_name in entity_names:
+            header = {'index': index_name, 'type': doc_type}
+            header.update(get_routing_kwargs(entity_name))
+            data.extend([json.dumps(header),
+                         json.dumps({'query': {'term': {'entity_data': {'value': entity_name}}}, 'size': 0})])
+        kwargs = dict((key, value) for key, value in kwargs.items() if value is not None)
+        results = connection.msearch(body='\n'.join(data), filter_path=['responses.hits.total'], **kwargs)
+        expires_at = now + self._stats_ttl
+        with self._lock:
+            for entity_name, response in zip(entity_names, results.get('responses', [])):
+                self._entity_records[entity_name] = (response.get('hits', {}).get('total', 0), expires_at)
+
+    def invalidate_entity(self, entity_name):
+        """
+        Drop the record count of entity_name, so that it is fetched again before its next search
+        """
+        with self._lock:
+            self._entity_records.pop(entity_name, None)
+
+    def clear(self):
+        """
+        Drop record counts of all entities
+        """
+        with self._lock:
+            self._entity_records.clear()
+
+    def get_entity_stats(self, entity_name):
+        """
+        Returns:
+            dict: number of records of entity_name ('records') if known, and the plan its last search ran with
+                  ('plan') if it was searched
+        """
+        stats = {}
+        if entity_name in self._entity_records:
+            stats['records'] = self._entity_records[entity_name][0]
+        if entity_name in self._last_plans:
+            stats['plan'] = self._last_plans[entity_name]
+        return stats
+
+    def plan(self, entity_name):
+        """
+        Choose the plan of searching entity_name and record it
+
+        Args:
+            entity_name (str): name of the entity to search
+
+        Returns:
+            str: one of PLAN_BOUNDED_FUZZY and PLAN_FUZZY
+        """
+        records = self._entity_records.get(entity_name, (0, None))[0]
+        if self.large_entity_records and records > self.large_entity_records:
+            plan = PLAN_BOUNDED_FUZZY
+        else:
+            plan = PLAN_FUZZY
+        with self._lock:
+            self._plans[plan] += 1
+            self._last_plans[entity_name] = plan
+        return plan
+
+    def get_stats(self):
+        """
+        Returns:
+            dict: number of searches run with each plan, keyed by plan name, along with number of entities whose
+                  record count is known ('entities')
+        """
+        with self._lock:
+            stats = dict((plan, self._plans[plan]) for plan in (PLAN_BOUNDED_FUZZY, PLAN_FUZZY))
+            stats['entities'] = len(self._entity_records)
+        return stats
+
+
 def _run_es_search(connection, msearch=False, **kwargs):
     """
     Execute the elasticsearch.ElasticSearch.msearch() method and return all results using
@@ -320,26 +731,70 @@ def _run_es_search(connection, msearch=False, **kwargs):
     if scroll and msearch:
         raise ValueError('Scrolling is not supported in msearch mode')
 
-    result = connection.search(scroll=scroll, **kwargs)
-    scroll_id = result['_scroll_id']
-    scroll_size = result['hits']['total']
-    hit_list = result['hits']['hits']
-    scroll_ids = [scroll_id]
-    while scroll_size > 0:
-        _result = connection.scroll(scroll_id=scroll_id, scroll=scroll)
-        scroll_id = _result['_scroll_id']
-        scroll_ids.append(scroll_id)
-        scroll_size = len(_result['hits']['hits'])
-        hit_list += _result['hits']['hits']
+    pages = _scroll_pages(connection, scroll=scroll, **kwargs)
+    result = next(pages)
+    hit_list = list(result['hits']['hits'])
+    for page in pages:
+        hit_list.extend(page['hits']['hits'])
 
     result['hits']['hits'] = hit_list
-    if scroll_ids:
-        connection.clear_scroll(body={"scroll_id": scroll_ids})
-
     return result
 
 
-def _get_dynamic_fuzziness_threshold(fuzzy_setting):
+def _scroll_pages(connection, scroll, **kwargs):
+    """
+    Generator over the responses of a search and of the scroll requests following it, until a page with no hits.
+    The scroll contexts are cleared once the generator is exhausted or closed.
+
+    Args:
+        connection: Elasticsearch client object
+        scroll (str): time to keep the search context alive between pages, e.g. '1m'
+        kwargs:
+            Refer https://elasticsearch-py.readthedocs.io/en/master/api.html#elasticsearch.Elasticsearch.search
+
+    Yields:
+        dict: search response of each page
+    """
+    result = connection.search(scroll=scroll, **kwargs)
+    scroll_ids = []
+    try:
+        while True:
+            scroll_id = result.get('_scroll_id')
+            if scroll_id and scroll_id not in scroll_ids:
+                scroll_ids.append(scroll_id)
+            yield result
+            if not result['hits']['hits'] or not scroll_id:
+                break
+            result = connection.scroll(scroll_id=scroll_id, scroll=scroll)
+    finally:
+        if scroll_ids:
+            connection.clear_scroll(body={"scroll_id": scroll_ids})
+
+
+def scroll_hits(connection, scroll='1m', **kwargs):
+    """
+    Generator over all hits of a search, fetched one page of `size` hits at a time using
+    elasticsearch.ElasticSearch.scroll(), so that only the current page is held in memory
+
+    Args:
+        connection: Elasticsearch client object
+        scroll (str, optional): time to keep the search context alive between pages, defaults to '1m'
+        kwargs:
+            Refer https://elasticsearch-py.readthedocs.io/en/master/api.html#elasticsearch.Elasticsearch.search
+
+    Yields:
+        dict: each hit of the search
+
+    Example:
+        for hit in scroll_hits(connection, index='entity_data', body={'query': {'match_all': {}}}, size=1000):
+            print(hit['_source'])
+    """
+    for page in _scroll_pages(connection, scroll=scroll, **kwargs):
+        for hit in page['hits']['hits']:
+            yield hit
+
+
+def get_dynamic_fuzziness_threshold(fuzzy_setting):
     """
     Approximately emulate AUTO:[low],[high] functionality of elasticsearch 6.2+ on older versions
 
@@ -359,7 +814,8 @@ def _get_dynamic_fuzziness_threshold(fuzzy_setting):
     return fuzzy_setting
 
 
-def _generate_es_search_dictionary(entity_name, text, fuzziness_threshold, language_script=None):
+def _generate_es_search_dictionary(entity_name, text, fuzziness_threshold, language_script=None, plan=PLAN_FUZZY,
+                                   max_expansions=None):
     """
     Generates compound elasticsearch boolean search query dictionary for the sentence. The query generated
     searches for entity_name in the index and returns search results for the matched word (of sentence)
@@ -370,6 +826,9 @@ def _generate_es_search_dictionary(entity_name, text, fuzziness_threshold, langu
         text: The text on which we need to identify the enitites.
         fuzziness_threshold: fuzziness_threshold for elasticsearch match query 'fuzziness' parameter
         language_script: language of documents to be searched, optional, defaults to None
+        plan (str, optional): PLAN_BOUNDED_FUZZY searches with at most max_expansions expansions per fuzzy term,
+                              see QueryPlanner. Defaults to PLAN_FUZZY
+        max_expansions (int, optional): maximum expansions per fuzzy term with PLAN_BOUNDED_FUZZY
 
     Returns:
         dictionary, the search query for the text
@@ -401,18 +860,20 @@ def _generate_es_search_dictionary(entity_name, text, fuzziness_threshold, langu
                 'should': [],
                 'minimum_should_match': 1
             }
-        }, 'size': constants.ELASTICSEARCH_SEARCH_SIZE
+        }, 'size': constants.ELASTICSEARCH_FULL_TEXT_SEARCH_SIZE
     }
     query_should_data = []
     query = {
         'match': {
             'variants': {
                 'query': text,
-                'fuzziness': _get_dynamic_fuzziness_threshold(fuzziness_threshold),
+                'fuzziness': get_dynamic_fuzziness_threshold(fuzziness_threshold),
                 'prefix_length': 1
             }
         }
     }
+    if plan == PLAN_BOUNDED_FUZZY and max_expansions:
+        query['match']['variants']['max_expansions'] = max_expansions
     query_should_data.append(query)
     data['query']['bool']['should'] = query_should_data
     data['highlight'] = {
@@ -420,18 +881,39 @@ def _generate_es_search_dictionary(entity_name, text, fuzziness_threshold, langu
             'variants': {}
         },
         'order': 'score',
-        'number_of_fragments': 20
+        'number_of_fragments': constants.ELASTICSEARCH_HIGHLIGHT_FRAGMENTS
     }
     return data
 
 
-def _parse_es_search_results(results_list):
+def _parse_highlighted_variant(fragment):
+    """
+    Strip highlight tags from a highlight fragment of the variants field
+
+    Args:
+        fragment (str): highlighted variant, e.g. u'<em>new</em> <em>delhi</em>'
+
+    Returns:
+        str or None: variant with whitespace normalized if all of its tokens are highlighted, None otherwise
+    """
+    fragment = _whitespace_pattern.sub(' ', fragment.strip())
+    variant = fragment.replace('<em>', '').replace('</em>', '').strip()
+    if fragment.count('<em>') == len(TOKENIZER.tokenize(variant)):
+        return variant
+    return None
+
+
+def _parse_es_search_results(results_list, entity_names=None, highlight_cache=None):
     """
     Parse highlighted results returned from elasticsearch query and generate a variants to values dictionary
 
     Args:
         results_list (list of dict): search results list of dictionaries from elasticsearch including highlights
                                     and scores
+        entity_names (list, optional): name of the entity searched for each of the results, required to use
+                                       highlight_cache
+        highlight_cache (datastore.cache.HighlightCache, optional): cache of parsed highlight fragments keyed by
+                                                                    (entity name, fragment)
 
     Returns:
         list of collections.OrderedDict: list containing dicts mapping matching variants to their entity values based
@@ -480,10 +962,10 @@ def _parse_es_search_results(results_list):
         ]
 
     """
+    use_cache = highlight_cache is not None and highlight_cache.enabled and entity_names is not None
     variants_to_values_list = []
     if results_list:
-        for results in results_list:
-            entity_values, entity_variants = [], []
+        for index, results in enumerate(results_list):
             variants_to_values = collections.OrderedDict()
             if results and results['hits']['total'] > 0:
                 for hit in results['hits']['hits']:
@@ -491,16 +973,16 @@ def _parse_es_search_results(results_list):
                         continue
 
                     value = hit['_source']['value']
-                    for variant in hit['highlight']['variants']:
-                        entity_values.append(value)
-                        entity_variants.append(variant)
-
-                for value, variant in zip(entity_values, entity_variants):
-                    variant = re.sub('\s+', ' ', variant.strip())
-                    variant_no_highlight_tags = variant.replace('<em>', '').replace('</em>', '').strip()
-                    if variant.count('<em>') == len(TOKENIZER.tokenize(variant_no_highlight_tags)):
-                        variant = variant_no_highlight_tags
-                        if variant not in variants_to_values:
+                    for fragment in hit['highlight']['variants']:
+                        if use_cache:
+                            key = (entity_names[index], fragment)
+                            variant = highlight_cache.get(key, _missing)
+                            if variant is _missing:
+                                variant = _parse_highlighted_variant(fragment)
+                                highlight_cache.set(key, variant)
+                        else:
+                            variant = _parse_highlighted_variant(fragment)
+                        if variant is not None and variant not in variants_to_values:
                             variants_to_values[variant] = value
             variants_to_values_list.append(variants_to_values)
 
@@ -542,6 +1024,30 @@ def get_crf_data_for_entity_name(connection, index_name, doc_type, entity_name,
 
     """
     results_dictionary = {SENTENCE_LIST: [], ENTITY_LIST: []}
+    for sentence, entities in iter_crf_data_for_entity_name(connection=connection, index_name=index_name,
+                                                            doc_type=doc_type, entity_name=entity_name, **kwargs):
+        results_dictionary[SENTENCE_LIST].append(sentence)
+        results_dictionary[ENTITY_LIST].append(entities)
+
+    return results_dictionary
+
+
+def iter_crf_data_for_entity_name(connection, index_name, doc_type, entity_name, **kwargs):
+    """
+    Generator over training sentences and their entities for a entity stored in the index, scrolling over the
+    records one page at a time
+
+    Args:
+        connection: Elasticsearch client object
+        index_name: The name of the index
+        doc_type: The type of the documents that will be indexed
+        entity_name: name of the entity to perform a 'term' query on
+        kwargs:
+            Refer https://elasticsearch-py.readthedocs.io/en/master/api.html#elasticsearch.Elasticsearch.search
+
+    Yields:
+        tuple: (sentence, list of entities in the sentence)
+    """
     data = {
         'query': {
             'term': {
@@ -551,15 +1057,6 @@ def get_crf_data_for_entity_name(connection, index_name, doc_type, entity_name,
             }
         }
     }
-    kwargs = dict(kwargs, body=data, doc_type=doc_type, size=constants.ELASTICSEARCH_SEARCH_SIZE, index=index_name,
-                  scroll='1m')
-    search_results = _run_es_search(connection, **kwargs)
-
-    # Parse hits
-    results = search_results['hits']['hits']
-
-    for result in results:
-        results_dictionary[SENTENCE_LIST].append(result['_source']['sentence'])
-        results_dictionary[ENTITY_LIST].append(result['_source']['entities'])
-
-    return results_dictionary
+    kwargs = dict(kwargs, body=data, doc_type=doc_type, size=constants.ELASTICSEARCH_SEARCH_SIZE, index=index_name)
+    for result in scroll_hits(connection, scroll='1m', **kwargs):
+        yield result['_source']['sentence'], result['_source']['entities']
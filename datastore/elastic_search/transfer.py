@@ -1,12 +1,15 @@
 import requests
 import json
+import threading
+from six.moves import queue
 from elasticsearch import Elasticsearch, RequestsHttpConnection
-from elasticsearch import helpers
 from chatbot_ner.config import CHATBOT_NER_DATASTORE, ner_logger
+from datastore import constants
+from datastore.elastic_search.populate import bulk_actions
 from datastore.exceptions import IndexNotFoundException, InvalidESURLException, \
     SourceDestinationSimilarException, \
     InternalBackupException, AliasNotFoundException, PointIndexToAliasException, \
-    FetchIndexForAliasException, DeleteIndexFromAliasException
+    FetchIndexForAliasException, DeleteIndexFromAliasException, ScrollSourceException
 
 from datastore.exceptions import AliasForTransferException, EngineNotImplementedException, \
     IndexForTransferException
@@ -119,18 +122,29 @@ class ESTransfer(object):
 
 
     """
-    def __init__(self, source, destination):
+    _end_of_slice = object()
+
+    def __init__(self, source, destination, slices=None):
         """
         Constructor to initialize the ESTransfer object
 
         Args
             source (str): source elastic search url with port e.g. http://localhost:9200
             destination (str): destination elastic search url with port e.g. http://localhost:9400
+            slices (int, optional): number of slices of the source index scrolled in parallel.
+                                    Defaults to ES_TRANSFER_SLICES setting
             es_index_1 (str): index1 present in both source and destination elastic search
             es_index_2 (str): index2 present in both source and destination elastic search.
         """
         self.source = source
         self.destination = destination
+        self.slices = max(slices or constants.ELASTICSEARCH_TRANSFER_SLICES, 1)
+        # Keep alive connections to the source shared by the threads scrolling its slices
+        self._session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.slices)
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        self._destination_connection = None
         self.engine = CHATBOT_NER_DATASTORE.get('engine')
         if self.engine is None:
             raise EngineNotImplementedException()
@@ -192,57 +206,88 @@ class ESTransfer(object):
             ner_logger.debug("check_if_index_exits - " + str(message))
             raise IndexNotFoundException(message)
 
-    def _scroll_over_es_return_object(self, results):
-        """
-        This function scrolls over the ES return object
-        """
-        data_new = []
-        total_records = 0
-        if 'hits' in results:
-            total_records = results['hits']['total']
-            for post in results['hits']['hits']:
-                data_new.append(post)
-            if '_scroll_id' in results.keys():
-                scroll_size = len(results['hits']['hits'])
-                while (scroll_size > 0):
-                    scroll_id = results['_scroll_id']
-                    scroll_req = {
-                        "scroll": "2m",
-                        "scroll_id": scroll_id
-                    }
-                    r = requests.post(self.source + "/_search/scroll", json=scroll_req, timeout=30)
-                    results = json.loads(r.content)
-                    for post in results['hits']['hits']:
-                        data_new.append(post)
-                    scroll_size = len(results['hits']['hits'])
-        return {
-            'hits': data_new,
-            'total': total_records
-        }
-
-    def _get_all_entities(self, query):
-        """
-        Fetch all entities from source ES
+    def _scroll_slice(self, query, slice_id, hits_queue, stop):
         """
-        response = {
-            'hits': [],
-            'total': 0,
-            'aggregations': {}
-        }
-        # generate url
-        url = self.source + '/' + self.es_alias + "/_search"
-        url = url + '?scroll=2m'
-        query['size'] = 10000
-        r = requests.post(url, json=query, timeout=30)
-        results = json.loads(r.content)
-        if 'error' not in results:
-            # deriving data, with scrolling if required
-            derived_data = self._scroll_over_es_return_object(results)
-            response['hits'] = derived_data['hits']
-            response['total'] = derived_data['total']
-            if 'aggregations' in results:
-                response['aggregations'] = results['aggregations']
-        return response
+        Scroll over one slice of the hits of query on the source alias, putting each page of hits on hits_queue
+        followed by _end_of_slice. Exceptions are put on hits_queue to be raised by the consumer
+
+        Args
+            query (dict): The ES query
+            slice_id (int): The slice to scroll over, 0 to self.slices - 1
+            hits_queue (Queue.Queue): bounded queue the pages are put on, blocks while the consumer is behind
+            stop (threading.Event): set by the consumer when it stops reading hits_queue
+        """
+        scroll_id = None
+        try:
+            body = dict(query, size=constants.ELASTICSEARCH_SEARCH_SIZE)
+            if self.slices > 1:
+                body['slice'] = {'id': slice_id, 'max': self.slices}
+            r = self._session.post(self.source + '/' + self.es_alias + '/_search', params={'scroll': '2m'},
+                                   json=body, timeout=30)
+            results = json.loads(r.content)
+            scroll_id = results.get('_scroll_id')
+            while not stop.is_set():
+                if 'error' in results:
+                    # A failed slice must not look finished, the transfer would swap in an index missing its hits
+                    raise ScrollSourceException('slice %d failed: %s' % (slice_id, results['error']))
+                if not results['hits']['hits']:
+                    break
+                hits_queue.put(results['hits']['hits'])
+                if scroll_id is None:
+                    break
+                r = self._session.post(self.source + '/_search/scroll', json={'scroll': '2m', 'scroll_id': scroll_id},
+                                       timeout=30)
+                results = json.loads(r.content)
+                scroll_id = results.get('_scroll_id', scroll_id)
+        except Exception as e:
+            hits_queue.put(e)
+        finally:
+            if scroll_id is not None:
+                try:
+                    self._session.delete(self.source + '/_search/scroll', json={'scroll_id': [scroll_id]},
+                                         timeout=30)
+                except requests.RequestException:
+                    pass
+            hits_queue.put(self._end_of_slice)
+
+    def _iter_source_hits(self, query):
+        """
+        Generator over all hits of query on the source alias, scrolled by one thread per slice. At most
+        ELASTICSEARCH_TRANSFER_PAGES_PER_SLICE pages per slice are held in memory waiting to be consumed
+
+        Args
+            query (dict): The ES query
+
+        Yields
+            dict: each hit
+        """
+        hits_queue = queue.Queue(maxsize=self.slices * constants.ELASTICSEARCH_TRANSFER_PAGES_PER_SLICE)
+        stop = threading.Event()
+        threads = [threading.Thread(target=self._scroll_slice, args=(query, slice_id, hits_queue, stop))
+                   for slice_id in range(self.slices)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        running = len(threads)
+        try:
+            while running:
+                page = hits_queue.get()
+                if page is self._end_of_slice:
+                    running -= 1
+                elif isinstance(page, Exception):
+                    raise page
+                else:
+                    for hit in page:
+                        yield hit
+        finally:
+            # Unblock slices still putting pages, they stop scrolling once stop is set
+            stop.set()
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    hits_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
 
     def _generate_update_json(self, index, hits):
         """
@@ -250,43 +295,52 @@ class ESTransfer(object):
 
         Args
             index (string): The documents will be updated in the index created on destination from source
-            hits (object): Hits generated from the ES query
+            hits (iterable): Hits generated from the ES query
+
+        Yields
+            dict: bulk index action for each hit, keeping the document id and routing
         """
-        str_query = []
         for i in hits:
-            str_query.append(
-                {
-                    "_index": index,
-                    "_type": i['_type'],
-                    "entity_data": i['_source']['entity_data'],
-                    "dict_type": i['_source']['dict_type'],
-                    "value": i['_source']['value'],
-                    "variants": i['_source']['variants'],
-                    "language_script": i['_source']['language_script'],
-                    "_op_type": "index"
-                }
-            )
-        return str_query
+            action = {
+                "_index": index,
+                "_type": i['_type'],
+                "_id": i['_id'],
+                "_source": i['_source'],
+                "_op_type": "index"
+            }
+            if '_routing' in i:
+                action['_routing'] = i['_routing']
+            yield action
 
-    def _run_update_query_on_es(self, update_query):
+    def get_destination_connection(self):
+        """
+        Elasticsearch client of the destination, created once and reused for all bulk requests
+
+        Returns:
+            elasticsearch.Elasticsearch: client connected to the destination url
         """
-        This function runs the update query on ES
+        if self._destination_connection is None:
+            # TODO - this works differently from other connects, picks scheme from the full URL
+            scheme, host, port = self.destination.split(':')
+            ip = host[2:] if host.startswith('//') else host
+            use_ssl = scheme != 'http'
+            self._destination_connection = Elasticsearch(hosts=[{'host': ip, 'port': int(port)}],
+                                                         use_ssl=use_ssl, verify_certs=use_ssl, scheme=scheme,
+                                                         connection_class=RequestsHttpConnection,
+                                                         maxsize=max(constants.ELASTICSEARCH_BULK_THREAD_COUNT, 1))
+        return self._destination_connection
 
+    def _run_update_query_on_es(self, update_query):
         """
-        # TODO - this works differently from other connects, picks scheme from the full URL
-        scheme, host, port = self.destination.split(':')
-        ip = host[2:] if host.startswith('//') else host
-        if scheme == 'http':
+        This function runs the update query on ES, sending the actions in bulk requests as they are generated
 
-            es_destination_connection = Elasticsearch(hosts=[{'host': ip, 'port': int(port)}],
-                                                      use_ssl=False, verify_certs=False, scheme=scheme,
-                                                      connection_class=RequestsHttpConnection)
-        else:
-            es_destination_connection = Elasticsearch(hosts=[{'host': ip, 'port': int(port)}],
-                                                      use_ssl=True, verify_certs=True, scheme=scheme,
-                                                      connection_class=RequestsHttpConnection)
+        Args
+            update_query (iterable): bulk actions
 
-        helpers.bulk(es_destination_connection, update_query, stats_only=True)
+        Returns
+            tuple: number of successful and failed actions
+        """
+        return bulk_actions(self.get_destination_connection(), update_query)
 
     def _run_delete_query_on_es(self, index, query):
         """
@@ -297,7 +351,7 @@ class ESTransfer(object):
             query (string): The ES query to be executed
         """
         url = self.destination + '/' + index + "/_delete_by_query"
-        result = requests.post(url, json=query, timeout=30)
+        result = self._session.post(url, json=query, timeout=30)
         return result
 
     def _transfer_specific_documents(self, new_live_index, list_of_entities):
@@ -328,11 +382,11 @@ class ESTransfer(object):
                 }
             ]
 
-        full_result = self._get_all_entities(query)
-        update_query = self._generate_update_json(new_live_index, full_result['hits'])
-        query.pop('size', None)
+        # Hits are written as they are scrolled, so the old documents are deleted first
         self._run_delete_query_on_es(new_live_index, query)
-        self._run_update_query_on_es(update_query)
+        update_query = self._generate_update_json(new_live_index, self._iter_source_hits(query))
+        result = self._run_update_query_on_es(update_query)
+        ner_logger.debug('_transfer_specific_documents - bulk result %s' % str(result))
 
     @staticmethod
     def transfer_data_internal(es_url, index_to_backup, backup_index):
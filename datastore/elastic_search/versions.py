@@ -0,0 +1,68 @@
+from __future__ import absolute_import
+
+# std imports
+import time
+
+# Local imports
+from datastore import constants
+from datastore.elastic_search.populate import bulk_actions
+from datastore.elastic_search.query import scroll_hits
+
+log_prefix = 'datastore.elastic_search.versions'
+
+
+def bump_entity_versions(connection, index_name, doc_type, entity_names, **kwargs):
+    """
+    Mark entities as modified by re-indexing their version document in the versions index, one document per entity
+    with the entity name as id, which increments the _version elasticsearch keeps for it. Processes on other hosts
+    compare these versions with get_entity_versions to find which entities to drop cached results of.
+
+    Args:
+        connection (elasticsearch.client.Elasticsearch): Elasticsearch client object
+        index_name (str): name of the versions index, created with the default mapping if it does not exist
+        doc_type (str): The type of the version documents
+        entity_names (iterable): names of the modified entities
+        kwargs: passed on to populate.bulk_actions
+
+    Returns:
+        tuple: number of successful and failed actions
+    """
+    updated_at = int(time.time() * 1000)
+    actions = ({'_op_type': 'index', '_index': index_name, '_type': doc_type, '_id': entity_name,
+                '_source': {'entity_data': entity_name, 'updated_at': updated_at}}
+               for entity_name in set(entity_names))
+    return bulk_actions(connection, actions, refresh=True, **kwargs)
+
+
+def get_entity_versions(connection, index_name, **kwargs):
+    """
+    Fetch versions of all entities from the versions index, scrolling over its documents ES_SEARCH_SIZE at a time.
+    There is one document per entity, so all versions usually come back with the first page
+
+    Args:
+        connection (elasticsearch.client.Elasticsearch): Elasticsearch client object
+        index_name (str): name of the versions index
+
+    Returns:
+        dict: mapping entity name to its version, empty if the versions index does not exist
+    """
+    data = {
+        "query": {"match_all": {}},
+        "version": True,
+        "_source": False,
+        "sort": ["_doc"]
+    }
+    hits = scroll_hits(connection, body=data, index=index_name, ignore_unavailable=True,
+                       size=constants.ELASTICSEARCH_SEARCH_SIZE, **kwargs)
+    return dict((hit['_id'], hit['_version']) for hit in hits)
+
+
+def delete_entity_versions(connection, index_name, **kwargs):
+    """
+    Delete the versions index, processes comparing versions then drop cached results of all entities
+
+    Args:
+        connection (elasticsearch.client.Elasticsearch): Elasticsearch client object
+        index_name (str): name of the versions index
+    """
+    connection.indices.delete(index=index_name, ignore=[400, 404], **kwargs)
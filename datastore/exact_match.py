@@ -0,0 +1,104 @@
+from __future__ import absolute_import
+
+# std imports
+import collections
+
+# Local imports
+from lib.nlp.const import TOKENIZER
+
+log_prefix = 'datastore.exact_match'
+
+# Key of the list of (variant, value, language_script) of variants ending at a trie node. Tokens are never empty so
+# this can not clash with a token
+_VARIANTS_KEY = ''
+
+
+def tokenize(text):
+    """
+    Tokenize text the same way TextDetector tokenizes texts and variants to check for exact matches
+
+    Args:
+        text (str or unicode): text to tokenize
+
+    Returns:
+        list of unicode: lowercased tokens
+    """
+    if isinstance(text, bytes):
+        text = text.decode('utf-8')
+    return TOKENIZER.tokenize(text.lower())
+
+
+class ExactMatchIndex(object):
+    """
+    Token trie over variants of a single entity, finding all variants that occur in a text as a contiguous sequence of
+    whole tokens. Each token of the text is visited at most once per token of the longest variant starting there, so
+    a search is a single pass over the text without any request to the datastore.
+
+    Attributes:
+        max_tokens (int): number of tokens of the longest variant
+    """
+
+    def __init__(self, records):
+        """
+        Build the index
+
+        Args:
+            records (iterable): iterable of dicts with 'value', 'variants' and 'language_script' keys, same as the
+                                _source of documents indexed in elasticsearch
+        """
+        self.max_tokens = 0
+        self._size = 0
+        self._root = {}
+        for record in records:
+            for variant in record.get('variants') or []:
+                tokens = tokenize(variant) if variant else None
+                if not tokens:
+                    continue
+                node = self._root
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                node.setdefault(_VARIANTS_KEY, []).append((u' '.join(variant.split()), record.get('value'),
+                                                           record.get('language_script')))
+                self.max_tokens = max(self.max_tokens, len(tokens))
+                self._size += 1
+
+    def __len__(self):
+        return self._size
+
+    def search(self, text, language_scripts=None):
+        """
+        Find variants occurring in text
+
+        Args:
+            text (str or unicode): text to search variants in
+            language_scripts (iterable, optional): if given, only variants of records with these language scripts
+                                                   are returned
+
+        Returns:
+            tuple:
+                collections.OrderedDict: mapping matched variants to their entity values, variants with more tokens
+                                         first and then in order of occurrence in text
+                unicode: tokens of text not covered by any matched variant, separated by single spaces
+        """
+        tokens = tokenize(text)
+        matches = []
+        covered = [False] * len(tokens)
+        for start in range(len(tokens)):
+            node = self._root
+            for end in range(start, len(tokens)):
+                node = node.get(tokens[end])
+                if node is None:
+                    break
+                for variant, value, language_script in node.get(_VARIANTS_KEY, ()):
+                    if language_scripts is not None and language_script not in language_scripts:
+                        continue
+                    matches.append((start - end, start, variant, value))
+                    covered[start:end + 1] = [True] * (end + 1 - start)
+        matches.sort(key=lambda match: match[:2])
+
+        variants_to_values = collections.OrderedDict()
+        for _, _, variant, value in matches:
+            if variant not in variants_to_values:
+                variants_to_values[variant] = value
+        unmatched_text = u' '.join(token for token, is_covered in zip(tokens, covered) if not is_covered)
+        return variants_to_values, unmatched_text
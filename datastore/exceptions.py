@@ -21,7 +21,8 @@ class DataStoreSettingsImproperlyConfiguredException(Exception):
 
 class EngineNotImplementedException(Exception):
     def __init__(self, message=None):
-        self.value = "Chatbot NER datastore currently supports only the following engines: ['elasticsearch'] . " \
+        self.value = "Chatbot NER datastore currently supports only the following engines: " \
+                     "['elasticsearch', 'memory', 'sqlite'] . " \
                      "Please make sure the ENGINE environment variable is correctly set"
         if message:
             self.value = message
@@ -157,3 +158,14 @@ class DeleteIndexFromAliasException(Exception):
 
     def __str__(self):
         return repr(self.value)
+
+
+class ScrollSourceException(Exception):
+    """
+    This exception is raised if a search or scroll request over the documents to transfer fails
+    """
+    def __init__(self, message=None):
+        self.value = message
+
+    def __str__(self):
+        return repr(self.value)
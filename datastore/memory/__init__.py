@@ -0,0 +1,5 @@
+from __future__ import absolute_import
+
+from datastore.memory import connect
+from datastore.memory import populate
+from datastore.memory import query
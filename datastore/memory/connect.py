@@ -0,0 +1,29 @@
+from __future__ import absolute_import
+
+# Local imports
+from chatbot_ner.config import ner_logger
+from datastore.memory.populate import create_all_dictionary_data
+from datastore.memory.store import MemoryStore
+
+log_prefix = 'datastore.memory.connect'
+
+
+def connect(entity_data_directory_path=None, **kwargs):
+    """
+    Creates the in-process store for the memory engine and loads entity data from the csv files in
+    entity_data_directory_path into it. Since the data lives in the memory of the current process, each process
+    (e.g. each gunicorn worker) loads its own copy when it first connects.
+
+    Args:
+        entity_data_directory_path (str, optional): Path of the directory containing the entity data csv files.
+                                                    If None, the store starts out empty
+        kwargs: ignored, accepted so that all connection settings can be passed as they are
+
+    Returns:
+        datastore.memory.store.MemoryStore: store loaded with entity data
+    """
+    connection = MemoryStore()
+    if entity_data_directory_path:
+        create_all_dictionary_data(connection=connection, logger=ner_logger,
+                                   entity_data_directory_path=entity_data_directory_path)
+    return connection
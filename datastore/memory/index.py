@@ -0,0 +1,186 @@
+from __future__ import absolute_import
+
+# std imports
+import collections
+import re
+
+# Local imports
+from datastore.utils import MAX_EDIT_DISTANCE, get_fuzziness_for_token
+from lib.nlp.levenshtein_distance import edit_distances
+from lib.nlp.stemmer import Stemmer, PORTER_STEMMER
+
+log_prefix = 'datastore.memory.index'
+
+# Same as the prefix_length used by elastic_search.query._generate_es_search_dictionary
+DEFAULT_PREFIX_LENGTH = 1
+
+_stemmer = Stemmer(PORTER_STEMMER)
+_whitespace_pattern = re.compile(r'\s+', re.UNICODE)
+
+
+def analyze(text):
+    """
+    Mimics the analyzer configured on the 'variants' field in elastic_search.create.create_entity_index, i.e.
+    whitespace tokenizer followed by lowercase and english stemmer filters
+
+    Args:
+        text (str or unicode): text to analyze
+
+    Returns:
+        list of unicode: analyzed tokens
+    """
+    if isinstance(text, bytes):
+        text = text.decode('utf-8')
+    return [_stemmer.stem_word(token) for token in _whitespace_pattern.split(text.strip().lower()) if token]
+
+
+def deletion_neighbourhood(string, max_deletes):
+    """
+    Generate all strings obtainable by deleting upto max_deletes characters from string, including string itself
+
+    Args:
+        string (unicode): string to generate the deletion neighbourhood for
+        max_deletes (int): maximum number of characters to delete
+
+    Returns:
+        set: deletion neighbourhood of string
+    """
+    neighbourhood = {string}
+    frontier = {string}
+    for _ in range(max_deletes):
+        next_frontier = set()
+        for candidate in frontier:
+            for i in range(len(candidate)):
+                next_frontier.add(candidate[:i] + candidate[i + 1:])
+        next_frontier -= neighbourhood
+        neighbourhood |= next_frontier
+        frontier = next_frontier
+    return neighbourhood
+
+
+class VariantIndex(object):
+    """
+    In-process fuzzy index over variants of a single entity.
+
+    Variants are analyzed into terms and every unique term is expanded into its deletion neighbourhood (SymSpell style)
+    so that looking up all terms within MAX_EDIT_DISTANCE edits of a query term needs only a handful of dictionary
+    lookups instead of a scan over the whole vocabulary. Like the elasticsearch query it replaces, the first
+    prefix_length characters of a term must match exactly and a variant is returned only if every one of its terms
+    matched some term of the query text (i.e. it would have been fully highlighted by elasticsearch).
+
+    Attributes:
+        prefix_length (int): number of leading characters that must match exactly for a fuzzy match
+    """
+
+    def __init__(self, records, prefix_length=DEFAULT_PREFIX_LENGTH):
+        """
+        Build the index
+
+        Args:
+            records (iterable): iterable of dicts with 'value', 'variants' and 'language_script' keys, same as the
+                                _source of documents indexed in elasticsearch
+            prefix_length (int, optional): number of leading characters that must match exactly for a fuzzy match
+        """
+        self.prefix_length = prefix_length
+        # list of (variant, value, language_script, unique analyzed terms)
+        self._variants = []
+        # analyzed term -> list of positions in self._variants
+        self._postings = collections.defaultdict(list)
+        # (prefix, deleted suffix) -> set of analyzed terms
+        self._deletes = collections.defaultdict(set)
+
+        for record in records:
+            for variant in record.get('variants') or []:
+                variant = _whitespace_pattern.sub(u' ', variant.strip()) if variant else variant
+                if not variant:
+                    continue
+                terms = frozenset(analyze(variant))
+                if not terms:
+                    continue
+                position = len(self._variants)
+                self._variants.append((variant, record.get('value'), record.get('language_script'), terms))
+                for term in terms:
+                    if term not in self._postings:
+                        self._add_term_to_neighbourhood(term)
+                    self._postings[term].append(position)
+
+    def __len__(self):
+        return len(self._variants)
+
+    def _add_term_to_neighbourhood(self, term):
+        prefix, suffix = term[:self.prefix_length], term[self.prefix_length:]
+        for deleted in deletion_neighbourhood(suffix, MAX_EDIT_DISTANCE):
+            self._deletes[(prefix, deleted)].add(term)
+
+    def _similar_terms(self, query_term, max_edits):
+        """
+        Find indexed terms within max_edits edits of query_term
+
+        Args:
+            query_term (unicode): analyzed query term
+            max_edits (int): maximum edit distance allowed
+
+        Returns:
+            dict: mapping matched indexed term to its edit distance from query_term
+        """
+        matches = {}
+        if query_term in self._postings:
+            matches[query_term] = 0
+        if max_edits <= 0:
+            return matches
+
+        prefix, suffix = query_term[:self.prefix_length], query_term[self.prefix_length:]
+        candidates = set()
+        for deleted in deletion_neighbourhood(suffix, max_edits):
+            candidates.update(self._deletes.get((prefix, deleted), ()))
+        candidates.difference_update(matches)
+        candidates = list(candidates)
+        distances = edit_distances(query=query_term, candidates=candidates, substitution_cost=1,
+                                   max_distance=max_edits + 1)
+        for term, distance in zip(candidates, distances):
+            if distance <= max_edits:
+                matches[term] = distance
+        return matches
+
+    def search(self, text, fuzziness_threshold, language_scripts=None):
+        """
+        Find variants all of whose terms fuzzy match some term in text
+
+        Args:
+            text (str or unicode): text to search variants in
+            fuzziness_threshold (int or str): int or "auto" or "auto:<low>,<high>", see get_fuzziness_for_token
+            language_scripts (iterable, optional): if given, only variants of records with these language scripts
+                                                   are returned
+
+        Returns:
+            collections.OrderedDict: mapping matched variants to their entity values ordered by relevance, i.e.
+                                     variants with more terms first and exact matches before fuzzy ones
+        """
+        matched_terms = {}
+        for query_term in set(analyze(text)):
+            max_edits = get_fuzziness_for_token(fuzziness_threshold, query_term)
+            for term, distance in self._similar_terms(query_term, max_edits).items():
+                if term not in matched_terms or distance < matched_terms[term]:
+                    matched_terms[term] = distance
+
+        candidate_positions = set()
+        for term in matched_terms:
+            candidate_positions.update(self._postings[term])
+
+        scored = []
+        for position in candidate_positions:
+            variant, value, language_script, terms = self._variants[position]
+            if language_scripts is not None and language_script not in language_scripts:
+                continue
+            if not all(term in matched_terms for term in terms):
+                continue
+            edits = sum(matched_terms[term] for term in terms)
+            scored.append((-len(terms), edits, position))
+        scored.sort()
+
+        variants_to_values = collections.OrderedDict()
+        for _, _, position in scored:
+            variant, value = self._variants[position][:2]
+            if variant not in variants_to_values:
+                variants_to_values[variant] = value
+        return variants_to_values
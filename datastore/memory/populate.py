@@ -0,0 +1,187 @@
+from __future__ import absolute_import
+
+# std imports
+import os
+
+# Local imports
+from datastore.elastic_search.populate import get_variants_dictionary_value_from_key
+from datastore.utils import get_csv_file_paths, remove_duplicate_data
+from language_utilities.constant import ENGLISH_LANG
+from ner_constants import DICTIONARY_DATA_VARIANTS
+
+log_prefix = 'datastore.memory.populate'
+
+
+def create_all_dictionary_data(connection, logger, entity_data_directory_path=None, csv_file_paths=None, **kwargs):
+    """
+    Loads all entity data from csv files stored at entity_data_directory_path, one file at a time
+
+    Args:
+        connection (datastore.memory.store.MemoryStore): in-process store
+        logger: logging object to log at debug and exception level
+        entity_data_directory_path: Optional, Path of the directory containing the entity data csv files.
+                                    Default is None
+        csv_file_paths: Optional, list of file paths to csv files. Default is None
+    """
+    logger.debug('%s: +++ Started: create_all_dictionary_data() +++' % log_prefix)
+    for csv_file_path in get_csv_file_paths(entity_data_directory_path, csv_file_paths):
+        create_dictionary_data_from_file(connection=connection, csv_file_path=csv_file_path, update=False,
+                                         logger=logger)
+    logger.debug('%s: +++ Finished: create_all_dictionary_data() +++' % log_prefix)
+
+
+def recreate_all_dictionary_data(connection, logger, entity_data_directory_path=None, csv_file_paths=None,
+                                 **kwargs):
+    """
+    Re-loads all entity data from csv files stored at entity_data_directory_path, one file at a time
+
+    Args:
+        connection (datastore.memory.store.MemoryStore): in-process store
+        logger: logging object to log at debug and exception level
+        entity_data_directory_path: Optional, Path of the directory containing the entity data csv files.
+                                    Default is None
+        csv_file_paths: Optional, list of file paths to csv files. Default is None
+    """
+    logger.debug('%s: +++ Started: recreate_all_dictionary_data() +++' % log_prefix)
+    for csv_file_path in get_csv_file_paths(entity_data_directory_path, csv_file_paths):
+        create_dictionary_data_from_file(connection=connection, csv_file_path=csv_file_path, update=True,
+                                         logger=logger)
+    logger.debug('%s: +++ Finished: recreate_all_dictionary_data() +++' % log_prefix)
+
+
+def create_dictionary_data_from_file(connection, csv_file_path, update, logger, **kwargs):
+    """
+    Loads all entity data from the csv file at path csv_file_path
+
+    Args:
+        connection (datastore.memory.store.MemoryStore): in-process store
+        csv_file_path: absolute file path of the csv file to populate entity data from
+        update: boolean, True if this is a update type operation, False if create/index type operation
+        logger: logging object to log at debug and exception level
+    """
+    base_file_name = os.path.basename(csv_file_path)
+    dictionary_key = os.path.splitext(base_file_name)[0]
+
+    if update:
+        delete_entity_by_name(connection=connection, entity_name=dictionary_key, logger=logger)
+    dictionary_value = get_variants_dictionary_value_from_key(csv_file_path=csv_file_path,
+                                                              dictionary_key=dictionary_key, logger=logger)
+    if dictionary_value:
+        add_data(connection=connection, dictionary_key=dictionary_key,
+                 dictionary_value=remove_duplicate_data(dictionary_value), language_script=ENGLISH_LANG,
+                 logger=logger)
+
+
+def add_data(connection, dictionary_key, dictionary_value, language_script, logger, **kwargs):
+    """
+    Adds all entity values and their variants to the store. Entity value and its list of variants are keys and values
+    of dictionary_value parameter generated from the csv file of this entity
+
+    Args:
+        connection (datastore.memory.store.MemoryStore): in-process store
+        dictionary_key: file name of the csv file without the extension, also used as the entity name to store values
+                        of this type. Example - 'city'
+        dictionary_value: dictionary, mapping entity value to a list of its variants.
+                            Example - 'New Delhi': ['Delhi', 'new deli', 'New Delhi']
+        language_script (str): Language code of the entity script
+        logger: logging object to log at debug and exception level
+    """
+    records = [{'dict_type': DICTIONARY_DATA_VARIANTS,
+                'value': value,
+                'variants': dictionary_value[value],
+                'language_script': language_script}
+               for value in dictionary_value]
+    ids = connection.add_records(entity_name=dictionary_key, records=records)
+    logger.debug('%s: \t++ %s added %d records ++' % (log_prefix, dictionary_key, len(ids)))
+
+
+def delete_entity_by_name(connection, entity_name, logger, **kwargs):
+    """
+    Deletes all data of entity named entity_name
+
+    Args:
+        connection (datastore.memory.store.MemoryStore): in-process store
+        entity_name (str): name of the entity to delete
+        logger: logging object to log at debug and exception level
+    """
+    connection.delete_entity(entity_name=entity_name)
+    logger.debug('%s: \t++ %s Entity deleted ++' % (log_prefix, entity_name))
+
+
+def entity_data_update(connection, entity_data, entity_name, language_script, logger, **kwargs):
+    """
+    Replaces all data of entity_name with entity_data
+
+    Args:
+        connection (datastore.memory.store.MemoryStore): in-process store
+        entity_data (list): List of dicts consisting of value and variants.
+        entity_name (str): Name of the dictionary
+        language_script (str): The code for the language script
+        logger: logging object to log at debug and exception level
+    """
+    delete_entity_by_name(connection=connection, entity_name=entity_name, logger=logger)
+    if entity_data:
+        dictionary_value = {}
+        for temp_dict in entity_data:
+            dictionary_value[temp_dict['value']] = temp_dict['variants']
+        add_data(connection=connection, dictionary_key=entity_name, dictionary_value=dictionary_value,
+                 language_script=language_script, logger=logger)
+
+
+def delete_entity_data_by_values(connection, entity_name, values=None, **kwargs):
+    """
+    Deletes entity data for the specific entity depending on the values.
+
+    Args:
+        connection (datastore.memory.store.MemoryStore): in-process store
+        entity_name (str): name of the entity for which the data is to be deleted.
+        values (list, optional): List of values for which data is to be deleted.
+            If None, all records are deleted
+    """
+    if values is None:
+        connection.delete_entity(entity_name=entity_name)
+        return
+
+    values = set(values)
+    record_ids = [record_id for record_id, record in connection.get_records(entity_name)
+                  if record.get('value') in values]
+    connection.delete_records(entity_name=entity_name, record_ids=record_ids)
+
+
+def add_entity_data(connection, entity_name, value_variant_records, **kwargs):
+    """
+    Save entity data in the store for the records
+
+    Args:
+        connection (datastore.memory.store.MemoryStore): in-process store
+        entity_name (str): name of the entity for which the data is to be created
+        value_variant_records (list): List of dicts to be created.
+            Sample Dict: {'value': 'value', 'language_script': 'en', variants': ['variant 1', 'variant 2']}
+    """
+    records = [{'dict_type': DICTIONARY_DATA_VARIANTS,
+                'value': record.get('value'),
+                'variants': record.get('variants'),
+                'language_script': record.get('language_script')}
+               for record in value_variant_records]
+    connection.add_records(entity_name=entity_name, records=records)
+
+
+def upsert_entity_data(connection, entity_name, value_variant_records, values_to_delete=None, replace=False, **kwargs):
+    """
+    Write records in place of all existing records of their values and delete all records of values_to_delete, while
+    holding the lock of the store so that readers see either the old or the new records of a value
+
+    Args:
+        connection (datastore.memory.store.MemoryStore): in-process store
+        entity_name (str): name of the entity
+        value_variant_records (list): List of dicts to be written.
+            Sample Dict: {'value': 'value', 'language_script': 'en', variants': ['variant 1', 'variant 2']}
+        values_to_delete (list, optional): values whose records are deleted in all languages
+        replace (bool, optional): if True, all other records of the entity are deleted as well. Defaults to False
+    """
+    values = None
+    if not replace:
+        values = set(values_to_delete or []) | set(record.get('value') for record in value_variant_records)
+    with connection:
+        delete_entity_data_by_values(connection=connection, entity_name=entity_name, values=values)
+        add_entity_data(connection=connection, entity_name=entity_name, value_variant_records=value_variant_records)
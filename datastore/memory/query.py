@@ -0,0 +1,166 @@
+from __future__ import absolute_import
+
+# std imports
+import bisect
+
+# Local imports
+from datastore.memory.index import analyze
+from language_utilities.constant import ENGLISH_LANG
+
+log_prefix = 'datastore.memory.query'
+
+
+def dictionary_query(connection, entity_name, **kwargs):
+    """
+    Get all variants data for a entity stored in the in-process store as a dictionary
+
+    Args:
+        connection (datastore.memory.store.MemoryStore): in-process store
+        entity_name (str): name of the entity
+
+    Returns:
+        dictionary, mapping entity values to lists containing synonyms/variants of the value
+    """
+    results_dictionary = {}
+    for _, record in connection.get_records(entity_name):
+        results_dictionary[record['value']] = record['variants']
+    return results_dictionary
+
+
+def get_entity_names(connection, **kwargs):
+    """
+    Fetch names of all entities that have at least one record
+
+    Args:
+        connection (datastore.memory.store.MemoryStore): in-process store
+
+    Returns:
+        (list): sorted list of entity names
+    """
+    return sorted(connection.entity_names())
+
+
+def get_entity_supported_languages(connection, entity_name, **kwargs):
+    """
+    Fetch languages supported by a specific entity
+
+    Args:
+        connection (datastore.memory.store.MemoryStore): in-process store
+        entity_name (str): name of the entity for which the language codes are to be fetched
+
+    Returns:
+        (list): List of language codes supported by this entity
+    """
+    language_list = []
+    for _, record in connection.get_records(entity_name):
+        if record.get('language_script') not in language_list:
+            language_list.append(record.get('language_script'))
+    return language_list
+
+
+def get_entity_data(connection, entity_name, values=None, **kwargs):
+    """
+    Fetches entity data for the specific entity in the same shape as elasticsearch hits
+
+    Args:
+        connection (datastore.memory.store.MemoryStore): in-process store
+        entity_name (str): name of the entity for which the data is to be fetched
+        values (list, optional): List of values for which data is to be fetched. If None, all
+                                 records are fetched
+
+    Returns:
+        (list): List of dicts with '_id' and '_source' keys
+    """
+    if values is not None:
+        values = set(values)
+    return [{'_id': record_id, '_source': record}
+            for record_id, record in connection.get_records(entity_name)
+            if values is None or record.get('value') in values]
+
+
+def get_entity_unique_values(connection, entity_name, value_search_term=None, variant_search_term=None,
+                             empty_variants_only=False, **kwargs):
+    """
+    Search for values in entity with filters
+
+    Args:
+        connection (datastore.memory.store.MemoryStore): in-process store
+        entity_name (str): name of the entity for which the data is to be fetched
+        value_search_term (str): Filter values with the specific search term
+        variant_search_term (str): Filter variants with the specific search term
+        empty_variants_only (bool): Search for values with empty variants only
+
+    Returns:
+        list: Sorted list of values which match the filters and search criteria
+    """
+    value_search_term = value_search_term.lower() if value_search_term else None
+    variant_search_terms = None
+    if variant_search_term and not empty_variants_only:
+        variant_search_terms = set(analyze(variant_search_term))
+
+    values = set()
+    for _, record in connection.get_records(entity_name):
+        value = record.get('value')
+        variants = [variant for variant in record.get('variants') or [] if variant]
+        if empty_variants_only and variants:
+            continue
+
+        # Same as the 'should' clauses with minimum_should_match 1 in the elasticsearch query
+        if value_search_term or variant_search_terms:
+            value_matched = bool(value_search_term) and value_search_term in value.lower()
+            variant_matched = bool(variant_search_terms) and any(
+                variant_search_terms.intersection(analyze(variant)) for variant in variants)
+            if not (value_matched or variant_matched):
+                continue
+
+        values.add(value)
+
+    return sorted(values)
+
+
+def get_entity_unique_values_page(connection, entity_name, size, after=None, **kwargs):
+    """
+    Fetch one page of the sorted unique values of entity matching the filters of get_entity_unique_values
+
+    Args:
+        connection (datastore.memory.store.MemoryStore): in-process store
+        entity_name (str): name of the entity for which the data is to be fetched
+        size (int): maximum number of values to fetch
+        after (str, optional): fetch values sorted after this value. If None, the first page is fetched
+        kwargs: filters, see get_entity_unique_values
+
+    Returns:
+        tuple: sorted list of values, and the value to pass as after to fetch the next page, None on the last page
+    """
+    values = get_entity_unique_values(connection=connection, entity_name=entity_name, **kwargs)
+    if after is not None:
+        values = values[bisect.bisect_right(values, after):]
+    values = values[:size]
+    next_after = values[-1] if values and len(values) >= size else None
+    return values, next_after
+
+
+def full_text_query(connection, entity_name, sentences, fuzziness_threshold, search_language_script=None, **kwargs):
+    """
+    Fuzzy search variants of entity_name in each of the sentences, the in-process counterpart of
+    datastore.elastic_search.query.full_text_query
+
+    Args:
+        connection (datastore.memory.store.MemoryStore): in-process store
+        entity_name (str): name of the entity to search variants of
+        sentences (list of strings): sentences in which entity has to be searched
+        fuzziness_threshold (int or str): same as 'fuzziness' parameter of elasticsearch match query
+        search_language_script (str, optional): language of records which are eligible for match, records in
+                                                english are always eligible
+
+    Returns:
+        list of collections.OrderedDict: list of dictionaries mapping matched variants to their entity values
+                                         ordered by relevance
+    """
+    language_scripts = None
+    if search_language_script is not None:
+        language_scripts = {search_language_script, ENGLISH_LANG}
+
+    index = connection.get_index(entity_name)
+    return [index.search(text=sentence, fuzziness_threshold=fuzziness_threshold, language_scripts=language_scripts)
+            for sentence in sentences]
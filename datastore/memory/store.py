@@ -0,0 +1,140 @@
+from __future__ import absolute_import
+
+# std imports
+import collections
+import threading
+import uuid
+
+# Local imports
+from datastore.memory.index import VariantIndex
+
+log_prefix = 'datastore.memory.store'
+
+
+class MemoryStore(object):
+    """
+    Process local storage for entity data used by the 'memory' engine.
+
+    Records are stored per entity with the same fields elasticsearch documents have in their _source ('entity_data',
+    'dict_type', 'value', 'variants', 'language_script') and a random '_id'. A VariantIndex per entity is built lazily
+    on first search after any write to that entity, so bulk writes do not pay for repeated index rebuilds.
+
+    Attributes:
+        _entities (dict): mapping entity name to collections.OrderedDict of record id to record
+        _indices (dict): mapping entity name to its VariantIndex, absent if the entity changed since last search
+        _lock (threading.RLock): guards all reads and writes of the above
+    """
+
+    def __init__(self):
+        self._entities = {}
+        self._indices = {}
+        self._lock = threading.RLock()
+
+    def __enter__(self):
+        """
+        Hold the lock of the store, so that a sequence of writes is seen by readers as a whole like a transaction
+        """
+        self._lock.acquire()
+        return self
+
+    def __exit__(self, *args):
+        self._lock.release()
+
+    def ping(self):
+        """
+        Kept for parity with elasticsearch client object, the in-process store is always reachable
+
+        Returns:
+            bool: True
+        """
+        return True
+
+    def entity_names(self):
+        """
+        Returns:
+            list: names of all entities that have at least one record
+        """
+        with self._lock:
+            return [entity_name for entity_name, records in self._entities.items() if records]
+
+    def get_records(self, entity_name):
+        """
+        Args:
+            entity_name (str): name of the entity
+
+        Returns:
+            list: list of (record id, record) tuples in insertion order
+        """
+        with self._lock:
+            return list(self._entities.get(entity_name, {}).items())
+
+    def add_records(self, entity_name, records):
+        """
+        Add records under entity_name
+
+        Args:
+            entity_name (str): name of the entity
+            records (iterable): dicts with 'value', 'variants' and 'language_script' keys
+
+        Returns:
+            list: ids of the added records
+        """
+        ids = []
+        with self._lock:
+            entity_records = self._entities.setdefault(entity_name, collections.OrderedDict())
+            for record in records:
+                record_id = uuid.uuid4().hex
+                entity_records[record_id] = dict(record, entity_data=entity_name)
+                ids.append(record_id)
+            self._indices.pop(entity_name, None)
+        return ids
+
+    def delete_records(self, entity_name, record_ids):
+        """
+        Delete records of entity_name with the given ids, unknown ids are ignored
+
+        Args:
+            entity_name (str): name of the entity
+            record_ids (iterable): ids of the records to delete
+        """
+        with self._lock:
+            entity_records = self._entities.get(entity_name, {})
+            for record_id in record_ids:
+                entity_records.pop(record_id, None)
+            self._indices.pop(entity_name, None)
+
+    def delete_entity(self, entity_name):
+        """
+        Delete all records of entity_name
+
+        Args:
+            entity_name (str): name of the entity
+        """
+        with self._lock:
+            self._entities.pop(entity_name, None)
+            self._indices.pop(entity_name, None)
+
+    def clear(self):
+        """
+        Delete all records of all entities
+        """
+        with self._lock:
+            self._entities = {}
+            self._indices = {}
+
+    def get_index(self, entity_name):
+        """
+        Get the fuzzy index for entity_name, building it if the entity changed since it was last built
+
+        Args:
+            entity_name (str): name of the entity
+
+        Returns:
+            datastore.memory.index.VariantIndex: index over all variants of the entity
+        """
+        with self._lock:
+            index = self._indices.get(entity_name)
+            if index is None:
+                index = VariantIndex(records=self._entities.get(entity_name, {}).values())
+                self._indices[entity_name] = index
+            return index
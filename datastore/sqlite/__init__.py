@@ -0,0 +1,6 @@
+from __future__ import absolute_import
+
+from datastore.sqlite import connect
+from datastore.sqlite import create
+from datastore.sqlite import populate
+from datastore.sqlite import query
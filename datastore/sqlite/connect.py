@@ -0,0 +1,118 @@
+from __future__ import absolute_import
+
+# std imports
+import os
+import sqlite3
+import threading
+
+# Local imports
+from datastore.sqlite import snapshot
+
+log_prefix = 'datastore.sqlite.connect'
+
+
+def connect(database_path, mmap_size=None, timeout=20, snapshot_directory=None, snapshot_check_interval=5,
+            on_snapshot_swap=None, **kwargs):
+    """
+    Opens a connection to the sqlite database file at database_path, creating the file if it does not exist.
+
+    The database is put in WAL mode so that readers in other processes are not blocked while populate/repopulate
+    writes to it, and memory mapped I/O is enabled so that all processes on a host read pages straight out of the
+    shared OS page cache instead of copying them into per process buffers.
+
+    If snapshot_directory is given, database_path is ignored and a read only connection to the current snapshot built
+    by datastore.sqlite.snapshot.build_snapshot in that directory is opened instead, switching to newer snapshots as
+    they are published, see datastore.sqlite.snapshot.SnapshotConnection
+
+    Args:
+        database_path (str): path of the sqlite database file
+        mmap_size (int, optional): maximum number of bytes of the database file to memory map. If None sqlite's
+                                   default is used
+        timeout (int or float, optional): seconds to wait for a lock held by another connection before raising
+        snapshot_directory (str, optional): directory to read snapshots from
+        snapshot_check_interval (int or float, optional): minimum seconds between checks for a new snapshot
+        on_snapshot_swap (callable, optional): called without arguments after switching to a new snapshot
+        kwargs: ignored, accepted so that all connection settings can be passed as they are
+
+    Returns:
+        ThreadLocalConnection or datastore.sqlite.snapshot.SnapshotConnection: connection object, None if database_path
+            is not set or no snapshot is published. A sqlite3.Connection if database_path is ':memory:', as an in
+            memory database only exists in the connection that created it
+    """
+    if snapshot_directory:
+        snapshot_path = snapshot.get_current_snapshot_path(snapshot_directory)
+        if snapshot_path is None or not os.path.exists(snapshot_path):
+            return None
+        return snapshot.SnapshotConnection(snapshot_directory=snapshot_directory, snapshot_path=snapshot_path,
+                                           mmap_size=mmap_size, timeout=timeout,
+                                           check_interval=snapshot_check_interval, on_swap=on_snapshot_swap)
+
+    if not database_path:
+        return None
+
+    if database_path == ':memory:':
+        return _open(database_path=database_path, mmap_size=mmap_size, timeout=timeout)
+    return ThreadLocalConnection(database_path=database_path, mmap_size=mmap_size, timeout=timeout)
+
+
+def _open(database_path, mmap_size=None, timeout=20):
+    connection = sqlite3.connect(database_path, timeout=timeout)
+    connection.execute('PRAGMA journal_mode = WAL')
+    connection.execute('PRAGMA synchronous = NORMAL')
+    if mmap_size is not None:
+        connection.execute('PRAGMA mmap_size = %d' % int(mmap_size))
+    return connection
+
+
+class ThreadLocalConnection(object):
+    """
+    Connection to a sqlite database file with the same execute, executemany and context manager methods as
+    sqlite3.Connection, opening a sqlite3.Connection for every thread on its first statement. A sqlite3.Connection
+    can not be shared by threads, the statements, open cursors and transactions of one thread would mix with those
+    of another. Connections of a thread are closed once the thread exits.
+
+    Attributes:
+        database_path (str): path of the sqlite database file
+    """
+
+    def __init__(self, database_path, mmap_size=None, timeout=20):
+        """
+        Args:
+            database_path (str): path of the sqlite database file
+            mmap_size (int, optional): maximum number of bytes of the database file to memory map
+            timeout (int or float, optional): seconds to wait for a lock held by another connection before raising
+        """
+        self.database_path = database_path
+        self._mmap_size = mmap_size
+        self._timeout = timeout
+        self._local = threading.local()
+        # Open the connection of the calling thread right away, so that errors are raised on connect
+        self._get_connection()
+
+    def _get_connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = _open(database_path=self.database_path, mmap_size=self._mmap_size,
+                                                        timeout=self._timeout)
+        return connection
+
+    def execute(self, *args):
+        return self._get_connection().execute(*args)
+
+    def executemany(self, *args):
+        return self._get_connection().executemany(*args)
+
+    def __enter__(self):
+        return self._get_connection().__enter__()
+
+    def __exit__(self, *args):
+        return self._get_connection().__exit__(*args)
+
+    def close(self):
+        """
+        Close the connection of the calling thread
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            self._local.connection = None
+            connection.close()
@@ -0,0 +1,85 @@
+from __future__ import absolute_import
+
+log_prefix = 'datastore.sqlite.create'
+
+# entity_records holds one row per (entity, value, language_script) like the elasticsearch documents do,
+# entity_variants, variant_terms and term_deletes are the precomputed search index built from those rows
+SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS entity_records ('
+    ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+    ' entity_data TEXT NOT NULL,'
+    ' dict_type TEXT,'
+    ' value TEXT NOT NULL,'
+    ' variants TEXT NOT NULL,'
+    ' language_script TEXT)',
+    'CREATE INDEX IF NOT EXISTS entity_records_entity_value ON entity_records (entity_data, value)',
+
+    'CREATE TABLE IF NOT EXISTS entity_variants ('
+    ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+    ' record_id INTEGER NOT NULL,'
+    ' entity_data TEXT NOT NULL,'
+    ' variant TEXT NOT NULL,'
+    ' term_count INTEGER NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS entity_variants_record ON entity_variants (record_id)',
+
+    'CREATE TABLE IF NOT EXISTS variant_terms ('
+    ' entity_data TEXT NOT NULL,'
+    ' term TEXT NOT NULL,'
+    ' variant_id INTEGER NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS variant_terms_entity_term ON variant_terms (entity_data, term)',
+    'CREATE INDEX IF NOT EXISTS variant_terms_variant ON variant_terms (variant_id)',
+
+    'CREATE TABLE IF NOT EXISTS term_deletes ('
+    ' entity_data TEXT NOT NULL,'
+    ' key TEXT NOT NULL,'
+    ' term TEXT NOT NULL,'
+    ' PRIMARY KEY (entity_data, key, term)) WITHOUT ROWID',
+]
+
+TABLES = ['entity_records', 'entity_variants', 'variant_terms', 'term_deletes']
+
+
+def create_tables(connection, logger, **kwargs):
+    """
+    Creates the tables and indices needed for storing and fuzzy searching entity data
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        logger: logging object to log at debug and exception level
+    """
+    with connection:
+        for statement in SCHEMA:
+            connection.execute(statement)
+    logger.debug('%s: Create Tables: Operation successfully completed' % log_prefix)
+
+
+def delete_tables(connection, logger, **kwargs):
+    """
+    Drops all tables created by create_tables
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        logger: logging object to log at debug and exception level
+    """
+    try:
+        with connection:
+            for table in TABLES:
+                connection.execute('DROP TABLE IF EXISTS %s' % table)
+        connection.execute('VACUUM')
+        logger.debug('%s: Delete Tables: Operation successfully completed' % log_prefix)
+    except Exception as e:
+        logger.exception('%s: Exception in deleting tables %s ' % (log_prefix, e))
+
+
+def exists(connection):
+    """
+    Checks if all tables exist
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+
+    Returns:
+        boolean, True if all tables exist, False otherwise
+    """
+    rows = connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+    return set(TABLES).issubset(row[0] for row in rows)
@@ -0,0 +1,312 @@
+from __future__ import absolute_import
+
+# std imports
+import json
+import os
+import re
+
+# Local imports
+from datastore.elastic_search.populate import get_variants_dictionary_value_from_key
+from datastore.memory.index import DEFAULT_PREFIX_LENGTH, analyze, deletion_neighbourhood
+from datastore.utils import MAX_EDIT_DISTANCE, get_csv_file_paths, remove_duplicate_data
+from language_utilities.constant import ENGLISH_LANG
+from ner_constants import DICTIONARY_DATA_VARIANTS
+
+log_prefix = 'datastore.sqlite.populate'
+
+_whitespace_pattern = re.compile(r'\s+', re.UNICODE)
+
+
+def get_delete_key(prefix, deleted_suffix):
+    """
+    Key under which a term is stored in the term_deletes table for one entry of its deletion neighbourhood
+
+    Args:
+        prefix (unicode): first DEFAULT_PREFIX_LENGTH characters of the term, these must match exactly
+        deleted_suffix (unicode): rest of the term with some characters deleted
+
+    Returns:
+        unicode: key to store/lookup in term_deletes
+    """
+    return prefix + u'\t' + deleted_suffix
+
+
+def _to_unicode(text):
+    # sqlite3 on python 2 refuses non-ascii byte strings, csv rows are read as utf-8 encoded byte strings there
+    if isinstance(text, bytes):
+        return text.decode('utf-8')
+    return text
+
+
+def _index_terms(connection, entity_name, terms):
+    """
+    Add deletion neighbourhood keys of terms not yet known for entity_name to term_deletes
+    """
+    rows = []
+    for term in terms:
+        prefix, suffix = term[:DEFAULT_PREFIX_LENGTH], term[DEFAULT_PREFIX_LENGTH:]
+        rows.extend((entity_name, get_delete_key(prefix, deleted), term)
+                    for deleted in deletion_neighbourhood(suffix, MAX_EDIT_DISTANCE))
+    connection.executemany('INSERT OR IGNORE INTO term_deletes (entity_data, key, term) VALUES (?, ?, ?)', rows)
+
+
+def add_records(connection, entity_name, records):
+    """
+    Insert records of entity_name along with their search index rows in a single transaction
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        entity_name (str): name of the entity the records belong to
+        records (iterable): iterable of dicts with 'dict_type', 'value', 'variants' and 'language_script' keys
+
+    Returns:
+        int: number of records inserted
+    """
+    with connection:
+        return _insert_records(connection=connection, entity_name=entity_name, records=records)
+
+
+def _insert_records(connection, entity_name, records):
+    """
+    Insert records of entity_name along with their search index rows in the current transaction, see add_records
+    """
+    count = 0
+    known_terms = set(row[0] for row in connection.execute(
+        'SELECT DISTINCT term FROM variant_terms WHERE entity_data = ?', (entity_name,)))
+    new_terms = set()
+    for record in records:
+        variants = [_to_unicode(variant) for variant in record.get('variants') or []]
+        cursor = connection.execute(
+            'INSERT INTO entity_records (entity_data, dict_type, value, variants, language_script) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (entity_name, record.get('dict_type'), _to_unicode(record.get('value')), json.dumps(variants),
+             record.get('language_script')))
+        record_id = cursor.lastrowid
+        count += 1
+        for variant in variants:
+            variant = _whitespace_pattern.sub(u' ', variant.strip()) if variant else variant
+            if not variant:
+                continue
+            terms = set(analyze(variant))
+            if not terms:
+                continue
+            cursor = connection.execute(
+                'INSERT INTO entity_variants (record_id, entity_data, variant, term_count) VALUES (?, ?, ?, ?)',
+                (record_id, entity_name, variant, len(terms)))
+            variant_id = cursor.lastrowid
+            connection.executemany('INSERT INTO variant_terms (entity_data, term, variant_id) VALUES (?, ?, ?)',
+                                   [(entity_name, term, variant_id) for term in terms])
+            new_terms.update(terms)
+    _index_terms(connection=connection, entity_name=entity_name, terms=new_terms - known_terms)
+    return count
+
+
+def delete_records(connection, entity_name, values=None):
+    """
+    Delete records of entity_name and their search index rows in a single transaction
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        entity_name (str): name of the entity
+        values (list, optional): only delete records with these values. If None, all records of the entity are
+                                 deleted
+    """
+    with connection:
+        _delete_records(connection=connection, entity_name=entity_name, values=values)
+
+
+def _delete_records(connection, entity_name, values=None):
+    """
+    Delete records of entity_name and their search index rows in the current transaction, see delete_records
+    """
+    if values is None:
+        for table in ('term_deletes', 'variant_terms', 'entity_variants', 'entity_records'):
+            connection.execute('DELETE FROM %s WHERE entity_data = ?' % table, (entity_name,))
+        return
+
+    # Deletion neighbourhood keys of terms that are no longer used by any variant are left in term_deletes,
+    # they only cost a lookup since a term without postings can never match a variant
+    for value in set(_to_unicode(value) for value in values):
+        record_ids = [row[0] for row in connection.execute(
+            'SELECT id FROM entity_records WHERE entity_data = ? AND value = ?', (entity_name, value))]
+        for record_id in record_ids:
+            connection.execute('DELETE FROM variant_terms WHERE variant_id IN '
+                               '(SELECT id FROM entity_variants WHERE record_id = ?)', (record_id,))
+            connection.execute('DELETE FROM entity_variants WHERE record_id = ?', (record_id,))
+            connection.execute('DELETE FROM entity_records WHERE id = ?', (record_id,))
+
+
+def create_all_dictionary_data(connection, logger, entity_data_directory_path=None, csv_file_paths=None, **kwargs):
+    """
+    Loads all entity data from csv files stored at entity_data_directory_path, one file at a time
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        logger: logging object to log at debug and exception level
+        entity_data_directory_path: Optional, Path of the directory containing the entity data csv files.
+                                    Default is None
+        csv_file_paths: Optional, list of file paths to csv files. Default is None
+    """
+    logger.debug('%s: +++ Started: create_all_dictionary_data() +++' % log_prefix)
+    for csv_file_path in get_csv_file_paths(entity_data_directory_path, csv_file_paths):
+        create_dictionary_data_from_file(connection=connection, csv_file_path=csv_file_path, update=False,
+                                         logger=logger)
+    logger.debug('%s: +++ Finished: create_all_dictionary_data() +++' % log_prefix)
+
+
+def recreate_all_dictionary_data(connection, logger, entity_data_directory_path=None, csv_file_paths=None,
+                                 **kwargs):
+    """
+    Re-loads all entity data from csv files stored at entity_data_directory_path, one file at a time
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        logger: logging object to log at debug and exception level
+        entity_data_directory_path: Optional, Path of the directory containing the entity data csv files.
+                                    Default is None
+        csv_file_paths: Optional, list of file paths to csv files. Default is None
+    """
+    logger.debug('%s: +++ Started: recreate_all_dictionary_data() +++' % log_prefix)
+    for csv_file_path in get_csv_file_paths(entity_data_directory_path, csv_file_paths):
+        create_dictionary_data_from_file(connection=connection, csv_file_path=csv_file_path, update=True,
+                                         logger=logger)
+    logger.debug('%s: +++ Finished: recreate_all_dictionary_data() +++' % log_prefix)
+
+
+def create_dictionary_data_from_file(connection, csv_file_path, update, logger, **kwargs):
+    """
+    Loads all entity data from the csv file at path csv_file_path
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        csv_file_path: absolute file path of the csv file to populate entity data from
+        update: boolean, True if this is a update type operation, False if create/index type operation
+        logger: logging object to log at debug and exception level
+    """
+    base_file_name = os.path.basename(csv_file_path)
+    dictionary_key = os.path.splitext(base_file_name)[0]
+
+    if update:
+        delete_entity_by_name(connection=connection, entity_name=dictionary_key, logger=logger)
+    dictionary_value = get_variants_dictionary_value_from_key(csv_file_path=csv_file_path,
+                                                              dictionary_key=dictionary_key, logger=logger)
+    if dictionary_value:
+        add_data(connection=connection, dictionary_key=dictionary_key,
+                 dictionary_value=remove_duplicate_data(dictionary_value), language_script=ENGLISH_LANG,
+                 logger=logger)
+
+
+def add_data(connection, dictionary_key, dictionary_value, language_script, logger, **kwargs):
+    """
+    Adds all entity values and their variants to the database. Entity value and its list of variants are keys and
+    values of dictionary_value parameter generated from the csv file of this entity
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        dictionary_key: file name of the csv file without the extension, also used as the entity name to store values
+                        of this type. Example - 'city'
+        dictionary_value: dictionary, mapping entity value to a list of its variants.
+                            Example - 'New Delhi': ['Delhi', 'new deli', 'New Delhi']
+        language_script (str): Language code of the entity script
+        logger: logging object to log at debug and exception level
+    """
+    records = [{'dict_type': DICTIONARY_DATA_VARIANTS,
+                'value': value,
+                'variants': dictionary_value[value],
+                'language_script': language_script}
+               for value in dictionary_value]
+    count = add_records(connection=connection, entity_name=dictionary_key, records=records)
+    logger.debug('%s: \t++ %s added %d records ++' % (log_prefix, dictionary_key, count))
+
+
+def delete_entity_by_name(connection, entity_name, logger, **kwargs):
+    """
+    Deletes all data of entity named entity_name
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        entity_name (str): name of the entity to delete
+        logger: logging object to log at debug and exception level
+    """
+    delete_records(connection=connection, entity_name=entity_name)
+    logger.debug('%s: \t++ %s Entity deleted ++' % (log_prefix, entity_name))
+
+
+def entity_data_update(connection, entity_data, entity_name, language_script, logger, **kwargs):
+    """
+    Replaces all data of entity_name with entity_data
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        entity_data (list): List of dicts consisting of value and variants.
+        entity_name (str): Name of the dictionary
+        language_script (str): The code for the language script
+        logger: logging object to log at debug and exception level
+    """
+    delete_entity_by_name(connection=connection, entity_name=entity_name, logger=logger)
+    if entity_data:
+        dictionary_value = {}
+        for temp_dict in entity_data:
+            dictionary_value[temp_dict['value']] = temp_dict['variants']
+        add_data(connection=connection, dictionary_key=entity_name, dictionary_value=dictionary_value,
+                 language_script=language_script, logger=logger)
+
+
+def delete_entity_data_by_values(connection, entity_name, values=None, **kwargs):
+    """
+    Deletes entity data for the specific entity depending on the values.
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        entity_name (str): name of the entity for which the data is to be deleted.
+        values (list, optional): List of values for which data is to be deleted.
+            If None, all records are deleted
+    """
+    delete_records(connection=connection, entity_name=entity_name, values=values)
+
+
+def _get_dictionary_records(value_variant_records):
+    """
+    Records of dict_type DICTIONARY_DATA_VARIANTS for dicts with 'value', 'variants' and 'language_script' keys
+    """
+    return [{'dict_type': DICTIONARY_DATA_VARIANTS,
+             'value': record.get('value'),
+             'variants': record.get('variants'),
+             'language_script': record.get('language_script')}
+            for record in value_variant_records]
+
+
+def add_entity_data(connection, entity_name, value_variant_records, **kwargs):
+    """
+    Save entity data in the database for the records
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        entity_name (str): name of the entity for which the data is to be created
+        value_variant_records (list): List of dicts to be created.
+            Sample Dict: {'value': 'value', 'language_script': 'en', variants': ['variant 1', 'variant 2']}
+    """
+    records = _get_dictionary_records(value_variant_records)
+    add_records(connection=connection, entity_name=entity_name, records=records)
+
+
+def upsert_entity_data(connection, entity_name, value_variant_records, values_to_delete=None, replace=False, **kwargs):
+    """
+    Write records in place of all existing records of their values and delete all records of values_to_delete, in a
+    single transaction so that readers see either the old or the new records of a value
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        entity_name (str): name of the entity
+        value_variant_records (list): List of dicts to be written.
+            Sample Dict: {'value': 'value', 'language_script': 'en', variants': ['variant 1', 'variant 2']}
+        values_to_delete (list, optional): values whose records are deleted in all languages
+        replace (bool, optional): if True, all other records of the entity are deleted as well. Defaults to False
+    """
+    values = None
+    if not replace:
+        values = set(values_to_delete or []) | set(record.get('value') for record in value_variant_records)
+    records = _get_dictionary_records(value_variant_records)
+    with connection:
+        _delete_records(connection=connection, entity_name=entity_name, values=values)
+        _insert_records(connection=connection, entity_name=entity_name, records=records)
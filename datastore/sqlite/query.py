@@ -0,0 +1,287 @@
+from __future__ import absolute_import
+
+# std imports
+import bisect
+import collections
+import json
+
+# Local imports
+from datastore.memory.index import DEFAULT_PREFIX_LENGTH, analyze, deletion_neighbourhood
+from datastore.sqlite.populate import get_delete_key
+from datastore.utils import get_fuzziness_for_token
+from language_utilities.constant import ENGLISH_LANG
+from lib.nlp.levenshtein_distance import edit_distances
+
+log_prefix = 'datastore.sqlite.query'
+
+# Keep the number of bound parameters of a single statement below SQLITE_MAX_VARIABLE_NUMBER of older sqlite builds
+MAX_QUERY_PARAMETERS = 900
+
+
+def _chunks(items, size=MAX_QUERY_PARAMETERS):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _get_records(connection, entity_name):
+    """
+    Yield (id, record) for all records of entity_name in insertion order, record being a dict in the same shape as
+    the _source of documents indexed in elasticsearch
+    """
+    cursor = connection.execute('SELECT id, dict_type, value, variants, language_script FROM entity_records '
+                                'WHERE entity_data = ? ORDER BY id', (entity_name,))
+    for record_id, dict_type, value, variants, language_script in cursor:
+        yield str(record_id), {'entity_data': entity_name,
+                               'dict_type': dict_type,
+                               'value': value,
+                               'variants': json.loads(variants),
+                               'language_script': language_script}
+
+
+def dictionary_query(connection, entity_name, **kwargs):
+    """
+    Get all variants data for a entity stored in the sqlite database as a dictionary
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        entity_name (str): name of the entity
+
+    Returns:
+        dictionary, mapping entity values to lists containing synonyms/variants of the value
+    """
+    results_dictionary = {}
+    for _, record in _get_records(connection, entity_name):
+        results_dictionary[record['value']] = record['variants']
+    return results_dictionary
+
+
+def get_entity_names(connection, **kwargs):
+    """
+    Fetch names of all entities that have at least one record
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+
+    Returns:
+        (list): sorted list of entity names
+    """
+    cursor = connection.execute('SELECT DISTINCT entity_data FROM entity_records ORDER BY entity_data')
+    return [row[0] for row in cursor]
+
+
+def get_entity_supported_languages(connection, entity_name, **kwargs):
+    """
+    Fetch languages supported by a specific entity
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        entity_name (str): name of the entity for which the language codes are to be fetched
+
+    Returns:
+        (list): List of language codes supported by this entity
+    """
+    cursor = connection.execute('SELECT language_script FROM entity_records WHERE entity_data = ? '
+                                'GROUP BY language_script ORDER BY MIN(id)', (entity_name,))
+    return [row[0] for row in cursor]
+
+
+def get_entity_data(connection, entity_name, values=None, **kwargs):
+    """
+    Fetches entity data for the specific entity in the same shape as elasticsearch hits
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        entity_name (str): name of the entity for which the data is to be fetched
+        values (list, optional): List of values for which data is to be fetched. If None, all
+                                 records are fetched
+
+    Returns:
+        (list): List of dicts with '_id' and '_source' keys
+    """
+    return list(iter_entity_data(connection=connection, entity_name=entity_name, values=values))
+
+
+def iter_entity_data(connection, entity_name, values=None, **kwargs):
+    """
+    Generator over entity data of the specific entity in the same shape as elasticsearch hits, reading one row at
+    a time from the database
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        entity_name (str): name of the entity for which the data is to be fetched
+        values (list, optional): List of values for which data is to be fetched. If None, all
+                                 records are fetched
+
+    Yields:
+        dict: record with '_id' and '_source' keys
+    """
+    if values is not None:
+        values = set(values)
+    for record_id, record in _get_records(connection, entity_name):
+        if values is None or record.get('value') in values:
+            yield {'_id': record_id, '_source': record}
+
+
+def get_entity_unique_values(connection, entity_name, value_search_term=None, variant_search_term=None,
+                             empty_variants_only=False, **kwargs):
+    """
+    Search for values in entity with filters
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        entity_name (str): name of the entity for which the data is to be fetched
+        value_search_term (str): Filter values with the specific search term
+        variant_search_term (str): Filter variants with the specific search term
+        empty_variants_only (bool): Search for values with empty variants only
+
+    Returns:
+        list: Sorted list of values which match the filters and search criteria
+    """
+    value_search_term = value_search_term.lower() if value_search_term else None
+    variant_search_terms = None
+    if variant_search_term and not empty_variants_only:
+        variant_search_terms = set(analyze(variant_search_term))
+
+    # Values of records with a variant containing any of the search terms, looked up from the term index
+    variant_matched_values = set()
+    if variant_search_terms:
+        for chunk in _chunks(variant_search_terms):
+            cursor = connection.execute(
+                'SELECT DISTINCT r.value FROM variant_terms t '
+                'JOIN entity_variants v ON v.id = t.variant_id '
+                'JOIN entity_records r ON r.id = v.record_id '
+                'WHERE t.entity_data = ? AND t.term IN (%s)' % ', '.join('?' * len(chunk)),
+                [entity_name] + chunk)
+            variant_matched_values.update(row[0] for row in cursor)
+
+    values = set()
+    for _, record in _get_records(connection, entity_name):
+        value = record.get('value')
+        variants = [variant for variant in record.get('variants') or [] if variant]
+        if empty_variants_only and variants:
+            continue
+
+        # Same as the 'should' clauses with minimum_should_match 1 in the elasticsearch query
+        if value_search_term or variant_search_terms:
+            value_matched = bool(value_search_term) and value_search_term in value.lower()
+            if not (value_matched or value in variant_matched_values):
+                continue
+
+        values.add(value)
+
+    return sorted(values)
+
+
+def _similar_terms(connection, entity_name, query_term, max_edits):
+    """
+    Find indexed terms of entity_name within max_edits edits of query_term using the stored deletion neighbourhoods
+
+    Returns:
+        dict: mapping matched indexed term to its edit distance from query_term
+    """
+    prefix, suffix = query_term[:DEFAULT_PREFIX_LENGTH], query_term[DEFAULT_PREFIX_LENGTH:]
+    keys = [get_delete_key(prefix, deleted) for deleted in deletion_neighbourhood(suffix, max_edits)]
+    candidates = set()
+    for chunk in _chunks(keys):
+        cursor = connection.execute('SELECT DISTINCT term FROM term_deletes WHERE entity_data = ? AND key IN (%s)'
+                                    % ', '.join('?' * len(chunk)), [entity_name] + chunk)
+        candidates.update(row[0] for row in cursor)
+
+    candidates = list(candidates)
+    distances = edit_distances(query=query_term, candidates=candidates, substitution_cost=1,
+                               max_distance=max_edits + 1)
+    return dict((term, distance) for term, distance in zip(candidates, distances) if distance <= max_edits)
+
+
+def _search(connection, entity_name, text, fuzziness_threshold, language_scripts=None):
+    """
+    Find variants of entity_name all of whose terms fuzzy match some term in text, ranked the same way as
+    datastore.memory.index.VariantIndex.search
+
+    Returns:
+        collections.OrderedDict: mapping matched variants to their entity values ordered by relevance
+    """
+    matched_terms = {}
+    for query_term in set(analyze(text)):
+        max_edits = get_fuzziness_for_token(fuzziness_threshold, query_term)
+        for term, distance in _similar_terms(connection, entity_name, query_term, max_edits).items():
+            if term not in matched_terms or distance < matched_terms[term]:
+                matched_terms[term] = distance
+
+    # variant id -> [variant, value, language_script, term_count, matched term count, edits]
+    candidates = {}
+    for chunk in _chunks(matched_terms):
+        cursor = connection.execute(
+            'SELECT v.id, v.variant, r.value, r.language_script, v.term_count, t.term FROM variant_terms t '
+            'JOIN entity_variants v ON v.id = t.variant_id '
+            'JOIN entity_records r ON r.id = v.record_id '
+            'WHERE t.entity_data = ? AND t.term IN (%s)' % ', '.join('?' * len(chunk)),
+            [entity_name] + chunk)
+        for variant_id, variant, value, language_script, term_count, term in cursor:
+            candidate = candidates.setdefault(variant_id, [variant, value, language_script, term_count, 0, 0])
+            candidate[4] += 1
+            candidate[5] += matched_terms[term]
+
+    scored = []
+    for variant_id, (variant, value, language_script, term_count, matched_count, edits) in candidates.items():
+        if language_scripts is not None and language_script not in language_scripts:
+            continue
+        if matched_count != term_count:
+            continue
+        scored.append((-term_count, edits, variant_id, variant, value))
+    scored.sort()
+
+    variants_to_values = collections.OrderedDict()
+    for _, _, _, variant, value in scored:
+        if variant not in variants_to_values:
+            variants_to_values[variant] = value
+    return variants_to_values
+
+
+def get_entity_unique_values_page(connection, entity_name, size, after=None, **kwargs):
+    """
+    Fetch one page of the sorted unique values of entity matching the filters of get_entity_unique_values
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        entity_name (str): name of the entity for which the data is to be fetched
+        size (int): maximum number of values to fetch
+        after (str, optional): fetch values sorted after this value. If None, the first page is fetched
+        kwargs: filters, see get_entity_unique_values
+
+    Returns:
+        tuple: sorted list of values, and the value to pass as after to fetch the next page, None on the last page
+    """
+    values = get_entity_unique_values(connection=connection, entity_name=entity_name, **kwargs)
+    if after is not None:
+        values = values[bisect.bisect_right(values, after):]
+    values = values[:size]
+    next_after = values[-1] if values and len(values) >= size else None
+    return values, next_after
+
+
+def full_text_query(connection, entity_name, sentences, fuzziness_threshold, search_language_script=None, **kwargs):
+    """
+    Fuzzy search variants of entity_name in each of the sentences, the sqlite counterpart of
+    datastore.elastic_search.query.full_text_query
+
+    Args:
+        connection (sqlite3.Connection): connection to the sqlite database
+        entity_name (str): name of the entity to search variants of
+        sentences (list of strings): sentences in which entity has to be searched
+        fuzziness_threshold (int or str): same as 'fuzziness' parameter of elasticsearch match query
+        search_language_script (str, optional): language of records which are eligible for match, records in
+                                                english are always eligible
+
+    Returns:
+        list of collections.OrderedDict: list of dictionaries mapping matched variants to their entity values
+                                         ordered by relevance
+    """
+    language_scripts = None
+    if search_language_script is not None:
+        language_scripts = {search_language_script, ENGLISH_LANG}
+
+    return [_search(connection=connection, entity_name=entity_name, text=sentence,
+                    fuzziness_threshold=fuzziness_threshold, language_scripts=language_scripts)
+            for sentence in sentences]
@@ -0,0 +1,201 @@
+from __future__ import absolute_import
+
+# std imports
+import datetime
+import os
+import sqlite3
+import threading
+import time
+
+# Local imports
+from chatbot_ner.config import ner_logger
+from datastore.sqlite.create import create_tables
+from datastore.sqlite.populate import add_records
+
+log_prefix = 'datastore.sqlite.snapshot'
+
+# File in the snapshot directory holding the file name of the snapshot to use, replaced atomically on every build
+CURRENT_FILE_NAME = 'CURRENT'
+SNAPSHOT_FILE_PREFIX = 'entity_data-'
+SNAPSHOT_FILE_SUFFIX = '.sqlite3'
+
+
+def get_current_snapshot_path(snapshot_directory):
+    """
+    Args:
+        snapshot_directory (str): directory snapshots are built in
+
+    Returns:
+        str: path of the snapshot listed in the CURRENT file of snapshot_directory, None if there is none yet
+    """
+    try:
+        with open(os.path.join(snapshot_directory, CURRENT_FILE_NAME)) as current_file:
+            file_name = current_file.read().strip()
+    except (IOError, OSError):
+        return None
+    return os.path.join(snapshot_directory, file_name) if file_name else None
+
+
+def _get_snapshot_file_names(snapshot_directory):
+    return sorted(file_name for file_name in os.listdir(snapshot_directory)
+                  if file_name.startswith(SNAPSHOT_FILE_PREFIX) and file_name.endswith(SNAPSHOT_FILE_SUFFIX))
+
+
+def build_snapshot(snapshot_directory, entity_names, get_records, logger, keep=2):
+    """
+    Write a new snapshot of entity_names in snapshot_directory and make it the current one. The snapshot is a sqlite
+    database in the same format as used by the sqlite engine, i.e. records along with their precomputed fuzzy search
+    index. It is written to a temporary file that is renamed once complete, and then published by atomically
+    replacing the CURRENT file, so processes reading snapshots never see a partially written one.
+
+    Args:
+        snapshot_directory (str): directory to build the snapshot in, created if it does not exist
+        entity_names (iterable): names of the entities to include
+        get_records (callable): called with an entity name, returns an iterable of its records as dicts with
+                                'dict_type', 'value', 'variants' and 'language_script' keys
+        logger: logging object to log at debug and exception level
+        keep (int, optional): number of most recent snapshots to keep, older ones are deleted. Processes still reading
+                              a deleted snapshot keep reading it until they switch to the current one. Defaults to 2
+
+    Returns:
+        str: path of the new snapshot
+    """
+    if not os.path.isdir(snapshot_directory):
+        os.makedirs(snapshot_directory)
+
+    version = datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+    file_name = SNAPSHOT_FILE_PREFIX + version + SNAPSHOT_FILE_SUFFIX
+    snapshot_path = os.path.join(snapshot_directory, file_name)
+    temporary_path = snapshot_path + '.tmp'
+
+    # No journal is needed for a file that is thrown away if the build fails
+    connection = sqlite3.connect(temporary_path)
+    try:
+        connection.execute('PRAGMA journal_mode = OFF')
+        connection.execute('PRAGMA synchronous = OFF')
+        create_tables(connection=connection, logger=logger)
+        for entity_name in entity_names:
+            count = add_records(connection=connection, entity_name=entity_name, records=get_records(entity_name))
+            logger.debug('%s: \t++ %s added %d records ++' % (log_prefix, entity_name, count))
+        connection.execute('ANALYZE')
+        connection.execute('PRAGMA journal_mode = DELETE')
+        connection.execute('VACUUM')
+    except Exception:
+        connection.close()
+        os.remove(temporary_path)
+        raise
+    connection.close()
+    os.rename(temporary_path, snapshot_path)
+
+    temporary_current_path = os.path.join(snapshot_directory, CURRENT_FILE_NAME + '.tmp')
+    with open(temporary_current_path, 'w') as current_file:
+        current_file.write(file_name)
+    os.rename(temporary_current_path, os.path.join(snapshot_directory, CURRENT_FILE_NAME))
+    logger.debug('%s: snapshot %s published' % (log_prefix, snapshot_path))
+
+    for old_file_name in _get_snapshot_file_names(snapshot_directory)[:-keep or None]:
+        if old_file_name != file_name:
+            os.remove(os.path.join(snapshot_directory, old_file_name))
+    return snapshot_path
+
+
+class SnapshotConnection(object):
+    """
+    Read only connection to the current snapshot of a snapshot directory, with the same execute and executemany
+    methods as sqlite3.Connection so that it can be used in place of one by datastore.sqlite.query
+
+    The snapshot file is memory mapped, so every process on a host reading it shares the same pages of the OS page
+    cache and its resident memory does not grow with the size of entity data. At most once every check_interval
+    seconds the CURRENT file is read and, if a new snapshot was published, later statements run against it. Statements
+    already running keep using the previous snapshot. Like datastore.sqlite.connect.ThreadLocalConnection, every thread
+    opens its own sqlite3.Connection to the snapshot in use.
+
+    Attributes:
+        snapshot_directory (str): directory snapshots are built in
+        snapshot_path (str): path of the snapshot in use
+    """
+
+    def __init__(self, snapshot_directory, snapshot_path, mmap_size=None, timeout=20, check_interval=5,
+                 on_swap=None, timer=time.time):
+        """
+        Args:
+            snapshot_directory (str): directory snapshots are built in
+            snapshot_path (str): path of the snapshot to open first
+            mmap_size (int, optional): maximum number of bytes of the snapshot file to memory map
+            timeout (int or float, optional): seconds to wait for a lock before raising
+            check_interval (int or float, optional): minimum seconds between checks for a new snapshot
+            on_swap (callable, optional): called without arguments after switching to a new snapshot
+            timer (callable, optional): function returning current time in seconds
+        """
+        self.snapshot_directory = snapshot_directory
+        self.snapshot_path = snapshot_path
+        self._mmap_size = mmap_size
+        self._timeout = timeout
+        self._check_interval = check_interval
+        self._on_swap = on_swap
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._next_check_at = timer() + check_interval
+        self._local = threading.local()
+        self._get_connection()
+
+    def _open(self, snapshot_path):
+        connection = sqlite3.connect(snapshot_path, timeout=self._timeout)
+        connection.execute('PRAGMA query_only = ON')
+        if self._mmap_size is not None:
+            connection.execute('PRAGMA mmap_size = %d' % int(self._mmap_size))
+        return connection
+
+    def _get_connection(self):
+        snapshot_path = self.snapshot_path
+        if getattr(self._local, 'snapshot_path', None) != snapshot_path:
+            # The previous connection of this thread is closed once statements still using it are garbage collected
+            self._local.connection, self._local.snapshot_path = self._open(snapshot_path), snapshot_path
+        return self._local.connection
+
+    def _check_for_new_snapshot(self):
+        now = self._timer()
+        if now < self._next_check_at:
+            return
+        with self._lock:
+            if now < self._next_check_at:
+                return
+            self._next_check_at = now + self._check_interval
+            snapshot_path = get_current_snapshot_path(self.snapshot_directory)
+            if snapshot_path is None or snapshot_path == self.snapshot_path or not os.path.exists(snapshot_path):
+                return
+            try:
+                connection = self._open(snapshot_path)
+            except sqlite3.Error as e:
+                ner_logger.exception('%s: failed to open snapshot %s, still using %s: %s'
+                                     % (log_prefix, snapshot_path, self.snapshot_path, e))
+                return
+            # Other threads open their own connection to the new snapshot on their next statement
+            self._local.connection, self._local.snapshot_path = connection, snapshot_path
+            self.snapshot_path = snapshot_path
+        ner_logger.info('%s: switched to snapshot %s' % (log_prefix, snapshot_path))
+        if self._on_swap is not None:
+            self._on_swap()
+
+    def execute(self, *args):
+        self._check_for_new_snapshot()
+        return self._get_connection().execute(*args)
+
+    def executemany(self, *args):
+        self._check_for_new_snapshot()
+        return self._get_connection().executemany(*args)
+
+    def __enter__(self):
+        return self._get_connection().__enter__()
+
+    def __exit__(self, *args):
+        return self._get_connection().__exit__(*args)
+
+    def close(self):
+        """
+        Close the connection of the calling thread
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            self._local.connection = self._local.snapshot_path = None
+            connection.close()
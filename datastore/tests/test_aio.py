@@ -0,0 +1,62 @@
+from __future__ import absolute_import
+
+import threading
+import unittest
+
+import mock
+import six
+from django.test import TestCase
+
+
+class FakeDataStore(object):
+    def __init__(self):
+        self.thread_names = []
+
+    def get_similar_dictionary(self, entity_name, texts, fuzziness_threshold, search_language_script=None):
+        self.thread_names.append(threading.current_thread().name)
+        if entity_name == 'missing':
+            raise ValueError(entity_name)
+        return [{'delhi': 'New Delhi'} for _ in texts]
+
+    def iter_entity_data(self, entity_name):
+        yield {}
+
+
+@unittest.skipIf(six.PY2, 'datastore.aio needs python 3')
+class AsyncDataStoreTest(TestCase):
+    def setUp(self):
+        import asyncio
+        from datastore.aio import AsyncDataStore
+        self.datastore = FakeDataStore()
+        with mock.patch('datastore.aio.DataStore', return_value=self.datastore):
+            self.async_datastore = AsyncDataStore(max_workers=2)
+        self.async_datastore._datastore = self.datastore
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        import asyncio
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def test_calls_run_on_thread_pool(self):
+        import asyncio
+        futures = [self.async_datastore.get_similar_dictionary(entity_name='city', texts=[text], fuzziness_threshold=1)
+                   for text in ['i live in delhi', 'going to delhi']]
+        results = self.loop.run_until_complete(asyncio.gather(*futures))
+
+        self.assertEqual(results, [[{'delhi': 'New Delhi'}], [{'delhi': 'New Delhi'}]])
+        self.assertNotIn(threading.current_thread().name, self.datastore.thread_names)
+
+    def test_chain_propagates_exceptions(self):
+        from datastore.aio import chain
+        future = self.async_datastore.get_similar_dictionary(entity_name='missing', texts=['delhi'],
+                                                             fuzziness_threshold=1)
+        with self.assertRaises(ValueError):
+            self.loop.run_until_complete(chain(future, len))
+
+    def test_private_and_generator_methods_are_not_exposed(self):
+        with self.assertRaises(AttributeError):
+            self.async_datastore._connect
+        with self.assertRaises(AttributeError):
+            self.async_datastore.iter_entity_data
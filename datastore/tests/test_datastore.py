@@ -0,0 +1,135 @@
+from __future__ import absolute_import
+
+import threading
+
+import mock
+from django.test import TestCase
+
+from datastore.constants import ELASTICSEARCH, ELASTICSEARCH_DOC_TYPE, ELASTICSEARCH_INDEX_NAME, ENGINE
+from datastore.datastore import DataStore
+from datastore.tests.test_elastic_search_query import PlanningConnection, RecordingConnection
+
+
+class BlockingConnection(RecordingConnection):
+    """
+    Stands in for elasticsearch.Elasticsearch like RecordingConnection, msearch signals that it started and then
+    waits to be released before answering
+    """
+    def __init__(self):
+        super(BlockingConnection, self).__init__()
+        self.searching = threading.Event()
+        self.release = threading.Event()
+
+    def msearch(self, body, **kwargs):
+        self.searching.set()
+        self.release.wait(5)
+        return super(BlockingConnection, self).msearch(body, **kwargs)
+
+
+def make_datastore(connection, **settings):
+    """
+    Build a DataStore with ENGINE=elasticsearch connected to connection, bypassing the singleton so that every test
+    gets its own caches. Record counts of entities are not fetched unless a test sets large_entity_records of its
+    query planner
+
+    Args:
+        connection: stand in for elasticsearch.Elasticsearch
+        **settings: entries of CHATBOT_NER_DATASTORE to override, e.g. cache_size
+
+    Returns:
+        datastore.datastore.DataStore: the datastore
+    """
+    datastore_settings = {
+        ENGINE: ELASTICSEARCH,
+        ELASTICSEARCH: {ELASTICSEARCH_INDEX_NAME: 'entity_data', ELASTICSEARCH_DOC_TYPE: 'data_dictionary'},
+        'version_poll_interval': None,
+        'exact_match': None,
+    }
+    datastore_settings.update(settings)
+    with mock.patch.dict('datastore.datastore.CHATBOT_NER_DATASTORE', datastore_settings), \
+            mock.patch('datastore.elastic_search.connect.connect', return_value=connection), \
+            mock.patch('datastore.datastore.ELASTICSEARCH_LARGE_ENTITY_RECORDS', 0):
+        datastore = object.__new__(DataStore)
+        datastore.__init__()
+    return datastore
+
+
+class DataStoreQueryPlanTest(TestCase):
+    def test_single_entity_search_is_planned(self):
+        connection = PlanningConnection(entity_records={'city': 500})
+        datastore = make_datastore(connection, cache_size=0)
+        datastore._query_planner.large_entity_records = 100
+        with mock.patch.object(datastore._query_planner, 'plan', wraps=datastore._query_planner.plan) as plan:
+            results = datastore.get_similar_dictionary(entity_name='city', texts=['mumbai'],
+                                                       fuzziness_threshold='auto:4,7')
+        plan.assert_called_once_with('city')
+        self.assertEqual(connection.count_calls, [['city']])
+        self.assertEqual(list(results[0].values()), ['City'])
+        self.assertEqual(datastore.get_query_plan_stats(), {'bounded_fuzzy': 1, 'fuzzy': 0, 'entities': 1})
+
+
+class DataStoreResultCacheTest(TestCase):
+    def setUp(self):
+        self.connection = BlockingConnection()
+        self.datastore = make_datastore(self.connection, cache_size=100)
+
+    def _search_in_thread(self):
+        results = []
+        thread = threading.Thread(target=lambda: results.extend(
+            self.datastore.get_similar_dictionary(entity_name='city', texts=['mumbai'])))
+        thread.start()
+        self.assertTrue(self.connection.searching.wait(5))
+        return thread, results
+
+    def test_result_of_entity_modified_while_searching_not_cached(self):
+        thread, results = self._search_in_thread()
+        self.datastore._entity_modified(['city'])
+        self.connection.release.set()
+        thread.join(5)
+        self.assertEqual(list(results[0].values()), ['City'])
+
+        self.datastore.get_similar_dictionary(entity_name='city', texts=['mumbai'])
+        self.assertEqual(len(self.connection.msearch_calls), 2)
+        self.datastore.get_similar_dictionary(entity_name='city', texts=['mumbai'])
+        self.assertEqual(len(self.connection.msearch_calls), 2)
+
+    def test_result_of_other_entity_cached(self):
+        thread, results = self._search_in_thread()
+        self.datastore._entity_modified(['dish'])
+        self.connection.release.set()
+        thread.join(5)
+
+        self.datastore.get_similar_dictionary(entity_name='city', texts=['mumbai'])
+        self.assertEqual(len(self.connection.msearch_calls), 1)
+
+
+class DataStoreMayMatchTest(TestCase):
+    def test_fuzziness_resolved_like_search(self):
+        datastore = make_datastore(RecordingConnection(), vocabulary_entities=10)
+        records = [{'_id': 'goa', '_source': {'value': 'Goa', 'variants': ['goa']}}]
+        texts = ['goo', 'mumbai']
+        with mock.patch.object(datastore, 'iter_entity_data', side_effect=lambda **kwargs: iter(records)):
+            # Elasticsearch 5 is searched with plain "auto", which allows one edit in three letter terms
+            with mock.patch('datastore.constants.ELASTICSEARCH_VERSION_MAJOR', 5):
+                self.assertEqual(datastore.may_match(entity_name='city', texts=texts, fuzziness_threshold='auto:4,7'),
+                                 [True, False])
+            with mock.patch('datastore.constants.ELASTICSEARCH_VERSION_MAJOR', 6), \
+                    mock.patch('datastore.constants.ELASTICSEARCH_VERSION_MINOR', 2):
+                self.assertEqual(datastore.may_match(entity_name='city', texts=texts, fuzziness_threshold='auto:4,7'),
+                                 [False, False])
+
+    def test_vocabulary_of_entity_modified_while_building_not_cached(self):
+        datastore = make_datastore(RecordingConnection(), vocabulary_entities=10)
+        records = [{'_id': 'goa', '_source': {'value': 'Goa', 'variants': ['goa']}}]
+
+        def iter_entity_data(**kwargs):
+            for record in list(records):
+                yield record
+            if len(records) == 1:
+                # a variant is added after the first build has read the records of the entity
+                records.append({'_id': 'mumbai', '_source': {'value': 'Mumbai', 'variants': ['mumbai']}})
+                datastore._entity_modified(['city'])
+
+        with mock.patch.object(datastore, 'iter_entity_data', side_effect=iter_entity_data):
+            self.assertEqual(datastore.may_match(entity_name='city', texts=['mumbai']), [False])
+            self.assertEqual(datastore.may_match(entity_name='city', texts=['mumbai']), [True])
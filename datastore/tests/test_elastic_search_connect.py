@@ -0,0 +1,28 @@
+from __future__ import absolute_import
+
+import socket
+
+from django.test import TestCase
+from elasticsearch import Elasticsearch
+
+from datastore.elastic_search.connect import PooledHttpConnection, get_connection_stats
+
+
+class ConnectionStatsTest(TestCase):
+    def test_tcp_keepalive(self):
+        connection = PooledHttpConnection(host='localhost', port=9200)
+        self.assertIn((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1), connection.pool.conn_kw['socket_options'])
+        connection = PooledHttpConnection(host='localhost', port=9200, tcp_keepalive=False)
+        self.assertNotIn('socket_options', connection.pool.conn_kw)
+
+    def test_reuse_counters(self):
+        client = Elasticsearch(hosts=[{'host': 'localhost', 'port': 9200}, {'host': 'localhost', 'port': 9201}],
+                               connection_class=PooledHttpConnection, maxsize=4)
+        first, second = [connection.pool for connection in client.transport.connection_pool.connections]
+        self.assertEqual(first.pool.maxsize, 4)
+        first.num_requests, first.num_connections = 10, 2
+        second.num_requests, second.num_connections = 5, 1
+
+        stats = get_connection_stats(client)
+        self.assertEqual((stats['nodes'], stats['requests'], stats['new_connections'], stats['reused_connections']),
+                         (2, 15, 3, 12))
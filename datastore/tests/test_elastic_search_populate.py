@@ -0,0 +1,325 @@
+from __future__ import absolute_import
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import mock
+from django.test import TestCase
+from elasticsearch.serializer import JSONSerializer
+
+from datastore.elastic_search import populate
+
+
+class BulkRecordingConnection(object):
+    """
+    Stands in for elasticsearch.Elasticsearch, records bulk requests and reports every action as successful
+    """
+    class Transport(object):
+        serializer = JSONSerializer()
+
+    transport = Transport()
+
+    def __init__(self):
+        self.bulk_calls = []
+
+    def bulk(self, body, **kwargs):
+        lines = [json.loads(line) for line in body.strip().split('\n')]
+        actions = lines[::2]
+        self.bulk_calls.append(lines[1::2])
+        return {'errors': False, 'items': [{'index': {'status': 201}} for _ in actions]}
+
+
+class PopulateTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.logger = logging.getLogger('PopulateTest')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_variants_read_from_csv(self):
+        csv_file_path = os.path.join(self.directory, 'city.csv')
+        with open(csv_file_path, 'w') as csv_file:
+            csv_file.write('value,variants\nNew Delhi,delhi| new delhi|\nMumbai,bombay\nNew Delhi,dilli\n')
+
+        self.assertEqual(list(populate.iter_variants_from_csv(csv_file_path, 'city', self.logger)),
+                         [('New Delhi', ['delhi', 'new delhi']), ('Mumbai', ['bombay']), ('New Delhi', ['dilli'])])
+        self.assertEqual(dict(populate.get_variants_dictionary_value_from_key(csv_file_path, 'city', self.logger)),
+                         {'New Delhi': ['delhi', 'new delhi', 'dilli'], 'Mumbai': ['bombay']})
+
+    def test_bulk_actions(self):
+        actions = [{'_index': 'entity_data', '_type': 'data_dictionary', '_op_type': 'index', 'value': str(i)}
+                   for i in range(25)]
+        for thread_count in (1, 2):
+            connection = BulkRecordingConnection()
+            result = populate.bulk_actions(connection, iter(actions), thread_count=thread_count, chunk_bytes=200)
+            self.assertEqual(result, (25, 0))
+            self.assertTrue(len(connection.bulk_calls) > 1)
+            self.assertEqual(sorted(int(source['value']) for sources in connection.bulk_calls for source in sources),
+                             list(range(25)))
+
+
+class IndexConnection(BulkRecordingConnection):
+    """
+    Stands in for elasticsearch.Elasticsearch with an in memory index of documents of a single page of hits. Keeps
+    the index and routing each document was written with, a delete with a different index or routing is not found.
+    Like a dynamic mapping, values longer than 256 characters are not indexed in 'value.keyword'
+    """
+    def __init__(self, documents):
+        super(IndexConnection, self).__init__()
+        self.documents = documents
+        self.locations = {}
+        self.delete_by_query_kwargs = []
+
+    def _get_location(self, _id):
+        return self.locations.get(_id, ('entity_data', None))
+
+    def _get_hits(self, entity_name):
+        return [{'_index': self._get_location(_id)[0], '_id': _id, '_source': source}
+                for _id, source in sorted(self.documents.items()) if source['entity_data'] == entity_name]
+
+    def search(self, body, **kwargs):
+        if 'aggs' in body:
+            entity_name = body['query']['bool']['must'][0]['match']['entity_data']
+            languages = sorted(set(hit['_source']['language_script'] for hit in self._get_hits(entity_name)))
+            return {'aggregations': {'unique_values': {'buckets': [{'key': language} for language in languages]}}}
+        if 'bool' in body['query']:
+            # records of long values, a phrase query matches every value containing the phrase
+            query = body['query']['bool']
+            phrases = [should['match_phrase']['value'] for should in query['should']]
+            keep_ids = set(query['must_not'][0]['ids']['values'])
+            hits = [hit for hit in self._get_hits(query['must'][0]['term']['entity_data']['value'])
+                    if hit['_id'] not in keep_ids and any(phrase in hit['_source']['value'] for phrase in phrases)]
+        else:
+            hits = self._get_hits(body['query']['term']['entity_data']['value'])
+        return {'_scroll_id': 'scroll', 'hits': {'total': len(hits), 'hits': hits}}
+
+    def scroll(self, **kwargs):
+        return {'_scroll_id': 'scroll', 'hits': {'total': 0, 'hits': []}}
+
+    def clear_scroll(self, body):
+        pass
+
+    def bulk(self, body, **kwargs):
+        lines = [json.loads(line) for line in body.strip().split('\n')]
+        items = []
+        while lines:
+            action = lines.pop(0)
+            if 'delete' in action:
+                _id = action['delete']['_id']
+                location = (action['delete']['_index'], action['delete'].get('_routing'))
+                found = _id in self.documents and self._get_location(_id) == location
+                if found:
+                    del self.documents[_id]
+                items.append({'delete': {'status': 200 if found else 404}})
+            else:
+                source = lines.pop(0)
+                _id = action['index'].get('_id') or 'new_%d' % len(self.documents)
+                self.documents[_id] = source
+                self.locations[_id] = (action['index']['_index'], action['index'].get('_routing'))
+                items.append({'index': {'status': 201}})
+        return {'errors': any(item.get('delete', {}).get('status') == 404 for item in items), 'items': items}
+
+    def delete_by_query(self, body, **kwargs):
+        self.delete_by_query_kwargs.append(kwargs)
+        must = body['query']['bool']['must']
+        entity_name = must[0]['term']['entity_data']['value']
+        values = set(must[1]['terms']['value.keyword']) if len(must) > 1 else None
+        keep_ids = set(body['query']['bool']['must_not'][0]['ids']['values'])
+        delete_ids = [hit['_id'] for hit in self._get_hits(entity_name)
+                      if hit['_id'] not in keep_ids and (values is None or (hit['_source']['value'] in values and
+                                                                            len(hit['_source']['value']) <= 256))]
+        for _id in delete_ids:
+            del self.documents[_id]
+        return {'deleted': len(delete_ids)}
+
+
+class SyncDictionaryDataTest(TestCase):
+    def test_only_changed_records_written(self):
+        logger = logging.getLogger('SyncDictionaryDataTest')
+        documents = {}
+        connection = IndexConnection(documents)
+        populate.add_data_elastic_search(connection, index_name='entity_data', doc_type='data_dictionary',
+                                         dictionary_key='city', dictionary_value={'Delhi': ['delhi', 'dilli'],
+                                                                                  'Pune': ['pune']},
+                                         language_script='en', logger=logger)
+        documents['hindi'] = {'entity_data': 'city', 'value': 'Delhi', 'language_script': 'hi', 'variants': []}
+        documents['other'] = {'entity_data': 'dish', 'value': 'Dosa', 'language_script': 'en', 'variants': []}
+
+        result = populate.sync_dictionary_data(connection, index_name='entity_data', doc_type='data_dictionary',
+                                               dictionary_key='city',
+                                               dictionary_value={'Delhi': ['dilli', 'delhi'], 'Mumbai': ['bombay']},
+                                               language_script='en', logger=logger)
+        self.assertEqual(result, (1, 2, 1))
+        self.assertEqual(sorted((source['entity_data'], source['value'], source['language_script'])
+                                for source in documents.values()),
+                         [('city', 'Delhi', 'en'), ('city', 'Mumbai', 'en'), ('dish', 'Dosa', 'en')])
+
+
+class UpsertEntityDataTest(TestCase):
+    def setUp(self):
+        self.documents = {}
+        self.connection = IndexConnection(self.documents)
+        records = [{'value': 'Delhi', 'variants': ['delhi'], 'language_script': 'en'},
+                   {'value': 'Delhi', 'variants': [], 'language_script': 'hi'},
+                   {'value': 'Pune', 'variants': ['pune'], 'language_script': 'en'},
+                   {'value': 'Goa', 'variants': ['goa'], 'language_script': 'en'}]
+        populate.add_entity_data(self.connection, index_name='entity_data', doc_type='data_dictionary',
+                                 entity_name='city', value_variant_records=records)
+        self.documents['other'] = {'entity_data': 'dish', 'value': 'Dosa', 'language_script': 'en', 'variants': []}
+
+    def _get_records(self):
+        return sorted((source['entity_data'], source['value'], source['language_script'], source['variants'])
+                      for source in self.documents.values())
+
+    def test_records_overwritten_in_place(self):
+        populate.upsert_entity_data(self.connection, index_name='entity_data', doc_type='data_dictionary',
+                                    entity_name='city',
+                                    value_variant_records=[{'value': 'Delhi', 'variants': ['dilli'],
+                                                            'language_script': 'en'},
+                                                           {'value': 'Mumbai', 'variants': ['bombay'],
+                                                            'language_script': 'en'}],
+                                    values_to_delete=['Goa', 'Chennai'])
+        self.assertEqual(self._get_records(), [('city', 'Delhi', 'en', ['dilli']),
+                                               ('city', 'Mumbai', 'en', ['bombay']),
+                                               ('city', 'Pune', 'en', ['pune']),
+                                               ('dish', 'Dosa', 'en', [])])
+
+    def test_records_with_random_ids_deleted(self):
+        # Indexed before documents were keyed by datastore.utils.get_document_id
+        self.documents['random'] = {'entity_data': 'city', 'value': 'Pune', 'language_script': 'en',
+                                    'variants': ['puna']}
+        populate.upsert_entity_data(self.connection, index_name='entity_data', doc_type='data_dictionary',
+                                    entity_name='city',
+                                    value_variant_records=[{'value': 'Pune', 'variants': ['poona'],
+                                                            'language_script': 'en'}])
+        self.assertEqual(self._get_records(), [('city', 'Delhi', 'en', ['delhi']),
+                                               ('city', 'Delhi', 'hi', []),
+                                               ('city', 'Goa', 'en', ['goa']),
+                                               ('city', 'Pune', 'en', ['poona']),
+                                               ('dish', 'Dosa', 'en', [])])
+
+    def test_records_of_long_values_deleted(self):
+        long_value = 'Pune ' * 60
+        self.documents['random'] = {'entity_data': 'city', 'value': long_value, 'language_script': 'en',
+                                    'variants': ['puna']}
+        self.documents['longer'] = {'entity_data': 'city', 'value': long_value + 'East', 'language_script': 'en',
+                                    'variants': ['pune east']}
+        populate.upsert_entity_data(self.connection, index_name='entity_data', doc_type='data_dictionary',
+                                    entity_name='city',
+                                    value_variant_records=[{'value': long_value, 'variants': ['poona'],
+                                                            'language_script': 'en'}],
+                                    values_to_delete=['Goa'])
+        self.assertEqual(self._get_records(), [('city', 'Delhi', 'en', ['delhi']),
+                                               ('city', 'Delhi', 'hi', []),
+                                               ('city', 'Pune', 'en', ['pune']),
+                                               ('city', long_value, 'en', ['poona']),
+                                               ('city', long_value + 'East', 'en', ['pune east']),
+                                               ('dish', 'Dosa', 'en', [])])
+
+    def test_replace(self):
+        populate.upsert_entity_data(self.connection, index_name='entity_data', doc_type='data_dictionary',
+                                    entity_name='city',
+                                    value_variant_records=[{'value': 'Pune', 'variants': ['poona'],
+                                                            'language_script': 'en'}],
+                                    replace=True)
+        self.assertEqual(self._get_records(), [('city', 'Pune', 'en', ['poona']), ('dish', 'Dosa', 'en', [])])
+
+
+class DeleteByQueryConnection(object):
+    """
+    Stands in for elasticsearch.Elasticsearch, runs delete by query requests as a task completing on the second check
+    """
+    class Tasks(object):
+        def __init__(self):
+            self.checks = 0
+
+        def get(self, task_id):
+            self.checks += 1
+            status = {'total': 5, 'deleted': 2 if self.checks == 1 else 5}
+            if self.checks == 1:
+                return {'completed': False, 'task': {'status': status}}
+            return {'completed': True, 'task': {'status': status}, 'response': {'deleted': 5, 'failures': []}}
+
+    def __init__(self):
+        self.tasks = self.Tasks()
+        self.requests = []
+
+    def delete_by_query(self, **kwargs):
+        self.requests.append(kwargs)
+        return {'task': 'node:1'}
+
+
+class DeleteEntityByNameTest(TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger('DeleteEntityByNameTest')
+
+    def test_streamed_bulk_delete(self):
+        documents = {}
+        connection = IndexConnection(documents)
+        populate.add_data_elastic_search(connection, index_name='entity_data', doc_type='data_dictionary',
+                                         dictionary_key='city',
+                                         dictionary_value={'Delhi': ['delhi'], 'Pune': ['pune']},
+                                         language_script='en', logger=self.logger)
+        documents['other'] = {'entity_data': 'dish', 'value': 'Dosa', 'language_script': 'en', 'variants': []}
+
+        deleted = populate.delete_entity_by_name(connection, index_name='entity_data', doc_type='data_dictionary',
+                                                 entity_name='city', logger=self.logger, slices=0)
+        self.assertEqual(deleted, 2)
+        self.assertEqual(list(documents), ['other'])
+
+    def test_sliced_delete_by_query(self):
+        connection = DeleteByQueryConnection()
+        with mock.patch('datastore.elastic_search.populate.time.sleep'):
+            deleted = populate.delete_entity_by_name(connection, index_name='entity_data', doc_type='data_dictionary',
+                                                     entity_name='city', logger=self.logger, slices=4,
+                                                     request_timeout=30)
+        self.assertEqual(deleted, 5)
+        self.assertEqual(connection.tasks.checks, 2)
+        request = connection.requests[0]
+        self.assertEqual((request['slices'], request['wait_for_completion'], request['request_timeout']),
+                         (4, False, 30))
+        self.assertEqual(request['body']['query'], {'term': {'entity_data': {'value': 'city'}}})
+
+
+class PartitionedWritesTest(TestCase):
+    def setUp(self):
+        self.logger = logging.getLogger('PartitionedWritesTest')
+        self.documents = {}
+        self.connection = IndexConnection(self.documents)
+        patchers = [mock.patch('datastore.constants.ELASTICSEARCH_ROUTE_BY_ENTITY', True),
+                    mock.patch('datastore.constants.ELASTICSEARCH_LANGUAGE_INDICES', ('en', 'hi'))]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _get_locations(self):
+        return sorted((source['value'], source['language_script']) + self.connection.locations[_id]
+                      for _id, source in self.documents.items())
+
+    def test_documents_written_and_deleted_in_their_index_and_shard(self):
+        populate.upsert_entity_data(self.connection, index_name='entity_data', doc_type='data_dictionary',
+                                    entity_name='city',
+                                    value_variant_records=[{'value': 'Delhi', 'variants': ['delhi'],
+                                                            'language_script': 'en'},
+                                                           {'value': 'Delhi', 'variants': [u'dilli'],
+                                                            'language_script': 'hi'},
+                                                           {'value': 'Pune', 'variants': ['pune'],
+                                                            'language_script': 'mr'}])
+        self.assertEqual(self._get_locations(), [('Delhi', 'en', 'entity_data_en', 'city'),
+                                                 ('Delhi', 'hi', 'entity_data_hi', 'city'),
+                                                 ('Pune', 'mr', 'entity_data_other', 'city')])
+
+        populate.upsert_entity_data(self.connection, index_name='entity_data', doc_type='data_dictionary',
+                                    entity_name='city', value_variant_records=[], values_to_delete=['Delhi'])
+        self.assertEqual(self._get_locations(), [('Pune', 'mr', 'entity_data_other', 'city')])
+        self.assertEqual(self.connection.delete_by_query_kwargs[-1]['routing'], 'city')
+
+        deleted = populate.delete_entity_by_name(self.connection, index_name='entity_data',
+                                                 doc_type='data_dictionary', entity_name='city', logger=self.logger,
+                                                 slices=0)
+        self.assertEqual(deleted, 1)
+        self.assertEqual(self.documents, {})
@@ -0,0 +1,276 @@
+from __future__ import absolute_import
+
+import json
+
+import mock
+from django.test import TestCase
+
+from datastore.cache import HighlightCache
+from datastore.elastic_search import query
+
+
+class RecordingConnection(object):
+    """
+    Stands in for elasticsearch.Elasticsearch, records msearch calls and answers every search with one hit
+    highlighting the searched entity name
+    """
+    def __init__(self):
+        self.msearch_calls = []
+        self.msearch_kwargs = []
+
+    def msearch(self, body, **kwargs):
+        self.msearch_calls.append(body)
+        self.msearch_kwargs.append(kwargs)
+        searches = [json.loads(line) for line in body.split('\n')][1::2]
+        responses = []
+        for search in searches:
+            entity_name = search['query']['bool']['must'][0]['term']['entity_data']['value']
+            hit = {'_source': {'value': entity_name.title()}, 'highlight': {'variants': ['<em>%s</em>' % entity_name]}}
+            responses.append({'hits': {'total': 1, 'hits': [hit]}})
+        return {'responses': responses}
+
+
+class FullTextQueryMultiTest(TestCase):
+    def test_single_msearch_for_all_pairs(self):
+        connection = RecordingConnection()
+        results = query.full_text_query_multi(connection=connection, index_name='entity_data',
+                                              doc_type='data_dictionary',
+                                              entity_names_and_sentences=[('city', 'mumbai'), ('dish', 'mumbai'),
+                                                                          ('city', 'pune')],
+                                              fuzziness_threshold=1)
+        self.assertEqual(len(connection.msearch_calls), 1)
+        self.assertEqual([dict(result) for result in results],
+                         [{'city': 'City'}, {'dish': 'Dish'}, {'city': 'City'}])
+
+    def test_slim_response(self):
+        connection = RecordingConnection()
+        for slim_response in (True, False):
+            results = query.full_text_query_multi(connection=connection, index_name='entity_data',
+                                                  doc_type='data_dictionary',
+                                                  entity_names_and_sentences=[('city', 'mumbai')],
+                                                  fuzziness_threshold=1, slim_response=slim_response)
+            self.assertEqual([dict(result) for result in results], [{'city': 'City'}])
+
+        slim_search, full_search = [json.loads(body.split('\n')[1]) for body in connection.msearch_calls]
+        self.assertEqual(slim_search['_source'], ['value'])
+        self.assertIn('responses.hits.hits.highlight.variants', connection.msearch_kwargs[0]['filter_path'])
+        self.assertNotIn('_source', full_search)
+        self.assertNotIn('filter_path', connection.msearch_kwargs[1])
+
+    def test_routing_and_language_indices(self):
+        connection = RecordingConnection()
+        with mock.patch('datastore.constants.ELASTICSEARCH_ROUTE_BY_ENTITY', True), \
+                mock.patch('datastore.constants.ELASTICSEARCH_LANGUAGE_INDICES', ('en', 'hi', 'mr')):
+            query.full_text_query_multi(connection=connection, index_name='entity_data', doc_type='data_dictionary',
+                                        entity_names_and_sentences=[('city', 'mumbai'), ('dish', 'dosa')],
+                                        fuzziness_threshold=1, search_language_script='hi')
+            query.full_text_query_multi(connection=connection, index_name='entity_data', doc_type='data_dictionary',
+                                        entity_names_and_sentences=[('city', 'mumbai')], fuzziness_threshold=1)
+
+        headers = [json.loads(line) for body in connection.msearch_calls for line in body.split('\n')[::2]]
+        self.assertEqual([(header['index'], header['routing']) for header in headers],
+                         [('entity_data_en,entity_data_hi', 'city'), ('entity_data_en,entity_data_hi', 'dish'),
+                          ('entity_data', 'city')])
+
+    def test_no_pairs(self):
+        connection = RecordingConnection()
+        self.assertEqual(query.full_text_query_multi(connection=connection, index_name='entity_data',
+                                                     doc_type='data_dictionary', entity_names_and_sentences=[],
+                                                     fuzziness_threshold=1), [])
+        self.assertEqual(connection.msearch_calls, [])
+
+
+class PlanningConnection(RecordingConnection):
+    """
+    Stands in for elasticsearch.Elasticsearch, answers record count searches with counts of entity_records and
+    other searches like RecordingConnection
+    """
+    def __init__(self, entity_records):
+        super(PlanningConnection, self).__init__()
+        self.entity_records = entity_records
+        self.count_calls = []
+
+    def msearch(self, body, **kwargs):
+        searches = [json.loads(line) for line in body.split('\n')][1::2]
+        if 'term' not in searches[0]['query']:
+            return super(PlanningConnection, self).msearch(body, **kwargs)
+        entity_names = [search['query']['term']['entity_data']['value'] for search in searches]
+        self.count_calls.append(entity_names)
+        return {'responses': [{'hits': {'total': self.entity_records.get(entity_name, 0)}}
+                              for entity_name in entity_names]}
+
+
+class QueryPlannerTest(TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        self.connection = PlanningConnection(entity_records={'city': 500, 'dish': 10})
+        self.planner = query.QueryPlanner(large_entity_records=100, max_expansions=5, stats_ttl=60,
+                                          timer=lambda: self.now)
+
+    def _search(self, entity_names_and_sentences, fuzziness_threshold='auto:4,7'):
+        query.full_text_query_multi(connection=self.connection, index_name='entity_data', doc_type='data_dictionary',
+                                    entity_names_and_sentences=entity_names_and_sentences,
+                                    fuzziness_threshold=fuzziness_threshold, planner=self.planner)
+        body = self.connection.msearch_calls[-1]
+        return [json.loads(line)['query']['bool']['should'][0]['match']['variants']
+                for line in body.split('\n')[1::2]]
+
+    def test_plans(self):
+        with mock.patch('datastore.constants.ELASTICSEARCH_VERSION_MAJOR', 5):
+            variants_queries = self._search([('city', 'mumbai'), ('dish', 'dosa')])
+        self.assertEqual(self.connection.count_calls, [['city', 'dish']])
+        self.assertEqual(variants_queries[0]['max_expansions'], 5)
+        self.assertNotIn('max_expansions', variants_queries[1])
+        self.assertEqual(variants_queries[1]['fuzziness'], 'auto')
+        self.assertEqual(self.planner.get_stats(), {'bounded_fuzzy': 1, 'fuzzy': 1, 'entities': 2})
+        self.assertEqual(self.planner.get_entity_stats('city'), {'records': 500, 'plan': 'bounded_fuzzy'})
+
+    def test_entity_stats_expire(self):
+        self._search([('city', 'mumbai')])
+        self._search([('city', 'pune')], fuzziness_threshold=0)
+        self.assertEqual(self.connection.count_calls, [['city']])
+
+        self.now += 61
+        self.connection.entity_records['city'] = 50
+        self._search([('city', 'mumbai')])
+        self.planner.invalidate_entity('city')
+        self._search([('city', 'mumbai')])
+        self.assertEqual(self.connection.count_calls, [['city'], ['city'], ['city']])
+        self.assertEqual(self.planner.get_stats(), {'bounded_fuzzy': 2, 'fuzzy': 2, 'entities': 1})
+
+    def test_disabled(self):
+        self.planner.large_entity_records = 0
+        variants_queries = self._search([('city', 'mumbai')])
+        self.assertEqual(self.connection.count_calls, [])
+        self.assertNotIn('max_expansions', variants_queries[0])
+
+
+class ParseEsSearchResultsTest(TestCase):
+    def setUp(self):
+        hits = [{'_source': {'value': 'New Delhi'},
+                 'highlight': {'variants': ['<em>new</em>  <em>delhi</em>', '<em>delhi</em>']}},
+                {'_source': {'value': 'Delhi Cantonment'},
+                 'highlight': {'variants': ['<em>delhi</em> cantt']}}]
+        self.results_list = [{'hits': {'total': 2, 'hits': hits}}]
+
+    def test_cached_parse_matches_uncached_parse(self):
+        highlight_cache = HighlightCache(max_size=10)
+        expected = [{'new delhi': 'New Delhi', 'delhi': 'New Delhi'}]
+        for _ in range(2):
+            results = query._parse_es_search_results(self.results_list, entity_names=['city'],
+                                                     highlight_cache=highlight_cache)
+            self.assertEqual([dict(result) for result in results], expected)
+        self.assertEqual([dict(result) for result in query._parse_es_search_results(self.results_list)], expected)
+        self.assertEqual(highlight_cache.get_stats()['misses'], 3)
+        self.assertEqual(highlight_cache.get_stats()['hits'], 3)
+
+
+class ScrollingConnection(object):
+    """
+    Stands in for elasticsearch.Elasticsearch, serves hits in pages of `size` through search and scroll calls
+    """
+    def __init__(self, hits):
+        self.hits = hits
+        self.page_requests = 0
+        self.cleared_scroll_ids = []
+
+    def _page(self, start, size):
+        self.page_requests += 1
+        hits = {'total': len(self.hits), 'hits': self.hits[start:start + size]}
+        return {'_scroll_id': 'scroll_%d' % (start + size), 'hits': hits}
+
+    def search(self, size, **kwargs):
+        self.size = size
+        return self._page(0, size)
+
+    def scroll(self, scroll_id, **kwargs):
+        return self._page(int(scroll_id.split('_')[1]), self.size)
+
+    def clear_scroll(self, body):
+        self.cleared_scroll_ids.extend(body['scroll_id'])
+
+
+class ScrollHitsTest(TestCase):
+    def setUp(self):
+        self.hits = [{'_id': str(i), '_source': {'value': 'value %d' % i, 'variants': []}} for i in range(5)]
+
+    def test_all_hits_one_page_at_a_time(self):
+        connection = ScrollingConnection(self.hits)
+        hits = query.scroll_hits(connection, index='entity_data', size=2)
+        self.assertEqual(next(hits), self.hits[0])
+        self.assertEqual(connection.page_requests, 1)
+        self.assertEqual([self.hits[0]] + list(hits), self.hits)
+        self.assertEqual(connection.page_requests, 4)
+        self.assertEqual(connection.cleared_scroll_ids, ['scroll_2', 'scroll_4', 'scroll_6', 'scroll_8'])
+
+    def test_scroll_cleared_when_closed_early(self):
+        connection = ScrollingConnection(self.hits)
+        hits = query.scroll_hits(connection, index='entity_data', size=2)
+        next(hits)
+        hits.close()
+        self.assertEqual(connection.cleared_scroll_ids, ['scroll_2'])
+
+    def test_read_all_pages(self):
+        connection = ScrollingConnection(self.hits)
+        result = query.get_entity_data(connection, index_name='entity_data', doc_type='data_dictionary',
+                                       entity_name='city')
+        self.assertEqual(result, self.hits)
+        self.assertEqual(query.dictionary_query(connection, index_name='entity_data', doc_type='data_dictionary',
+                                                entity_name='city'),
+                         dict(('value %d' % i, []) for i in range(5)))
+
+
+class UniqueValuesConnection(object):
+    """
+    Stands in for elasticsearch.Elasticsearch, answers composite aggregation and collapsed searches over values and
+    counts them with cardinality, which is off by one like an approximate count can be
+    """
+    def __init__(self, values):
+        self.values = sorted(values)
+        self.bodies = []
+
+    def search(self, body, **kwargs):
+        self.bodies.append(body)
+        if 'unique_values_count' in body.get('aggs', {}):
+            return {'aggregations': {'unique_values_count': {'value': len(self.values) - 1}}}
+        if 'aggs' in body:
+            composite = body['aggs']['unique_values']['composite']
+            after = composite.get('after', {}).get('value')
+            values = [value for value in self.values if after is None or value > after][:composite['size']]
+            return {'aggregations': {'unique_values': {'buckets': [{'key': {'value': value}} for value in values]}}}
+        after = None
+        for clause in body['query']['bool'].get('filter', []):
+            after = clause['range']['value.keyword']['gt']
+        values = [value for value in self.values if after is None or value > after][:body['size']]
+        return {'hits': {'hits': [{'sort': [value]} for value in values]}}
+
+
+class UniqueValuesPageTest(TestCase):
+    def _read_all_pages(self, composite):
+        connection = UniqueValuesConnection(['Delhi', 'Goa', 'Mumbai', 'Pune', 'Agra'])
+        with mock.patch('datastore.elastic_search.query._supports_composite_aggregation', return_value=composite):
+            values = list(query.iter_entity_unique_values(connection=connection, index_name='entity_data',
+                                                          doc_type='data_dictionary', entity_name='city',
+                                                          page_size=2))
+        self.assertEqual(values, ['Agra', 'Delhi', 'Goa', 'Mumbai', 'Pune'])
+        self.assertEqual(len(connection.bodies), 3)
+        return connection
+
+    def test_composite_aggregation_pages(self):
+        connection = self._read_all_pages(composite=True)
+        self.assertEqual(connection.bodies[1]['aggs']['unique_values']['composite']['after'], {'value': 'Delhi'})
+
+    def test_collapsed_search_pages(self):
+        connection = self._read_all_pages(composite=False)
+        self.assertEqual(connection.bodies[0]['collapse'], {'field': 'value.keyword'})
+
+    def test_count(self):
+        connection = UniqueValuesConnection(['Delhi', 'Goa', 'Mumbai', 'Pune', 'Agra'])
+        kwargs = dict(connection=connection, index_name='entity_data', doc_type='data_dictionary', entity_name='city')
+        with mock.patch('datastore.elastic_search.query._supports_composite_aggregation', return_value=True):
+            self.assertEqual(query.get_entity_unique_values_count(**kwargs), 4)
+            self.assertEqual(len(connection.bodies), 1)
+
+            # Counted by iterating over the values once the cardinality aggregation may be approximate
+            with mock.patch('datastore.elastic_search.query.UNIQUE_VALUES_PRECISION_THRESHOLD', 8):
+                self.assertEqual(query.get_entity_unique_values_count(**kwargs), 5)
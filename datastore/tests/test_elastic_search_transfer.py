@@ -0,0 +1,69 @@
+from __future__ import absolute_import
+
+import json
+
+import mock
+from django.test import TestCase
+
+from datastore.elastic_search.transfer import ESTransfer
+from datastore.exceptions import ScrollSourceException
+
+TRANSFER_SETTINGS = {'engine': 'elasticsearch',
+                     'elasticsearch': {'es_index_1': 'index_1', 'es_index_2': 'index_2', 'es_alias': 'alias'}}
+
+
+class Response(object):
+    def __init__(self, data):
+        self.content = json.dumps(data)
+
+
+class SlicedScrollSession(object):
+    """
+    Stands in for requests.Session, serves each slice of a sliced scroll two hits per page
+    """
+    def __init__(self, hits_per_slice, failing_page=None):
+        self.hits_per_slice = hits_per_slice
+        self.failing_page = failing_page
+        self.bodies = []
+        self.cleared = []
+
+    def _page(self, slice_id, page):
+        if (slice_id, page) == self.failing_page:
+            return Response({'error': {'type': 'search_context_missing_exception'}, 'status': 404})
+        hits = self.hits_per_slice[slice_id][page * 2:page * 2 + 2]
+        return Response({'_scroll_id': '%d:%d' % (slice_id, page + 1), 'hits': {'hits': hits}})
+
+    def post(self, url, json=None, **kwargs):
+        if url.endswith('/_search/scroll'):
+            slice_id, page = json['scroll_id'].split(':')
+            return self._page(int(slice_id), int(page))
+        self.bodies.append(json)
+        return self._page(json['slice']['id'], 0)
+
+    def delete(self, url, json=None, **kwargs):
+        self.cleared.extend(json['scroll_id'])
+
+
+class IterSourceHitsTest(TestCase):
+    def setUp(self):
+        self.hits_per_slice = [[{'_id': '%d_%d' % (slice_id, i)} for i in range(slice_id + 2)]
+                               for slice_id in range(3)]
+        with mock.patch('datastore.elastic_search.transfer.CHATBOT_NER_DATASTORE', TRANSFER_SETTINGS):
+            self.transfer = ESTransfer(source='http://localhost:9200', destination='http://localhost:9400', slices=3)
+
+    def test_all_slices_scrolled(self):
+        self.transfer._session = SlicedScrollSession(self.hits_per_slice)
+
+        query = {'query': {'terms': {'entity_data': ['city']}}}
+        hits = list(self.transfer._iter_source_hits(query))
+        self.assertEqual(sorted(hit['_id'] for hit in hits),
+                         sorted(hit['_id'] for slice_hits in self.hits_per_slice for hit in slice_hits))
+        self.assertEqual(sorted(body['slice']['id'] for body in self.transfer._session.bodies), [0, 1, 2])
+        self.assertEqual(len(self.transfer._session.cleared), 3)
+        self.assertNotIn('slice', query)
+
+    def test_failed_slice_raised(self):
+        for failing_page in ((1, 0), (2, 1)):
+            self.transfer._session = SlicedScrollSession(self.hits_per_slice, failing_page=failing_page)
+            with self.assertRaises(ScrollSourceException):
+                list(self.transfer._iter_source_hits({'query': {'terms': {'entity_data': ['city']}}}))
@@ -0,0 +1,65 @@
+from __future__ import absolute_import
+
+import mock
+from django.test import TestCase
+
+from datastore.elastic_search import versions
+from datastore.tests.test_elastic_search_populate import BulkRecordingConnection
+
+
+class VersionsConnection(BulkRecordingConnection):
+    """
+    Stands in for elasticsearch.Elasticsearch, keeps a _version per document id of bulk index requests like
+    elasticsearch does and returns them from a scrolled search, `size` hits per page
+    """
+
+    def __init__(self):
+        super(VersionsConnection, self).__init__()
+        self.versions = {}
+        self.search_kwargs = None
+
+    def bulk(self, body, **kwargs):
+        response = super(VersionsConnection, self).bulk(body, **kwargs)
+        for document in self.bulk_calls[-1]:
+            entity_name = document['entity_data']
+            self.versions[entity_name] = self.versions.get(entity_name, 0) + 1
+        return response
+
+    def _page(self, page):
+        hits = [{'_id': entity_name, '_version': version} for entity_name, version in sorted(self.versions.items())]
+        size = self.search_kwargs['size']
+        return {'_scroll_id': str(page + 1), 'hits': {'hits': hits[page * size:(page + 1) * size]}}
+
+    def search(self, **kwargs):
+        self.search_kwargs = kwargs
+        return self._page(0)
+
+    def scroll(self, scroll_id, scroll):
+        return self._page(int(scroll_id))
+
+    def clear_scroll(self, body):
+        pass
+
+
+class EntityVersionsTest(TestCase):
+    def setUp(self):
+        self.connection = VersionsConnection()
+
+    def test_bump_and_get_versions(self):
+        self.assertEqual(versions.get_entity_versions(self.connection, index_name='entity_data_versions'), {})
+        versions.bump_entity_versions(self.connection, index_name='entity_data_versions', doc_type='data_dictionary',
+                                      entity_names=['city', 'city', 'cuisine'])
+        versions.bump_entity_versions(self.connection, index_name='entity_data_versions', doc_type='data_dictionary',
+                                      entity_names=['city'])
+
+        self.assertEqual(versions.get_entity_versions(self.connection, index_name='entity_data_versions'),
+                         {'city': 2, 'cuisine': 1})
+        self.assertTrue(self.connection.search_kwargs['body']['version'])
+        self.assertTrue(self.connection.search_kwargs['ignore_unavailable'])
+
+    def test_all_versions_scrolled(self):
+        versions.bump_entity_versions(self.connection, index_name='entity_data_versions', doc_type='data_dictionary',
+                                      entity_names=['city', 'cuisine', 'dish', 'restaurant', 'locality'])
+        with mock.patch('datastore.constants.ELASTICSEARCH_SEARCH_SIZE', 2):
+            entity_versions = versions.get_entity_versions(self.connection, index_name='entity_data_versions')
+        self.assertEqual(entity_versions, {'city': 1, 'cuisine': 1, 'dish': 1, 'restaurant': 1, 'locality': 1})
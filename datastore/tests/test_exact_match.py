@@ -0,0 +1,38 @@
+# coding=utf-8
+from __future__ import absolute_import
+
+from django.test import TestCase
+
+from datastore.exact_match import ExactMatchIndex
+
+
+class ExactMatchIndexTest(TestCase):
+    def setUp(self):
+        self.index = ExactMatchIndex(records=[
+            {'value': 'New Delhi', 'language_script': 'en', 'variants': ['delhi', 'New  Delhi', '']},
+            {'value': 'Mumbai', 'language_script': 'en', 'variants': ['mumbai', 'bombay']},
+            {'value': 'Mumbai', 'language_script': 'hi', 'variants': [u'मुंबई']},
+            {'value': 'Hot & Crispy', 'language_script': 'en', 'variants': ['hot & crispy']},
+        ])
+
+    def test_longer_variants_first_and_unmatched_tokens(self):
+        variants_to_values, unmatched_text = self.index.search('book a flight from new delhi to bombay')
+        self.assertEqual(list(variants_to_values.items()),
+                         [('New Delhi', 'New Delhi'), ('delhi', 'New Delhi'), ('bombay', 'Mumbai')])
+        self.assertEqual(unmatched_text, 'book a flight from to')
+        self.assertEqual(self.index.max_tokens, 2)
+        self.assertEqual(len(self.index), 6)
+
+    def test_whole_tokens_only(self):
+        variants_to_values, unmatched_text = self.index.search('i want hot crispy from mumbaikar')
+        self.assertEqual(dict(variants_to_values), {'hot & crispy': 'Hot & Crispy'})
+        self.assertEqual(unmatched_text, 'i want from mumbaikar')
+
+    def test_language_scripts(self):
+        variants_to_values, unmatched_text = self.index.search(u'मुंबई mumbai', language_scripts={'en'})
+        self.assertEqual(dict(variants_to_values), {'mumbai': 'Mumbai'})
+        self.assertEqual(unmatched_text, u'मुंबई')
+
+        variants_to_values, unmatched_text = self.index.search(u'मुंबई mumbai', language_scripts={'hi', 'en'})
+        self.assertEqual(list(variants_to_values), [u'मुंबई', 'mumbai'])
+        self.assertEqual(unmatched_text, u'')
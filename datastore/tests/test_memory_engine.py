@@ -0,0 +1,120 @@
+# coding=utf-8
+from __future__ import absolute_import
+
+import threading
+
+import mock
+from django.test import TestCase
+
+from datastore.memory import populate, query
+from datastore.memory.index import VariantIndex
+from datastore.memory.store import MemoryStore
+from datastore.utils import get_fuzziness_for_token
+from chatbot_ner.config import ner_logger
+
+
+class MemoryEngineTest(TestCase):
+    def setUp(self):
+        self.connection = MemoryStore()
+        populate.add_entity_data(connection=self.connection, entity_name='city', value_variant_records=[
+            {'value': 'New Delhi', 'language_script': 'en', 'variants': ['delhi', 'new delhi', '']},
+            {'value': 'Mumbai', 'language_script': 'en', 'variants': ['mumbai', 'bombay']},
+            {'value': 'Bengaluru', 'language_script': 'en', 'variants': ['bangalore', 'bengaluru']},
+            {'value': 'Mumbai', 'language_script': 'hi', 'variants': [u'मुंबई']},
+        ])
+
+    def test_fuzziness_for_token(self):
+        self.assertEqual(get_fuzziness_for_token('auto:4,7', 'goa'), 0)
+        self.assertEqual(get_fuzziness_for_token('auto:4,7', 'delhi'), 1)
+        self.assertEqual(get_fuzziness_for_token('auto:4,7', 'bangalore'), 2)
+        self.assertEqual(get_fuzziness_for_token(5, 'bangalore'), 2)
+        self.assertEqual(get_fuzziness_for_token(1, 'goa'), 1)
+
+    def test_full_text_query_exact_and_fuzzy(self):
+        results = query.full_text_query(connection=self.connection, entity_name='city',
+                                        sentences=['book a flight from new delhi to mumbai',
+                                                   'i live in banglore',
+                                                   'nothing to see here'],
+                                        fuzziness_threshold='auto:4,7')
+        self.assertEqual(len(results), 3)
+        self.assertEqual(list(results[0].keys())[0], 'new delhi')
+        self.assertEqual(results[0]['new delhi'], 'New Delhi')
+        self.assertEqual(results[0]['delhi'], 'New Delhi')
+        self.assertEqual(results[0]['mumbai'], 'Mumbai')
+        self.assertEqual(dict(results[1]), {'bangalore': 'Bengaluru'})
+        self.assertEqual(dict(results[2]), {})
+
+    def test_full_text_query_prefix_must_match(self):
+        results = query.full_text_query(connection=self.connection, entity_name='city',
+                                        sentences=['i live in vangalore'], fuzziness_threshold=2)
+        self.assertEqual(dict(results[0]), {})
+
+    def test_full_text_query_language_script(self):
+        results = query.full_text_query(connection=self.connection, entity_name='city',
+                                        sentences=[u'मुंबई'], fuzziness_threshold=1, search_language_script='hi')
+        self.assertEqual(dict(results[0]), {u'मुंबई': 'Mumbai'})
+
+        results = query.full_text_query(connection=self.connection, entity_name='city',
+                                        sentences=['mumbai'], fuzziness_threshold=1, search_language_script='gu')
+        self.assertEqual(dict(results[0]), {'mumbai': 'Mumbai'})
+
+    def test_multi_token_variant_needs_all_tokens(self):
+        index = VariantIndex(records=[{'value': 'Mainland China', 'language_script': 'en',
+                                       'variants': ['mainland china']}])
+        self.assertEqual(dict(index.search('order from mainland', fuzziness_threshold=1)), {})
+        self.assertEqual(dict(index.search('order from mainland chna', fuzziness_threshold=1)),
+                         {'mainland china': 'Mainland China'})
+
+    def test_read_methods(self):
+        self.assertEqual(set(query.get_entity_supported_languages(connection=self.connection, entity_name='city')),
+                         {'en', 'hi'})
+        self.assertEqual(query.get_entity_unique_values(connection=self.connection, entity_name='city'),
+                         ['Bengaluru', 'Mumbai', 'New Delhi'])
+        self.assertEqual(query.get_entity_unique_values(connection=self.connection, entity_name='city',
+                                                        variant_search_term='bombay'), ['Mumbai'])
+        self.assertEqual(query.get_entity_unique_values(connection=self.connection, entity_name='city',
+                                                        value_search_term='delhi'), ['New Delhi'])
+        self.assertEqual(query.get_entity_unique_values_page(connection=self.connection, entity_name='city', size=2),
+                         (['Bengaluru', 'Mumbai'], 'Mumbai'))
+        self.assertEqual(query.get_entity_unique_values_page(connection=self.connection, entity_name='city', size=2,
+                                                             after='Mumbai'), (['New Delhi'], None))
+        records = query.get_entity_data(connection=self.connection, entity_name='city', values=['Mumbai'])
+        self.assertEqual(len(records), 2)
+        self.assertTrue(all('_id' in record and record['_source']['value'] == 'Mumbai' for record in records))
+
+    def test_writes_invalidate_index(self):
+        sentences = ['going to goa']
+        self.assertEqual(dict(query.full_text_query(connection=self.connection, entity_name='city',
+                                                    sentences=sentences, fuzziness_threshold=1)[0]), {})
+        populate.add_entity_data(connection=self.connection, entity_name='city', value_variant_records=[
+            {'value': 'Goa', 'language_script': 'en', 'variants': ['goa']}])
+        self.assertEqual(dict(query.full_text_query(connection=self.connection, entity_name='city',
+                                                    sentences=sentences, fuzziness_threshold=1)[0]), {'goa': 'Goa'})
+
+        populate.delete_entity_data_by_values(connection=self.connection, entity_name='city', values=['Goa'])
+        self.assertEqual(dict(query.full_text_query(connection=self.connection, entity_name='city',
+                                                    sentences=sentences, fuzziness_threshold=1)[0]), {})
+
+        populate.entity_data_update(connection=self.connection, entity_name='city', language_script='en',
+                                    entity_data=[{'value': 'Goa', 'variants': ['goa']}], logger=ner_logger)
+        self.assertEqual(query.dictionary_query(connection=self.connection, entity_name='city'), {'Goa': ['goa']})
+
+    def test_upsert_seen_as_a_whole(self):
+        seen = []
+        reader = threading.Thread(target=lambda: seen.append(
+            query.dictionary_query(connection=self.connection, entity_name='city')['Mumbai']))
+        add_records = self.connection.add_records
+
+        def add_records_while_reading(**kwargs):
+            # the records of Mumbai are already deleted, the reader waits for the new ones
+            reader.start()
+            reader.join(0.1)
+            self.assertTrue(reader.is_alive())
+            return add_records(**kwargs)
+
+        with mock.patch.object(self.connection, 'add_records', side_effect=add_records_while_reading):
+            populate.upsert_entity_data(connection=self.connection, entity_name='city',
+                                        value_variant_records=[{'value': 'Mumbai', 'language_script': 'en',
+                                                                'variants': ['bombay']}])
+        reader.join(5)
+        self.assertEqual(seen, [['bombay']])
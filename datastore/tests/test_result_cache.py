@@ -0,0 +1,138 @@
+from __future__ import absolute_import
+
+import logging
+import threading
+import time
+
+from django.test import TestCase
+
+from datastore.cache import ResultCache, SingleFlight, VersionPoller
+
+
+class ResultCacheTest(TestCase):
+    def setUp(self):
+        self.now = 0
+        self.cache = ResultCache(max_size=2, ttl=10, timer=lambda: self.now)
+
+    def test_hits_misses_and_lru_eviction(self):
+        self.cache.set(('city', 'delhi'), {'delhi': 'New Delhi'})
+        self.cache.set(('city', 'goa'), {'goa': 'Goa'})
+        self.assertEqual(self.cache.get(('city', 'delhi')), {'delhi': 'New Delhi'})
+        self.cache.set(('city', 'pune'), {'pune': 'Pune'})
+
+        self.assertIsNone(self.cache.get(('city', 'goa')))
+        self.assertEqual(self.cache.get(('city', 'pune')), {'pune': 'Pune'})
+        self.assertEqual(self.cache.get_stats(), {'hits': 2, 'misses': 1, 'size': 2, 'max_size': 2})
+
+    def test_ttl_expiry(self):
+        self.cache.set(('city', 'delhi'), {'delhi': 'New Delhi'})
+        self.now = 9
+        self.assertIsNotNone(self.cache.get(('city', 'delhi')))
+        self.now = 10
+        self.assertIsNone(self.cache.get(('city', 'delhi')))
+
+    def test_invalidate_entity(self):
+        self.cache.set(('city', 'delhi'), {'delhi': 'New Delhi'})
+        self.cache.set(('dish', 'pizza'), {'pizza': 'Pizza'})
+        self.cache.invalidate_entity('city')
+
+        self.assertIsNone(self.cache.get(('city', 'delhi')))
+        self.assertEqual(self.cache.get(('dish', 'pizza')), {'pizza': 'Pizza'})
+
+    def test_disabled(self):
+        cache = ResultCache(max_size=0)
+        cache.set(('city', 'delhi'), {'delhi': 'New Delhi'})
+        self.assertIsNone(cache.get(('city', 'delhi')))
+        self.assertEqual(len(cache), 0)
+
+
+class SingleFlightTest(TestCase):
+    def setUp(self):
+        self.single_flight = SingleFlight()
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.searched = []
+
+    def _slow_search(self, keys):
+        def search(indices):
+            self.searched.append([keys[index] for index in indices])
+            self.started.set()
+            self.release.wait(5)
+            return [keys[index].upper() for index in indices]
+        return search
+
+    def test_concurrent_identical_keys_share_one_call(self):
+        results = {}
+        leader = threading.Thread(target=lambda: results.setdefault(
+            'leader', self.single_flight.do(['delhi', 'goa'], self._slow_search(['delhi', 'goa']))))
+        leader.start()
+        self.started.wait(5)
+
+        follower = threading.Thread(target=lambda: results.setdefault(
+            'follower', self.single_flight.do(['goa', 'pune'], self._slow_search(['goa', 'pune']))))
+        follower.start()
+        for _ in range(500):
+            if self.single_flight.shared:
+                break
+            time.sleep(0.01)
+        self.release.set()
+        leader.join(5)
+        follower.join(5)
+
+        self.assertEqual(results, {'leader': ['DELHI', 'GOA'], 'follower': ['GOA', 'PUNE']})
+        self.assertEqual(sorted(self.searched), [['delhi', 'goa'], ['pune']])
+        self.assertEqual(self.single_flight.get_stats(), {'calls': 3, 'shared': 1, 'in_flight': 0})
+
+    def test_keys_are_not_kept_after_call(self):
+        self.release.set()
+        self.single_flight.do(['delhi'], self._slow_search(['delhi']))
+        self.single_flight.do(['delhi', 'delhi'], self._slow_search(['delhi', 'delhi']))
+        self.assertEqual(self.searched, [['delhi'], ['delhi']])
+
+    def test_error_is_raised(self):
+        def search(indices):
+            raise ValueError('search failed')
+
+        with self.assertRaises(ValueError):
+            self.single_flight.do(['delhi'], search)
+        self.assertEqual(self.single_flight.get_stats()['in_flight'], 0)
+
+
+class VersionPollerTest(TestCase):
+    def setUp(self):
+        self.versions = {'city': 1, 'cuisine': 3}
+        self.changed = []
+        self.poller = VersionPoller(get_versions=lambda: dict(self.versions), on_change=self.changed.append,
+                                    interval=0.01, logger=logging.getLogger(__name__))
+
+    def test_poll(self):
+        self.assertEqual(self.poller.poll(), [])
+        self.versions.update({'city': 2, 'dish': 1})
+        del self.versions['cuisine']
+        self.assertEqual(sorted(self.poller.poll()), ['city', 'cuisine', 'dish'])
+        self.assertEqual(self.poller.poll(), [])
+        self.assertEqual(sorted(self.changed), ['city', 'cuisine', 'dish'])
+        self.assertEqual(self.poller.get_stats(), {'polls': 3, 'changes': 3, 'entities': 2})
+
+    def test_thread_keeps_polling_after_errors(self):
+        calls = []
+
+        def get_versions():
+            calls.append(1)
+            if len(calls) == 1:
+                raise ValueError('versions index unavailable')
+            return dict(self.versions)
+
+        self.poller._get_versions = get_versions
+        self.poller.start()
+        for _ in range(500):
+            if self.poller.polls:
+                break
+            time.sleep(0.01)
+        self.versions['city'] = 2
+        for _ in range(500):
+            if self.changed:
+                break
+            time.sleep(0.01)
+        self.poller.stop()
+        self.assertEqual(self.changed, ['city'])
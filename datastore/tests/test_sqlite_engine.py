@@ -0,0 +1,186 @@
+# coding=utf-8
+from __future__ import absolute_import
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+
+import mock
+from django.test import TestCase
+
+from datastore.sqlite import connect, create, populate, query, snapshot
+from chatbot_ner.config import ner_logger
+
+
+class SqliteEngineTest(TestCase):
+    def setUp(self):
+        self.connection = connect.connect(database_path=':memory:')
+        create.create_tables(connection=self.connection, logger=ner_logger)
+        populate.add_entity_data(connection=self.connection, entity_name='city', value_variant_records=[
+            {'value': 'New Delhi', 'language_script': 'en', 'variants': ['delhi', 'new delhi', '']},
+            {'value': 'Mumbai', 'language_script': 'en', 'variants': ['mumbai', 'bombay']},
+            {'value': 'Bengaluru', 'language_script': 'en', 'variants': ['bangalore', 'bengaluru']},
+            {'value': 'Mumbai', 'language_script': 'hi', 'variants': [u'मुंबई']},
+        ])
+
+    def tearDown(self):
+        self.connection.close()
+
+    def test_exists(self):
+        self.assertTrue(create.exists(self.connection))
+        create.delete_tables(connection=self.connection, logger=ner_logger)
+        self.assertFalse(create.exists(self.connection))
+
+    def test_full_text_query_exact_and_fuzzy(self):
+        results = query.full_text_query(connection=self.connection, entity_name='city',
+                                        sentences=['book a flight from new delhi to mumbai',
+                                                   'i live in banglore',
+                                                   'i live in vangalore'],
+                                        fuzziness_threshold='auto:4,7')
+        self.assertEqual(list(results[0].keys())[0], 'new delhi')
+        self.assertEqual(results[0]['delhi'], 'New Delhi')
+        self.assertEqual(results[0]['mumbai'], 'Mumbai')
+        self.assertEqual(dict(results[1]), {'bangalore': 'Bengaluru'})
+        self.assertEqual(dict(results[2]), {})
+
+    def test_full_text_query_language_script(self):
+        results = query.full_text_query(connection=self.connection, entity_name='city',
+                                        sentences=[u'मुंबई'], fuzziness_threshold=1, search_language_script='hi')
+        self.assertEqual(dict(results[0]), {u'मुंबई': 'Mumbai'})
+
+    def test_read_and_write_methods(self):
+        self.assertEqual(query.get_entity_supported_languages(connection=self.connection, entity_name='city'),
+                         ['en', 'hi'])
+        self.assertEqual(query.get_entity_unique_values(connection=self.connection, entity_name='city',
+                                                        variant_search_term='bombay'), ['Mumbai'])
+        self.assertEqual(len(query.get_entity_data(connection=self.connection, entity_name='city',
+                                                   values=['Mumbai'])), 2)
+
+        populate.delete_entity_data_by_values(connection=self.connection, entity_name='city', values=['Mumbai'])
+        results = query.full_text_query(connection=self.connection, entity_name='city', sentences=['mumbai'],
+                                        fuzziness_threshold=1)
+        self.assertEqual(dict(results[0]), {})
+
+        populate.delete_entity_by_name(connection=self.connection, entity_name='city', logger=ner_logger)
+        self.assertEqual(query.dictionary_query(connection=self.connection, entity_name='city'), {})
+
+    def test_upsert_in_single_transaction(self):
+        records = [{'value': 'Mumbai', 'language_script': 'en', 'variants': ['bombay']}]
+        with mock.patch('datastore.sqlite.populate._insert_records', side_effect=sqlite3.OperationalError):
+            with self.assertRaises(sqlite3.OperationalError):
+                populate.upsert_entity_data(connection=self.connection, entity_name='city',
+                                            value_variant_records=records)
+        self.assertEqual(len(query.get_entity_data(connection=self.connection, entity_name='city',
+                                                   values=['Mumbai'])), 2)
+
+        populate.upsert_entity_data(connection=self.connection, entity_name='city', value_variant_records=records)
+        self.assertEqual(query.dictionary_query(connection=self.connection, entity_name='city'),
+                         {'New Delhi': ['delhi', 'new delhi', ''], 'Mumbai': ['bombay'],
+                          'Bengaluru': ['bangalore', 'bengaluru']})
+
+
+def _run_in_threads(function, count=2):
+    """
+    Returns:
+        list: results of calling function once in each of count threads
+    """
+    results = [None] * count
+
+    def run(index):
+        results[index] = function()
+
+    threads = [threading.Thread(target=run, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class ThreadLocalConnectionTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.connection = connect.connect(database_path=os.path.join(self.directory, 'entity_data.sqlite3'))
+        create.create_tables(connection=self.connection, logger=ner_logger)
+        populate.add_entity_data(connection=self.connection, entity_name='city', value_variant_records=[
+            {'value': 'Mumbai', 'language_script': 'en', 'variants': ['mumbai', 'bombay']},
+        ])
+
+    def tearDown(self):
+        self.connection.close()
+        shutil.rmtree(self.directory)
+
+    def test_connection_per_thread(self):
+        self.assertIsInstance(self.connection, connect.ThreadLocalConnection)
+        results = _run_in_threads(lambda: (self.connection._get_connection(),
+                                           query.dictionary_query(connection=self.connection, entity_name='city')))
+        connections = [connection for connection, _ in results] + [self.connection._get_connection()]
+        self.assertEqual(len(set(id(connection) for connection in connections)), 3)
+        self.assertEqual([result for _, result in results], [{'Mumbai': ['mumbai', 'bombay']}] * 2)
+
+
+class SnapshotTest(TestCase):
+    def setUp(self):
+        self.snapshot_directory = tempfile.mkdtemp()
+        self.now = 0
+        self.swaps = 0
+        self.records = {
+            'city': [{'dict_type': 'variants', 'value': 'New Delhi', 'language_script': 'en',
+                      'variants': ['delhi', 'new delhi']}],
+            'restaurant': [{'dict_type': 'variants', 'value': 'Taj', 'language_script': 'en', 'variants': ['taj']}],
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.snapshot_directory)
+
+    def _build(self, keep=2):
+        return snapshot.build_snapshot(snapshot_directory=self.snapshot_directory, entity_names=sorted(self.records),
+                                       get_records=lambda entity_name: iter(self.records[entity_name]),
+                                       logger=ner_logger, keep=keep)
+
+    def _on_swap(self):
+        self.swaps += 1
+
+    def test_connect_without_snapshot(self):
+        self.assertIsNone(connect.connect(database_path=None, snapshot_directory=self.snapshot_directory))
+
+    def test_read_only_and_hot_swap(self):
+        first_path = self._build()
+        self.assertEqual(snapshot.get_current_snapshot_path(self.snapshot_directory), first_path)
+        connection = snapshot.SnapshotConnection(snapshot_directory=self.snapshot_directory, snapshot_path=first_path,
+                                                 check_interval=5, on_swap=self._on_swap, timer=lambda: self.now)
+        self.assertEqual(query.get_entity_names(connection=connection), ['city', 'restaurant'])
+        self.assertEqual(dict(query.full_text_query(connection=connection, entity_name='city',
+                                                    sentences=['going to delhii'], fuzziness_threshold=1)[0]),
+                         {'delhi': 'New Delhi'})
+        with self.assertRaises(sqlite3.OperationalError):
+            populate.delete_records(connection=connection, entity_name='city')
+
+        self.records['city'].append({'dict_type': 'variants', 'value': 'Goa', 'language_script': 'en',
+                                     'variants': ['goa']})
+        second_path = self._build(keep=1)
+        # Deleted snapshot is still readable through the open connection until it switches
+        self.assertFalse(os.path.exists(first_path))
+        self.assertEqual(query.dictionary_query(connection=connection, entity_name='city'),
+                         {'New Delhi': ['delhi', 'new delhi']})
+
+        self.now = 5
+        self.assertEqual(query.dictionary_query(connection=connection, entity_name='city'),
+                         {'New Delhi': ['delhi', 'new delhi'], 'Goa': ['goa']})
+        self.assertEqual(connection.snapshot_path, second_path)
+        self.assertEqual(self.swaps, 1)
+
+        self._build(keep=1)
+        self.assertFalse(os.path.exists(second_path))
+        self.assertEqual(len(os.listdir(self.snapshot_directory)), 2)
+
+    def test_connection_per_thread(self):
+        connection = snapshot.SnapshotConnection(snapshot_directory=self.snapshot_directory,
+                                                 snapshot_path=self._build(), check_interval=5,
+                                                 timer=lambda: self.now)
+        results = _run_in_threads(lambda: (connection._get_connection(),
+                                           query.get_entity_names(connection=connection)))
+        self.assertIsNot(results[0][0], results[1][0])
+        self.assertEqual([result for _, result in results], [['city', 'restaurant']] * 2)
@@ -0,0 +1,37 @@
+from __future__ import absolute_import
+
+from django.test import TestCase
+
+from datastore.vocabulary import BloomFilter, Vocabulary
+
+
+class BloomFilterTest(TestCase):
+    def test_no_false_negatives_and_few_false_positives(self):
+        bloom_filter = BloomFilter(capacity=1000, error_rate=0.01)
+        for number in range(1000):
+            bloom_filter.add(u'term%d' % number)
+
+        self.assertTrue(all(u'term%d' % number in bloom_filter for number in range(1000)))
+        false_positives = sum(1 for number in range(10000) if u'other%d' % number in bloom_filter)
+        self.assertLess(false_positives, 300)
+
+
+class VocabularyTest(TestCase):
+    def setUp(self):
+        self.vocabulary = Vocabulary(records=[
+            {'value': 'New Delhi', 'variants': ['delhi', 'new  delhi', '']},
+            {'value': 'Bengaluru', 'variants': ['bangalore', 'bengaluru']},
+            {'value': 'Goa', 'variants': ['goa']},
+        ])
+
+    def test_may_match(self):
+        self.assertEqual(len(self.vocabulary), 5)
+        self.assertTrue(self.vocabulary.may_match('flights to delhi', fuzziness_threshold='auto:4,7'))
+        self.assertTrue(self.vocabulary.may_match('i live in banglore', fuzziness_threshold='auto:4,7'))
+        self.assertTrue(self.vocabulary.may_match('going to Goa', fuzziness_threshold=1))
+        self.assertFalse(self.vocabulary.may_match('what is my order status', fuzziness_threshold='auto:4,7'))
+
+    def test_fuzziness_and_prefix(self):
+        self.assertFalse(self.vocabulary.may_match('goo', fuzziness_threshold='auto:4,7'))
+        self.assertTrue(self.vocabulary.may_match('goo', fuzziness_threshold=1))
+        self.assertFalse(self.vocabulary.may_match('vangalore', fuzziness_threshold=2))
@@ -1,7 +1,17 @@
 import csv
+import hashlib
+import json
 import os
 from collections import defaultdict
 
+from six import string_types
+
+# Elasticsearch never allows more than two edits for a fuzzy term
+MAX_EDIT_DISTANCE = 2
+
+# Low and high term lengths used by elasticsearch when fuzziness is plain "auto"
+DEFAULT_AUTO_FUZZINESS_LOW, DEFAULT_AUTO_FUZZINESS_HIGH = 3, 6
+
 
 def read_csv(file_path):
     """
@@ -17,6 +27,21 @@ def read_csv(file_path):
     return reader
 
 
+def iter_csv_rows(file_path):
+    """
+    Generator over rows of a csv file, reading one row at a time. The file is closed once all rows are read or the
+    generator is closed
+
+    Args:
+        file_path: path of the csv file
+    Yields:
+         list: fields of each row
+    """
+    with open(file_path, 'rt') as file_object:
+        for row in csv.reader(file_object):
+            yield row
+
+
 def remove_duplicate_data(dictionary_value):
     """
     Removes duplicates from lists in a dictionary mapping keys to lists
@@ -41,6 +66,64 @@ def remove_duplicate_data(dictionary_value):
     return dictionary_unique
 
 
+def get_content_hash(entity_name, value, language_script, variants):
+    """
+    Stable hash of the contents of an entity value record, the same for the same variants in any order
+
+    Args:
+        entity_name (str): name of the entity
+        value (str): entity value
+        language_script (str): language code of the record
+        variants (list): variants of the value
+
+    Returns:
+        str: hex digest
+    """
+    content = json.dumps([entity_name, value, language_script, sorted(set(variants or []))])
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def get_document_id(entity_name, value, language_script):
+    """
+    Deterministic id of the record of an entity value in a language, so that a record can be written or deleted
+    without looking up its id first
+
+    Args:
+        entity_name (str): name of the entity
+        value (str): entity value
+        language_script (str): language code of the record
+
+    Returns:
+        str: hex digest
+    """
+    return hashlib.sha1(json.dumps([entity_name, value, language_script]).encode('utf-8')).hexdigest()
+
+
+def get_fuzziness_for_token(fuzziness_threshold, token):
+    """
+    Resolve maximum edits allowed for token the same way elasticsearch resolves 'fuzziness' of a match query
+
+    Args:
+        fuzziness_threshold (int or str): int or "auto" or "auto:<low>,<high>"
+        token (unicode): analyzed query term
+
+    Returns:
+        int: maximum number of edits allowed for token, never more than MAX_EDIT_DISTANCE
+    """
+    if isinstance(fuzziness_threshold, string_types):
+        low, high = DEFAULT_AUTO_FUZZINESS_LOW, DEFAULT_AUTO_FUZZINESS_HIGH
+        setting = fuzziness_threshold.lower()
+        if setting.startswith('auto:'):
+            low, high = [int(bound) for bound in setting[len('auto:'):].split(',')]
+        if len(token) < low:
+            return 0
+        elif len(token) < high:
+            return 1
+        return 2
+
+    return min(int(fuzziness_threshold or 0), MAX_EDIT_DISTANCE)
+
+
 def get_files_from_directory(directory_path):
     """
     Get list of all csv files in the directory path
@@ -55,3 +138,24 @@ def get_files_from_directory(directory_path):
         return []
     return [f for f in os.listdir(directory_path) if
             os.path.isfile(os.path.join(directory_path, f)) and f.endswith('.csv')]
+
+
+def get_csv_file_paths(entity_data_directory_path=None, csv_file_paths=None):
+    """
+    Collect paths of all csv files in entity_data_directory_path followed by csv files in csv_file_paths
+
+    Args:
+        entity_data_directory_path: Optional, Path of the directory containing the entity data csv files
+        csv_file_paths: Optional, list of file paths to csv files
+
+    Returns:
+        A list of paths of csv files
+    """
+    paths = []
+    if entity_data_directory_path:
+        paths.extend([os.path.join(entity_data_directory_path, csv_file)
+                      for csv_file in get_files_from_directory(entity_data_directory_path)])
+    if csv_file_paths:
+        paths.extend([csv_file_path for csv_file_path in csv_file_paths
+                      if csv_file_path and csv_file_path.endswith('.csv')])
+    return paths
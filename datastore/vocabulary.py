@@ -0,0 +1,125 @@
+from __future__ import absolute_import
+
+# std imports
+import hashlib
+import math
+import re
+import struct
+
+# Local imports
+from datastore.memory.index import DEFAULT_PREFIX_LENGTH, analyze, deletion_neighbourhood
+from datastore.utils import MAX_EDIT_DISTANCE, get_fuzziness_for_token
+
+log_prefix = 'datastore.vocabulary'
+
+_whitespace_pattern = re.compile(r'\s+', re.UNICODE)
+
+
+class BloomFilter(object):
+    """
+    Set of strings answering membership with no false negatives and a bounded rate of false positives, in a small
+    fraction of the memory a python set of the same strings takes
+
+    Attributes:
+        bit_count (int): number of bits in the filter
+        hash_count (int): number of bits set per string
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        """
+        Args:
+            capacity (int): number of strings that will be added
+            error_rate (float, optional): false positive rate once capacity strings are added. Defaults to 0.01
+        """
+        capacity = max(capacity, 1)
+        self.bit_count = max(int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(float(self.bit_count) / capacity * math.log(2))), 1)
+        self._bits = bytearray((self.bit_count + 7) // 8)
+
+    def _positions(self, string):
+        # Double hashing, see Kirsch and Mitzenmacher, "Less Hashing, Same Performance: Building a Better Bloom Filter"
+        first, second = struct.unpack('<QQ', hashlib.md5(string.encode('utf-8')).digest())
+        return [(first + i * second) % self.bit_count for i in range(self.hash_count)]
+
+    def add(self, string):
+        for position in self._positions(string):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, string):
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(string))
+
+
+class Vocabulary(object):
+    """
+    Analyzed terms of all variants of a single entity, expanded into their deletion neighbourhoods the same way as
+    datastore.memory.index.VariantIndex and stored in a BloomFilter. Tells whether any term of a text could fuzzy
+    match some term of the entity without a request to the datastore. A text for which may_match is False can not
+    match any variant of the entity, a text for which it is True usually does but is not guaranteed to.
+
+    Attributes:
+        term_count (int): number of unique analyzed terms of the entity
+        prefix_length (int): number of leading characters that must match exactly for a fuzzy match
+    """
+
+    def __init__(self, records, prefix_length=DEFAULT_PREFIX_LENGTH, error_rate=0.01):
+        """
+        Build the vocabulary
+
+        Args:
+            records (iterable): iterable of dicts with 'variants' key, same as the _source of documents indexed in
+                                elasticsearch
+            prefix_length (int, optional): number of leading characters that must match exactly for a fuzzy match
+            error_rate (float, optional): false positive rate of the bloom filter. Defaults to 0.01
+        """
+        self.prefix_length = prefix_length
+        terms = set()
+        for record in records:
+            for variant in record.get('variants') or []:
+                if variant:
+                    terms.update(analyze(_whitespace_pattern.sub(u' ', variant)))
+        self.term_count = len(terms)
+
+        # Upper bound of the deletion neighbourhood sizes, so that the filter is never filled beyond its capacity
+        capacity = 0
+        for term in terms:
+            length = max(len(term) - prefix_length, 0)
+            capacity += sum(_combinations(length, deletes) for deletes in range(MAX_EDIT_DISTANCE + 1))
+        self._filter = BloomFilter(capacity=capacity, error_rate=error_rate)
+        for term in terms:
+            prefix, suffix = term[:prefix_length], term[prefix_length:]
+            for deleted in deletion_neighbourhood(suffix, MAX_EDIT_DISTANCE):
+                self._filter.add(prefix + u'\t' + deleted)
+
+    def __len__(self):
+        return self.term_count
+
+    def may_match(self, text, fuzziness_threshold):
+        """
+        Check if any term of text could be within fuzziness_threshold edits of a term of the entity
+
+        Args:
+            text (str or unicode): text to check
+            fuzziness_threshold (int or str): int or "auto" or "auto:<low>,<high>", see
+                                              datastore.utils.get_fuzziness_for_token. Must be the fuzziness the
+                                              engine is searched with, e.g. resolved by
+                                              elastic_search.query.get_dynamic_fuzziness_threshold
+
+        Returns:
+            bool: False if no variant of the entity can match text
+        """
+        for query_term in set(analyze(text)):
+            max_edits = get_fuzziness_for_token(fuzziness_threshold, query_term)
+            prefix, suffix = query_term[:self.prefix_length], query_term[self.prefix_length:]
+            for deleted in deletion_neighbourhood(suffix, max_edits):
+                if prefix + u'\t' + deleted in self._filter:
+                    return True
+        return False
+
+
+def _combinations(n, k):
+    if k > n:
+        return 0
+    result = 1
+    for i in range(k):
+        result = result * (n - i) // (i + 1)
+    return result
@@ -313,7 +313,8 @@ def entity_data_view(request, entity_name):
             variant_search_term=params.get('variant_search_term', None),
             empty_variants_only=params.get('empty_variants_only', False),
             pagination_size=pagination_size,
-            pagination_from=pagination_from
+            pagination_from=pagination_from,
+            pagination_after=params.get('after', None)
         )
 
     elif request.method == 'POST':
@@ -332,8 +333,20 @@ def read_unique_values_for_text_entity(request, entity_name):
     API call to View unique values for text entity.
     """
     if request.method == 'GET':
+        params = request.GET.dict()
         try:
-            return dictionary_utils.get_entity_unique_values(entity_name=entity_name)
+            if 'size' not in params:
+                return dictionary_utils.get_entity_unique_values(entity_name=entity_name)
+
+            # Paginated, the last value of a page is passed as after to get the next page
+            try:
+                pagination_size = int(params['size'])
+            except ValueError:
+                raise APIHandlerException('size should be sent as a number')
+            values, _ = dictionary_utils.get_entity_unique_values_page(entity_name=entity_name,
+                                                                       size=pagination_size,
+                                                                       after=params.get('after', None))
+            return values
         except (DataStoreSettingsImproperlyConfiguredException,
                 EngineNotImplementedException,
                 EngineConnectionException, FetchIndexForAliasException) as error_message:
@@ -10,6 +10,9 @@ TODO: Move to consistent terminology and use 'value' everywhere
 from external_api.exceptions import APIHandlerException
 from datastore.datastore import DataStore
 
+# Number of values fetched per request while skipping to the offset of a page
+SKIP_PAGE_SIZE = 10000
+
 
 def entity_supported_languages(entity_name):
     """
@@ -86,12 +89,36 @@ def get_entity_unique_values(
         list: List of strings which are unique values in the entity
     """
     datastore_obj = DataStore()
-    return datastore_obj.get_entity_unique_values(
+    return list(datastore_obj.iter_entity_unique_values(
         entity_name=entity_name,
         value_search_term=value_search_term,
         variant_search_term=variant_search_term,
         empty_variants_only=empty_variants_only
-    )
+    ))
+
+
+def get_entity_unique_values_page(entity_name, size, after=None, offset=0, **kwargs):
+    """
+    Get one page of the sorted unique values belonging to this entity
+    Args:
+        entity_name (str): Name of the entity for which unique values are to be fetched
+        size (int): Maximum number of values in the page
+        after (str, optional): Last value of the previous page. If given, offset is counted from this value
+        offset (int, optional): Number of values to skip. Only the values are fetched for the skipped
+            values, in pages of SKIP_PAGE_SIZE
+        kwargs: empty_variants_only, value_search_term and variant_search_term filters, see
+            get_entity_unique_values
+    Returns:
+        tuple: List of values and the value to pass as after to get the next page, None on the last page
+    """
+    datastore_obj = DataStore()
+    while offset > 0:
+        skipped, after = datastore_obj.get_entity_unique_values_page(
+            entity_name=entity_name, size=min(offset, SKIP_PAGE_SIZE), after=after, **kwargs)
+        offset -= len(skipped)
+        if after is None:
+            return [], None
+    return datastore_obj.get_entity_unique_values_page(entity_name=entity_name, size=size, after=after, **kwargs)
 
 
 def get_records_from_values(entity_name, values=None):
@@ -115,7 +142,7 @@ def get_records_from_values(entity_name, values=None):
                 }
     """
     datastore_obj = DataStore()
-    results = datastore_obj.get_entity_data(
+    results = datastore_obj.iter_entity_data(
         entity_name=entity_name,
         values=values
     )
@@ -152,7 +179,8 @@ def search_entity_values(
         variant_search_term=None,
         empty_variants_only=False,
         pagination_size=None,
-        pagination_from=None
+        pagination_from=None,
+        pagination_after=None
 ):
     """
     Searches for values within the specific entity. If pagination details not specified, all
@@ -170,21 +198,29 @@ def search_entity_values(
             If it is None, the results will not be paginated
         pagination_from (int, optional): Offset to skip initial data (useful for pagination queries)
             If it is None, the results will not be paginated
+        pagination_after (str, optional): Last value of the previous page, pagination_from is counted from
+            this value. Passing the 'after' of the previous response avoids skipping to the offset
     Returns:
-        dict: total records (for pagination) and a list of individual records which match by the search filters
+        dict: total records (for pagination), a list of individual records which match by the search filters and
+            the value to pass as pagination_after to get the next page ('after', None on the last page)
     """
     values = None
     total_records = None
+    next_after = None
     if value_search_term or variant_search_term or empty_variants_only or pagination_size or pagination_from:
-        values = get_entity_unique_values(
-            entity_name=entity_name,
-            value_search_term=value_search_term,
-            variant_search_term=variant_search_term,
-            empty_variants_only=empty_variants_only,
-        )
-        total_records = len(values)
+        filters = {
+            'value_search_term': value_search_term,
+            'variant_search_term': variant_search_term,
+            'empty_variants_only': empty_variants_only,
+        }
         if pagination_size > 0 and pagination_from >= 0:
-            values = values[pagination_from:pagination_from + pagination_size]
+            values, next_after = get_entity_unique_values_page(entity_name=entity_name, size=pagination_size,
+                                                               after=pagination_after, offset=pagination_from,
+                                                               **filters)
+            total_records = DataStore().get_entity_unique_values_count(entity_name=entity_name, **filters)
+        else:
+            values = get_entity_unique_values(entity_name=entity_name, **filters)
+            total_records = len(values)
 
     records_dict = get_records_from_values(entity_name, values)
     records_list = []
@@ -199,7 +235,8 @@ def search_entity_values(
 
     return {
         'records': records_list,
-        'total': total_records
+        'total': total_records,
+        'after': next_after
     }
 
 
@@ -215,17 +252,10 @@ def update_entity_records(entity_name, data):
     Returns:
         None
     """
-    # Delete some records first
     records_to_delete = data.get('deleted', [])
     records_to_create = data.get('edited', [])
     replace_data = data.get('replace')
 
-    if replace_data:
-        values_to_delete = get_entity_unique_values(entity_name)
-    else:
-        values_to_delete = [record['word'] for record in records_to_delete]
-        values_to_delete.extend([record['word'] for record in records_to_create])
-
     value_variants_to_create = []
     for record in records_to_create:
         for language_script, variants in record.get('variants', {}).items():
@@ -236,8 +266,10 @@ def update_entity_records(entity_name, data):
                     'variants': variants.get('value', [])
                 })
 
-    # delete words
-    delete_records_by_values(entity_name=entity_name, values=values_to_delete)
-
+    # Edited records overwrite the existing records of their words, so no record is missing in between
     datastore_obj = DataStore()
-    datastore_obj.add_entity_data(entity_name, value_variants_to_create)
+    if replace_data:
+        datastore_obj.upsert_entity_data(entity_name, value_variants_to_create, replace=True)
+    else:
+        datastore_obj.upsert_entity_data(entity_name, value_variants_to_create,
+                                         values_to_delete=[record['word'] for record in records_to_delete])
@@ -0,0 +1,55 @@
+from __future__ import absolute_import
+
+import json
+
+import mock
+from django.test import RequestFactory, TestCase
+
+from external_api import api
+
+
+class FakeDataStore(object):
+    """
+    Stands in for datastore.DataStore with the unique values and records of a single entity
+    """
+    def __init__(self, values):
+        self.values = sorted(values)
+
+    def get_entity_unique_values_page(self, entity_name, size, after=None, **kwargs):
+        values = [value for value in self.values if after is None or value > after][:size]
+        return values, values[-1] if len(values) == size else None
+
+    def get_entity_unique_values_count(self, entity_name, **kwargs):
+        return len(self.values)
+
+    def iter_entity_data(self, entity_name, values=None):
+        for value in values:
+            yield {'_id': value, '_source': {'value': value, 'language_script': 'en', 'variants': [value.lower()]}}
+
+
+class EntityValuesApiTest(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        patcher = mock.patch('external_api.lib.dictionary_utils.DataStore',
+                             return_value=FakeDataStore(['Delhi', 'Goa', 'Mumbai', 'Pune', 'Agra']))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get(self, view, path, params):
+        response = view(self.factory.get(path, params), entity_name='city')
+        body = json.loads(response.content.decode('utf-8'))
+        self.assertTrue(body['success'], body['error'])
+        return body['result']
+
+    def test_entity_data_page_after_and_from(self):
+        result = self._get(api.entity_data_view, '/entities/data/v1/city', {'size': 2, 'from': 1, 'after': 'Delhi'})
+        self.assertEqual(sorted(record['word'] for record in result['records']), ['Mumbai', 'Pune'])
+        self.assertEqual(result['total'], 5)
+        self.assertEqual(result['after'], 'Pune')
+
+    def test_unique_values_size_and_after(self):
+        self.assertEqual(self._get(api.read_unique_values_for_text_entity, '/entities/values/v1/city', {'size': 2}),
+                         ['Agra', 'Delhi'])
+        self.assertEqual(self._get(api.read_unique_values_for_text_entity, '/entities/values/v1/city',
+                                   {'size': 2, 'after': 'Delhi'}),
+                         ['Goa', 'Mumbai'])
@@ -21,27 +21,130 @@ def edit_distance(string1, string2, insertion_cost=1, deletion_cost=1, substitut
     NOTE: Since, minimum edit distance is time consuming process, we have defined max_distance attribute.
     So, whenever distance exceeds the max_distance the function will break and return the max_distance else
     it will return levenshtein distance
+
+    When insertion and deletion costs are equal and a substitution costs at least as much as a deletion followed by an
+    insertion (the default costs), the distance only depends on the longest common subsequence of the two strings,
+    which is computed with a bit-parallel algorithm. Other costs use a dynamic programming table restricted to the
+    diagonal band that can still be within max_distance (Ukkonen's cutoff).
+    """
+    return edit_distances(string1, [string2], insertion_cost=insertion_cost, deletion_cost=deletion_cost,
+                          substitution_cost=substitution_cost, max_distance=max_distance)[0]
+
+
+def edit_distances(query, candidates, insertion_cost=1, deletion_cost=1, substitution_cost=2, max_distance=None):
+    """
+    Calculate the weighted levenshtein distance between query and each of the candidates. Work that depends only on
+    query is done once for all candidates, so this is faster than calling edit_distance for every candidate.
+
+    Args:
+        query (unicode): unicode string. If any encoded string type 'str' is passed, it will be decoded using utf-8
+        candidates (iterable): unicode strings to compare query with. Encoded 'str' strings are decoded using utf-8
+        insertion_cost (int, optional): cost penalty for insertion operation, defaults to 1
+        deletion_cost (int, optional): cost penalty for deletion operation, defaults to 1
+        substitution_cost (int, optional): cost penalty for substitution operation, defaults to 2
+        max_distance (int, optional): distances larger than this are returned as max_distance. If None complete edit
+                                      distances are returned. Defaults to None
+
+    Returns:
+        list of int: edit distance of query from each candidate, in the same order as candidates
+
+    For Example:
+        edit_distances('delhi', ['delhi', 'dehli', 'mumbai'], max_distance=3)
+        >> [0, 2, 3]
     """
-    if isinstance(string1, bytes):
-        string1 = string1.decode('utf-8')
+    if isinstance(query, bytes):
+        query = query.decode('utf-8')
+
+    indel_only = insertion_cost == deletion_cost and substitution_cost >= insertion_cost + deletion_cost
+    if indel_only:
+        query_masks = _get_character_masks(query)
+
+    distances = []
+    for candidate in candidates:
+        if isinstance(candidate, bytes):
+            candidate = candidate.decode('utf-8')
+
+        # Every character of length difference needs at least one insertion or deletion
+        if max_distance and abs(len(query) - len(candidate)) * min(insertion_cost, deletion_cost) > max_distance:
+            distances.append(max_distance)
+            continue
+
+        if indel_only:
+            lcs_length = _get_lcs_length(query_masks, len(query), candidate)
+            distance = insertion_cost * (len(query) + len(candidate) - 2 * lcs_length)
+        else:
+            distance = _get_banded_edit_distance(query, candidate, insertion_cost, deletion_cost, substitution_cost,
+                                                 max_distance)
+
+        if max_distance and distance > max_distance:
+            distance = max_distance
+        distances.append(distance)
 
-    if isinstance(string2, bytes):
-        string2 = string2.decode('utf-8')
+    return distances
 
+
+def _get_character_masks(string):
+    """
+    Map each character of string to a bit mask with bit i set if string[i] is that character
+    """
+    masks = {}
+    for index, char in enumerate(string):
+        masks[char] = masks.get(char, 0) | (1 << index)
+    return masks
+
+
+def _get_lcs_length(masks, length, string):
+    """
+    Length of the longest common subsequence of string and the string of given length that masks were built from,
+    using the bit-parallel algorithm of Allison and Dix (1986) with Hyyro's (2004) formulation
+
+    Args:
+        masks (dict): output of _get_character_masks for the other string
+        length (int): length of the other string
+        string (unicode): string to compare
+
+    Returns:
+        int: length of the longest common subsequence
+    """
+    all_ones = (1 << length) - 1
+    vector = all_ones
+    for char in string:
+        matches = vector & masks.get(char, 0)
+        vector = ((vector + matches) | (vector - matches)) & all_ones
+    return length - bin(vector).count('1')
+
+
+def _get_banded_edit_distance(string1, string2, insertion_cost, deletion_cost, substitution_cost, max_distance):
+    """
+    Weighted levenshtein distance by dynamic programming, only computing cells within the diagonal band that can be
+    reached without exceeding max_distance and stopping as soon as a whole row exceeds max_distance
+
+    Returns:
+        int: edit distance, some value larger than max_distance if the distance exceeds max_distance
+    """
     if len(string1) > len(string2):
         string1, string2 = string2, string1
-    distances = range(len(string1) + 1)
+
+    infinity = float('inf')
+    band = len(string2)
+    if max_distance:
+        band = max_distance // min(insertion_cost, deletion_cost)
+
+    distances = [index1 * deletion_cost if index1 <= band else infinity for index1 in range(len(string1) + 1)]
     for index2, char2 in enumerate(string2):
-        new_distances = [index2 + 1]
-        for index1, char1 in enumerate(string1):
-            if char1 == char2:
-                new_distances.append(distances[index1])
+        start, end = max(0, index2 + 1 - band), min(len(string1), index2 + 1 + band)
+        new_distances = [infinity] * (len(string1) + 1)
+        if start == 0:
+            new_distances[0] = (index2 + 1) * insertion_cost
+        for index1 in range(max(start, 1), end + 1):
+            if string1[index1 - 1] == char2:
+                new_distances[index1] = distances[index1 - 1]
             else:
-                new_distances.append(min((distances[index1] + substitution_cost,
-                                         distances[index1 + 1] + insertion_cost,
-                                         new_distances[-1] + deletion_cost)))
+                new_distances[index1] = min(distances[index1 - 1] + substitution_cost,
+                                            distances[index1] + insertion_cost,
+                                            new_distances[index1 - 1] + deletion_cost)
         distances = new_distances
-        if max_distance and min(new_distances) > max_distance:
-            return max_distance
+        if max_distance and min(distances[start:end + 1]) > max_distance:
+            return max_distance + 1
 
     return distances[-1]
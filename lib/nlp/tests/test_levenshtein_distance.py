@@ -0,0 +1,33 @@
+# coding=utf-8
+from __future__ import absolute_import
+
+from django.test import TestCase
+
+from lib.nlp.levenshtein_distance import edit_distance, edit_distances
+
+
+class EditDistanceTest(TestCase):
+    def test_weighted_distance(self):
+        self.assertEqual(edit_distance(u'hello', u'helllo'), 1)
+        self.assertEqual(edit_distance(u'delhi', u'dehli'), 2)
+        self.assertEqual(edit_distance(u'kitten', u'sitting'), 5)
+        self.assertEqual(edit_distance(u'kitten', u'sitting', substitution_cost=1), 3)
+        self.assertEqual(edit_distance(u'', u'goa'), 3)
+        self.assertEqual(edit_distance(u'मुंबई', u'मुंबइ'), 2)
+        self.assertEqual(edit_distance('mumbai', u'mumbai'), 0)
+
+    def test_max_distance(self):
+        self.assertEqual(edit_distance(u'beautiful', u'beauty', max_distance=3), 3)
+        self.assertEqual(edit_distance(u'bangalore', u'goa', max_distance=2), 2)
+        self.assertEqual(edit_distance(u'kitten', u'sitting', substitution_cost=1, max_distance=2), 2)
+        self.assertEqual(edit_distance(u'chennai', u'chenai', substitution_cost=1, max_distance=2), 1)
+
+    def test_batch_matches_single(self):
+        candidates = [u'delhi', u'dehli', u'deli', u'mumbai', u'', u'new delhi']
+        for substitution_cost in (1, 2):
+            for max_distance in (None, 1, 3):
+                self.assertEqual(
+                    edit_distances(u'delhi', candidates, substitution_cost=substitution_cost,
+                                   max_distance=max_distance),
+                    [edit_distance(u'delhi', candidate, substitution_cost=substitution_cost,
+                                   max_distance=max_distance) for candidate in candidates])
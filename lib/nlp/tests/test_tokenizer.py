@@ -0,0 +1,21 @@
+# coding=utf-8
+from __future__ import absolute_import
+
+from django.test import TestCase
+
+from lib.nlp.tokenizer import Tokenizer, LUCENE_STANDARD_TOKENIZER, WHITESPACE_TOKENIZER
+
+
+class TokenizeWithSpansTest(TestCase):
+    def test_lucene_standard_tokenizer(self):
+        tokenizer = Tokenizer(LUCENE_STANDARD_TOKENIZER)
+        text = u' i want 1 pc hot & crispy (mainland china), मुंबई '
+        spans = tokenizer.tokenize_with_spans(text)
+        self.assertEqual([token for token, _, _ in spans], tokenizer.tokenize(text))
+        for token, start, end in spans:
+            self.assertEqual(text[start:end], token)
+
+    def test_whitespace_tokenizer(self):
+        tokenizer = Tokenizer(WHITESPACE_TOKENIZER)
+        self.assertEqual(tokenizer.tokenize_with_spans(u'  hot &\tcrispy '),
+                         [(u'hot', 2, 5), (u'&', 6, 7), (u'crispy', 8, 14)])
@@ -11,6 +11,8 @@ PRELOADED_NLTK_TOKENIZER = 'PRELOADED_NLTK_TOKENIZER'
 LUCENE_STANDARD_TOKENIZER = 'LUCENE_STANDARD_TOKENIZER'
 WHITESPACE_TOKENIZER = 'WHITESPACE_TOKENIZER'
 
+LUCENE_STANDARD_WORDS_PATTERN = r'\w(?:\B\S)*'
+
 
 class Tokenizer(object):
     """
@@ -47,19 +49,37 @@ class Tokenizer(object):
             WHITESPACE_TOKENIZER: self.__whitespace_tokenizer,
         }
         self.tokenizer = self.tokenizer_dict[self.tokenizer_selected]()
+        self.span_tokenizer_dict = {
+            LUCENE_STANDARD_TOKENIZER: self.__lucene_standard_span_tokenizer,
+            WHITESPACE_TOKENIZER: self.__whitespace_span_tokenizer,
+        }
+        self.span_tokenizer = None
+        if self.tokenizer_selected in self.span_tokenizer_dict:
+            self.span_tokenizer = self.span_tokenizer_dict[self.tokenizer_selected]()
 
     def __lucene_standard_tokenizer(self):
         """
         Tokenizer that mimicks Elasticsearch/Lucene's standard tokenizer
         Uses word boundaries defined in Unicode Annex 29
         """
-        words_pattern = regex.compile(r'\w(?:\B\S)*', flags=regex.V1 | regex.WORD | regex.UNICODE)
+        words_pattern = regex.compile(LUCENE_STANDARD_WORDS_PATTERN, flags=regex.V1 | regex.WORD | regex.UNICODE)
 
         def word_tokenize(text):
             return words_pattern.findall(text)
 
         return word_tokenize
 
+    def __lucene_standard_span_tokenizer(self):
+        """
+        Same as __lucene_standard_tokenizer but also returns character offsets of the tokens
+        """
+        words_pattern = regex.compile(LUCENE_STANDARD_WORDS_PATTERN, flags=regex.V1 | regex.WORD | regex.UNICODE)
+
+        def word_span_tokenize(text):
+            return [(match.group(), match.start(), match.end()) for match in words_pattern.finditer(text)]
+
+        return word_span_tokenize
+
     def __nltk_tokenizer(self):
         """
         Get nltk word tokenizer
@@ -103,6 +123,21 @@ class Tokenizer(object):
         pattern = re.compile(r'\s+', re.IGNORECASE | re.UNICODE)
         return pattern.split
 
+    def __whitespace_span_tokenizer(self):
+        """
+        Get simple whitespace tokenizer that also returns character offsets of the tokens. Unlike
+        __whitespace_tokenizer, no empty tokens are returned for leading or trailing whitespace
+
+        Returns:
+            callable: A python callable that returns (token, start, end) for all whitespace delimited tokens in str
+        """
+        pattern = re.compile(r'\S+', re.UNICODE)
+
+        def whitespace_span_tokenize(text):
+            return [(match.group(), match.start(), match.end()) for match in pattern.finditer(text)]
+
+        return whitespace_span_tokenize
+
     def get_tokenizer(self):
         """
         Get the object of set tokenizer
@@ -129,3 +164,26 @@ class Tokenizer(object):
 
         """
         return self.tokenizer(text)
+
+    def tokenize_with_spans(self, text):
+        """
+        Returns the list of tokens from text along with their character offsets, computed in a single pass over text.
+        Supported only for LUCENE_STANDARD_TOKENIZER and WHITESPACE_TOKENIZER
+
+        Args:
+            text: text to tokenize
+
+        Returns:
+            list of tuple: (token, start, end) for each token, such that text[start:end] == token
+            For example:
+                token = Tokenizer(LUCENE_STANDARD_TOKENIZER)
+                output = token.tokenize_with_spans('Hey, How are you doing?')
+                print output
+                >> [('Hey', 0, 3), ('How', 5, 8), ('are', 9, 12), ('you', 13, 16), ('doing', 17, 22)]
+
+        Raises:
+            NotImplementedError: if the selected tokenizer can not return offsets
+        """
+        if self.span_tokenizer is None:
+            raise NotImplementedError('tokenize_with_spans is not supported for %s' % self.tokenizer_selected)
+        return self.span_tokenizer(text)
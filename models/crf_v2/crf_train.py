@@ -1,7 +1,6 @@
 import pycrfsuite
 from chatbot_ner.config import ner_logger, CRF_MODEL_S3_BUCKET_NAME, CRF_MODEL_S3_BUCKET_REGION, CRF_MODELS_PATH
 from datastore.datastore import DataStore
-from .constants import SENTENCE_LIST, ENTITY_LIST
 from lib.aws_utils import write_file_to_s3
 from .crf_preprocess_data import CrfPreprocessData
 from .exceptions import AwsCrfModelWriteException, ESCrfTrainingEntityListNotFoundException, \
@@ -111,10 +110,10 @@ class CrfTrain(object):
         """
         datastore_object = DataStore()
         ner_logger.debug('Fetch of data from ES for ENTITY: %s started' % self.entity_name)
-        result = datastore_object.get_crf_data_for_entity_name(entity_name=self.entity_name)
-
-        sentence_list = result.get(SENTENCE_LIST, [])
-        entity_list = result.get(ENTITY_LIST, [])
+        sentence_list, entity_list = [], []
+        for sentence, entities in datastore_object.iter_crf_data_for_entity_name(entity_name=self.entity_name):
+            sentence_list.append(sentence)
+            entity_list.append(entities)
 
         if not sentence_list:
             raise ESCrfTrainingTextListNotFoundException()
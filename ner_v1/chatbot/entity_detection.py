@@ -226,6 +226,59 @@ def get_text(message, entity_name, structured_value, fallback_value, bot_message
                 ]
             ]
 
+    """
+    text_model_detector = _get_text_model_detector(entity_name=entity_name, language=language, **kwargs)
+    return _run_text_model_detector(text_model_detector=text_model_detector, message=message,
+                                    structured_value=structured_value, fallback_value=fallback_value,
+                                    bot_message=bot_message)
+
+
+def get_text_multi(message, entity_names, structured_value=None, fallback_value=None, bot_message=None,
+                   language=ENGLISH_LANG, **kwargs):
+    """Same as get_text but detects several textual entities in the message at once. Datastore lookups for all the
+    entities are made together (a single msearch request for elasticsearch) instead of one request per entity
+
+    Args:
+        message (str or unicode or None or list(bulk)): natural language text(s) on which detection logic is to be run.
+        entity_names (list): names of the textual entities to detect
+        structured_value (str or unicode or None): Value obtained from any structured elements.
+        fallback_value (str or unicode or None): returned as output if no value is detected for an entity
+        bot_message (str or unicode or None): previous message from a bot/agent.
+        language (str): ISO 639-1 code of language of message
+        **kwargs: extra configuration arguments for TextDetector, same as get_text
+
+    Returns:
+        dict: mapping each entity name to the output of get_text for that entity
+
+    Example:
+        >>> get_text_multi(message=u'dinner at taj in mumbai', entity_names=['city', 'restaurant'])
+
+        {
+            'city': [{'detection': 'message', 'original_text': 'mumbai', 'entity_value': {'value': u'Mumbai'}}],
+            'restaurant': [{'detection': 'message', 'original_text': 'taj', 'entity_value': {'value': u'Taj'}}]
+        }
+    """
+    text_model_detectors = [_get_text_model_detector(entity_name=entity_name, language=language, **kwargs)
+                            for entity_name in entity_names]
+
+    if isinstance(message, (list, tuple)):
+        texts = message
+    else:
+        texts = [structured_value if structured_value else message]
+    if text_model_detectors and all(texts):
+        TextModelDetector.prefetch_similar_dictionaries(text_detectors=text_model_detectors, texts=texts)
+
+    entity_outputs = {}
+    for text_model_detector in text_model_detectors:
+        entity_outputs[text_model_detector.entity_name] = _run_text_model_detector(
+            text_model_detector=text_model_detector, message=message, structured_value=structured_value,
+            fallback_value=fallback_value, bot_message=bot_message)
+    return entity_outputs
+
+
+def _get_text_model_detector(entity_name, language=ENGLISH_LANG, **kwargs):
+    """
+    Create a TextModelDetector for entity_name configured with the extra arguments accepted by get_text
     """
     fuzziness = kwargs.get('fuzziness', None)
     min_token_len_fuzziness = kwargs.get('min_token_len_fuzziness', None)
@@ -247,6 +300,13 @@ def get_text(message, entity_name, structured_value, fallback_value, bot_message
         min_token_len_fuzziness = int(min_token_len_fuzziness)
         text_model_detector.set_min_token_size_for_levenshtein(min_size=min_token_len_fuzziness)
 
+    return text_model_detector
+
+
+def _run_text_model_detector(text_model_detector, message, structured_value, fallback_value, bot_message):
+    """
+    Run detection for a single message or bulk detection for a list of messages
+    """
     if isinstance(message, six.string_types):
         entity_output = text_model_detector.detect(message=message,
                                                    structured_value=structured_value,
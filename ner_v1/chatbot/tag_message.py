@@ -1,7 +1,21 @@
 from ner_v1.chatbot.combine_detection_logic import combine_output_of_detection_logic_and_tag
-from ner_v1.chatbot.entity_detection import get_text, get_city, get_date, get_time, get_email, \
+from ner_v1.chatbot.entity_detection import get_text, get_text_multi, get_city, get_date, get_time, get_email, \
     get_phone_number, get_budget, get_number, get_pnr, get_shopping_size
 
+ENTITY_FUNCTION_DICTIONARY = {
+    'date': get_date,
+    'time': get_time,
+    'email': get_email,
+    'phone_number': get_phone_number,
+    'budget': get_budget,
+    'number': get_number,
+    'city': get_city,
+    'train_pnr': get_pnr,
+    'flight_pnr': get_pnr,
+    'shopping_size': get_shopping_size
+
+}
+
 
 def run_ner(entities, message):
     """This function tags the message with the entity name and also identify the entity values.
@@ -80,8 +94,13 @@ def run_ner(entities, message):
 
     """
     entity_data = {}
+    # All textual entities are detected together so that their datastore lookups are made in a single request
+    text_entities = [entity for entity in entities if entity not in ENTITY_FUNCTION_DICTIONARY]
+    if text_entities:
+        entity_data.update(get_text_multi(message=message, entity_names=text_entities))
     for entity in entities:
-        entity_data[entity] = get_entity_function(entity=entity, message=message)
+        if entity not in entity_data:
+            entity_data[entity] = get_entity_function(entity=entity, message=message)
     return combine_output_of_detection_logic_and_tag(entity_data, message)
 
 
@@ -89,8 +108,8 @@ def get_entity_function(entity, message):
     """Calls the specific detection logic based on entity name. entity name plays crucial role in detecting textual
     entities (restaurant, cuisine, occupation, etc) but not while detecting phone number, email, etc.
 
-    In this functionality we define a dictionary called as entity_function_dictionary = {}.
-    In entity_function_dictionary  key is the name of the entity and the value is which functionality to call for that
+    In this functionality we use the module level dictionary ENTITY_FUNCTION_DICTIONARY.
+    In ENTITY_FUNCTION_DICTIONARY key is the name of the entity and the value is which functionality to call for that
     entity
 
     Attributes:
@@ -101,22 +120,8 @@ def get_entity_function(entity, message):
         entity_output = get_entity_function(entity='date', message='set me reminder on 30th March')
         print entity_output
     """
-    entity_function_dictionary = {
-        'date': get_date,
-        'time': get_time,
-        'email': get_email,
-        'phone_number': get_phone_number,
-        'budget': get_budget,
-        'number': get_number,
-        'city': get_city,
-        'train_pnr': get_pnr,
-        'flight_pnr': get_pnr,
-        'shopping_size': get_shopping_size
-
-    }
-
-    if entity in entity_function_dictionary:
-        return entity_function_dictionary.get(entity)(message=message, entity_name=entity, structured_value=None,
+    if entity in ENTITY_FUNCTION_DICTIONARY:
+        return ENTITY_FUNCTION_DICTIONARY.get(entity)(message=message, entity_name=entity, structured_value=None,
                                                       fallback_value=None, bot_message=None)
     else:
         return get_text(message=message, entity_name=entity, structured_value=None, fallback_value=None,
@@ -0,0 +1,68 @@
+from __future__ import absolute_import
+
+import collections
+
+import mock
+from django.test import TestCase
+
+from ner_v1.chatbot.entity_detection import get_text
+from ner_v1.chatbot.tag_message import run_ner
+
+
+class FakeDataStore(object):
+    """
+    Stands in for datastore.DataStore, answers searches of each entity with its own variants to values dictionary and
+    records the searches made
+    """
+    def __init__(self, entity_variants_to_values):
+        self.entity_variants_to_values = entity_variants_to_values
+        self.searches = []
+        self.multi_searches = []
+
+    def may_match(self, entity_name, texts, fuzziness_threshold):
+        return [True] * len(texts)
+
+    def get_similar_dictionary(self, entity_name, texts, fuzziness_threshold, search_language_script=None):
+        self.searches.append(entity_name)
+        return [collections.OrderedDict(self.entity_variants_to_values[entity_name]) for _ in texts]
+
+    def get_similar_dictionary_multi(self, entity_names, texts, fuzziness_threshold, search_language_script=None):
+        self.multi_searches.append(list(entity_names))
+        return dict((entity_name, [collections.OrderedDict(self.entity_variants_to_values[entity_name])
+                                   for _ in texts])
+                    for entity_name in entity_names)
+
+
+class RunNerTest(TestCase):
+    def setUp(self):
+        self.message = 'order paneer tikka from mainland china today'
+        self.datastore = FakeDataStore({'restaurant': [('mainland china', 'Mainland China')],
+                                        'dish': [('paneer tikka', 'Paneer Tikka')]})
+        self.date_output = [{'detection': 'message', 'original_text': 'today', 'entity_value': {'type': 'today'}}]
+        self.get_date = mock.Mock(return_value=self.date_output)
+        patchers = [mock.patch('ner_v1.detectors.textual.text.text_detection.DataStore',
+                               return_value=self.datastore),
+                    mock.patch.dict('ner_v1.chatbot.tag_message.ENTITY_FUNCTION_DICTIONARY', {'date': self.get_date}),
+                    # Keep the output of each entity as it is, instead of combining and tagging them
+                    mock.patch('ner_v1.chatbot.tag_message.combine_output_of_detection_logic_and_tag',
+                               side_effect=lambda entity_data, message: entity_data)]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_text_entities_searched_together(self):
+        entity_data = run_ner(entities=['restaurant', 'date', 'dish'], message=self.message)
+        self.assertEqual(self.datastore.multi_searches, [['restaurant', 'dish']])
+        self.assertEqual(self.datastore.searches, [])
+
+        for entity_name in ('restaurant', 'dish'):
+            self.assertEqual(entity_data[entity_name],
+                             get_text(message=self.message, entity_name=entity_name, structured_value=None,
+                                      fallback_value=None, bot_message=None))
+        self.assertEqual(entity_data['restaurant'][0]['original_text'], 'mainland china')
+
+    def test_other_entities_detected_by_their_functions(self):
+        entity_data = run_ner(entities=['restaurant', 'date'], message=self.message)
+        self.assertEqual(entity_data['date'], self.date_output)
+        self.get_date.assert_called_once_with(message=self.message, entity_name='date', structured_value=None,
+                                              fallback_value=None, bot_message=None)
@@ -0,0 +1,100 @@
+from __future__ import absolute_import
+
+import collections
+import unittest
+
+import mock
+import six
+from django.test import TestCase
+
+from ner_v1.detectors.textual.text.text_detection import TextDetector
+
+
+class FakeDataStore(object):
+    """
+    Stands in for datastore.DataStore, answers every search with the same variants to values dictionary and records
+    the texts searched
+    """
+    def __init__(self, variants_to_values, may_match=True):
+        self.variants_to_values = variants_to_values
+        self._may_match = may_match
+        self.searched_texts = []
+
+    def may_match(self, entity_name, texts, fuzziness_threshold):
+        return [self._may_match] * len(texts)
+
+    def get_similar_dictionary(self, entity_name, texts, fuzziness_threshold, search_language_script=None):
+        self.searched_texts.extend(texts)
+        return [collections.OrderedDict(self.variants_to_values) for _ in texts]
+
+
+class TextDetectionTest(TestCase):
+    def _detect(self, text, variants_to_values):
+        datastore = FakeDataStore(variants_to_values)
+        with mock.patch('ner_v1.detectors.textual.text.text_detection.DataStore', return_value=datastore):
+            text_detector = TextDetector(entity_name='city')
+        values, original_texts = text_detector.detect_entity(text)
+        return values, original_texts, text_detector.tagged_text
+
+    def test_matches_followed_by_punctuation_tagged(self):
+        values, original_texts, tagged_text = self._detect(
+            'Come to Chennai, TamilNadu, I will visit Kolkata.',
+            [('chennai', 'Chennai'), ('tamilnadu', 'Chennai'), ('kolkata', 'Kolkata')])
+        self.assertEqual(values, ['Chennai', 'Chennai', 'Kolkata'])
+        self.assertEqual(original_texts, ['chennai,', 'tamilnadu,', 'kolkata.'])
+        self.assertEqual(tagged_text, ' come to __city__ __city__ i will visit __city__ ')
+
+    def test_other_occurrences_tagged(self):
+        values, original_texts, tagged_text = self._detect('delhi, delhi.', [('delhi', 'Delhi')])
+        self.assertEqual(values, ['Delhi'])
+        self.assertEqual(original_texts, ['delhi,'])
+        self.assertEqual(tagged_text, ' __city__ __city__ ')
+
+    def test_fragments_of_matches_not_detected_again(self):
+        values, original_texts, tagged_text = self._detect(
+            'chennai (tamil nadu) and nadu',
+            [('tamil nadu', 'Tamil Nadu'), ('nadu', 'Nadu'), ('chennai', 'Chennai')])
+        self.assertEqual(values, ['Tamil Nadu', 'Nadu', 'Chennai'])
+        self.assertEqual(original_texts, ['tamil nadu)', 'nadu', 'chennai'])
+        self.assertEqual(tagged_text, ' __city__ (__city__ and __city__ ')
+
+        values, original_texts, tagged_text = self._detect(
+            'i want plan b, not plan a',
+            [('plan b', 'Plan B'), ('b', 'B'), ('plan a', 'Plan A')])
+        self.assertEqual(values, ['Plan B', 'Plan A'])
+        self.assertEqual(original_texts, ['plan b,', 'plan a'])
+        self.assertEqual(tagged_text, ' i want __city__ not __city__ ')
+
+
+@unittest.skipIf(six.PY2, 'datastore.aio needs python 3')
+class DetectEntityAsyncTest(TestCase):
+    def setUp(self):
+        import asyncio
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        import asyncio
+        asyncio.set_event_loop(None)
+        self.loop.close()
+
+    def _detect(self, text, datastore):
+        from datastore.aio import AsyncDataStore
+        with mock.patch('datastore.aio.DataStore', return_value=datastore):
+            async_datastore = object.__new__(AsyncDataStore)
+            async_datastore.__init__(max_workers=1)
+        self.addCleanup(async_datastore.shutdown)
+        with mock.patch('ner_v1.detectors.textual.text.text_detection.DataStore', return_value=datastore):
+            text_detector = TextDetector(entity_name='city')
+        with mock.patch('datastore.aio.AsyncDataStore', return_value=async_datastore):
+            return self.loop.run_until_complete(text_detector.detect_entity_async(text))
+
+    def test_same_results_as_detect_entity(self):
+        datastore = FakeDataStore([('kolkata', 'Kolkata')])
+        self.assertEqual(self._detect('I will visit Kolkata.', datastore), (['Kolkata'], ['kolkata.']))
+        self.assertEqual(datastore.searched_texts, ['i will visit kolkata'])
+
+    def test_text_that_can_not_match_not_searched(self):
+        datastore = FakeDataStore([('kolkata', 'Kolkata')], may_match=False)
+        self.assertEqual(self._detect('I will visit Kolkata.', datastore), ([], []))
+        self.assertEqual(datastore.searched_texts, [])
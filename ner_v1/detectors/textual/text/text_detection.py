@@ -4,13 +4,15 @@ import re
 from six import iteritems
 
 import language_utilities.constant as lang_constant
-from chatbot_ner.config import ner_logger
 from datastore import DataStore
-from lib.nlp.const import TOKENIZER, whitespace_tokenizer
+from lib.nlp.const import TOKENIZER
 from lib.nlp.levenshtein_distance import edit_distance
 from ner_v1.detectors.base_detector import BaseDetector
 
 
+_whitespace_pattern = re.compile(r'\s', re.UNICODE)
+
+
 class TextDetector(BaseDetector):
     """
     TextDetector detects custom entities in text string by performing similarity searches against a list fetched from
@@ -59,6 +61,10 @@ class TextDetector(BaseDetector):
         self.__texts = []
         self.__tagged_texts = []
         self.__processed_texts = []
+        # datastore query text -> variants to values dictionary, see prefetch_similar_dictionaries
+        self._prefetched_variants_to_values = {}
+        # (text, output of _get_tokens_and_spans for text)
+        self._tokens_and_spans_cache = (None, None)
 
         self.entity_name = entity_name
         self.tag = '__' + self.entity_name + '__'
@@ -149,14 +155,49 @@ class TextDetector(BaseDetector):
         """
         self._min_token_size_for_fuzziness = min_size
 
-    def _process_text(self, texts):
-        text_lowercase = [text.lower() for text in texts]
+    @staticmethod
+    def _normalize_text(text):
+        text = text.lower()
+        if isinstance(text, bytes):
+            text = text.decode('utf-8')
+        return text
 
-        for text in text_lowercase:
-            if isinstance(text, bytes):
-                self.__texts.append(text.decode('utf-8'))
-            else:
-                self.__texts.append(text)
+    @staticmethod
+    def _get_datastore_query_text(processed_text):
+        return u' '.join(TOKENIZER.tokenize(processed_text))
+
+    @staticmethod
+    def prefetch_similar_dictionaries(text_detectors, texts):
+        """
+        Fetch datastore search results for texts for all text_detectors at once, so that a following call to
+        detect, detect_entity or detect_entity_bulk with the same texts on any of these detectors does not query the
+        datastore again. Detectors sharing fuzziness and language script are searched together with
+        DataStore.get_similar_dictionary_multi, i.e. with a single request for elasticsearch
+
+        Args:
+            text_detectors (list of TextDetector): detectors to fetch results for
+            texts (list of str or unicode): texts that will be passed to the detectors
+        """
+        query_texts = [TextDetector._get_datastore_query_text(u' ' + TextDetector._normalize_text(text) + u' ')
+                       for text in texts]
+        groups = collections.OrderedDict()
+        for text_detector in text_detectors:
+            key = (text_detector._fuzziness, text_detector._target_language_script)
+            groups.setdefault(key, []).append(text_detector)
+
+        for (fuzziness, language_script), detectors in groups.items():
+            results = detectors[0].db.get_similar_dictionary_multi(
+                entity_names=[text_detector.entity_name for text_detector in detectors],
+                texts=query_texts,
+                fuzziness_threshold=fuzziness,
+                search_language_script=language_script)
+            for text_detector in detectors:
+                text_detector._prefetched_variants_to_values.update(zip(query_texts,
+                                                                        results[text_detector.entity_name]))
+
+    def _process_text(self, texts):
+        for text in texts:
+            self.__texts.append(self._normalize_text(text))
 
         self.__processed_texts = self.__texts
 
@@ -166,93 +207,49 @@ class TextDetector(BaseDetector):
         self.__processed_texts = [u' ' + processed_text + u' ' for processed_text in self.__processed_texts]
         self.__tagged_texts = self.__processed_texts
 
-    def _get_substring_from_processed_text(self, text, matched_tokens):
+    def _get_tokens_and_spans(self, text):
         """
-        Get part of original text that was detected as some entity value.
-
-        This method was written to tackle cases when original text contains special characters which are dropped
-        during tokenization
+        Tokenize text in a single pass and get the start and end position of every token. Results for the last text
+        are kept, so tokenizing the same processed text again for other variants is free
 
         Args:
-            matched_tokens (list): list of tokens (usually tokens from fuzzy match results from ES)
-                                   to find as a contiguous substring in the processed sentence considering the effects
-                                   of tokenizer
-            text (string or unicode): sentence from self.processed_text  from where indices of given token will be
-                                            given
+            text (str or unicode): text to get tokens from and indices of those tokens in the given text
 
         Returns:
-            str or unicode: part of original text that corresponds to given tokens
+            tuple:
+                list: containing tokens, same as results from tokenizer.tokenize
+                list: containing (int, int) indicating start and end position of ith token (of first list)
+                      in given text
 
         E.g.
-        self.processed_text = u'i want to order 1 pc hot & crispy'
-        tokens = [u'i', u'want', u'to', u'order', u'1', u'pc', u'hot', u'crispy']
-        indices = [(1, 2), (3, 7), (8, 10), (11, 16), (17, 18), (19, 21), (22, 25), (28, 34)])
-
-        In: matched_tokens = [u'1', u'pc', u'hot', u'crispy']
-        Out: 1 pc hot & crispy
-
-        Notice that & is dropped during tokenization but when finding original text, we recover it from processed text
+        In: text = u' i want to order 1 pc hot & crispy'
+        Out: ([u'i', u'want', u'to', u'order', u'1', u'pc', u'hot', u'crispy'],
+              [(1, 2), (3, 7), (8, 10), (11, 16), (17, 18), (19, 21), (22, 25), (28, 34)])
         """
-
-        def _get_tokens_and_indices(txt):
-            """
-            Args:
-                txt (str or unicode): text to get tokens from and indicies of those tokens in the given text
-
-            Returns:
-                tuple:
-                    list: containing tokens, direct results from tokenizer.tokenize
-                    list: containing (int, int) indicating start and end position of ith token (of first list)
-                          in given text
-
-            E.g.
-            In: text = u'i want to order 1 pc hot & crispy'
-            Out: ([u'i', u'want', u'to', u'order', u'1', u'pc', u'hot', u'crispy'],
-                  [(1, 2), (3, 7), (8, 10), (11, 16), (17, 18), (19, 21), (22, 25), (28, 34)])
-
-            """
-            txt = txt.rstrip() + ' __eos__'
-            processed_text_tokens = TOKENIZER.tokenize(txt)
-            processed_text_tokens_indices = []
-
-            offset = 0
-            for token in processed_text_tokens:
-                st = txt.index(token)
-                en = st + len(token)
-
-                # Small block to handle tricky cases like '(A B) C'
-                # It extends the previous token's end boundary if there are special characters except whitespace
-                # towards the end of previous token
-                prefix = txt[:en]
-                prefix_tokens = whitespace_tokenizer.tokenize(prefix)
-                if prefix and len(prefix_tokens) > 1 and prefix_tokens[0]:
-                    if processed_text_tokens_indices:
-                        s, e = processed_text_tokens_indices.pop()
-                        e += len(prefix_tokens[0])
-                        processed_text_tokens_indices.append((s, e))
-
-                txt = txt[en:]
-                processed_text_tokens_indices.append((offset + st, offset + en))
-                offset += en
-
-            # remove eos parts
-            processed_text_tokens.pop()
-            processed_text_tokens_indices.pop()
-
-            return processed_text_tokens, processed_text_tokens_indices
-
-        try:
-            n = len(matched_tokens)
-            tokens, indices = _get_tokens_and_indices(text)
-            for i in range(len(tokens) - n + 1):
-                if tokens[i:i + n] == matched_tokens:
-                    start = indices[i][0]
-                    end = indices[i + n - 1][1]
-                    return text[start:end]
-        except (ValueError, IndexError):
-            ner_logger.exception('Error getting original text (%s, %s)' % (matched_tokens, text))
-
-        return u' '.join(matched_tokens)
+        if self._tokens_and_spans_cache[0] == text:
+            return self._tokens_and_spans_cache[1]
+
+        tokens, spans = [], []
+        # __eos__ makes sure special characters at the end of the last token are handled like for any other token
+        txt = text.rstrip() + u' __eos__'
+        previous_end = 0
+        for token, start, end in TOKENIZER.tokenize_with_spans(txt):
+            # Small block to handle tricky cases like '(A B) C'
+            # It extends the previous token's end boundary if there are special characters except whitespace
+            # towards the end of previous token
+            gap = txt[previous_end:start]
+            if spans and gap and not gap[0].isspace() and _whitespace_pattern.search(gap):
+                spans[-1] = (spans[-1][0], spans[-1][1] + _whitespace_pattern.search(gap).start())
+            tokens.append(token)
+            spans.append((start, end))
+            previous_end = end
+
+        # remove eos parts
+        tokens.pop()
+        spans.pop()
+
+        self._tokens_and_spans_cache = (text, (tokens, spans))
+        return tokens, spans
 
     def detect_entity_bulk(self, texts, **kwargs):
         """
@@ -353,6 +350,42 @@ class TextDetector(BaseDetector):
             return text_entity_values[0], original_texts[0]
         return [], []
 
+    def detect_entity_async(self, text, **kwargs):
+        """
+        Asyncio version of detect_entity for python 3. The may_match check and the datastore search run on the thread
+        pool of datastore.aio.AsyncDataStore, so the event loop can serve other requests meanwhile, the rest of the
+        detection runs on the event loop thread once the search results arrive. Texts that can not match any variant
+        of the entity are not searched.
+
+        Args:
+            text (unicode): string to extract textual entities from
+            **kwargs: passed on to detect_entity
+
+        Returns:
+            asyncio.Future: resolved with the same tuple as returned by detect_entity, e.g.
+                values, original_texts = await TextDetector('city').detect_entity_async('I live in Delhi')
+        """
+        from datastore.aio import AsyncDataStore, chain
+
+        query_text = self._get_datastore_query_text(u' ' + self._normalize_text(text) + u' ')
+        future = AsyncDataStore().may_match(entity_name=self.entity_name, texts=[query_text],
+                                            fuzziness_threshold=self._fuzziness)
+
+        def _search(may_match):
+            if not may_match[0]:
+                return _detect_entity([collections.OrderedDict()])
+            search = AsyncDataStore().get_similar_dictionary(entity_name=self.entity_name,
+                                                             texts=[query_text],
+                                                             fuzziness_threshold=self._fuzziness,
+                                                             search_language_script=self._target_language_script)
+            return chain(search, _detect_entity)
+
+        def _detect_entity(results):
+            self._prefetched_variants_to_values[query_text] = results[0]
+            return self.detect_entity(text, **kwargs)
+
+        return chain(future, _search)
+
     def _text_detection_with_variants(self):
         """
         This function will normalise the message by breaking it into trigrams, bigrams and unigrams. The generated
@@ -368,12 +401,24 @@ class TextDetector(BaseDetector):
 
         original_final_list_ = []
         value_final_list_ = []
-        texts = [u' '.join(TOKENIZER.tokenize(processed_text)) for processed_text in self.__processed_texts]
+        texts = [self._get_datastore_query_text(processed_text) for processed_text in self.__processed_texts]
 
-        _variants_to_values_list = self.db.get_similar_dictionary(entity_name=self.entity_name,
-                                                                  texts=texts,
-                                                                  fuzziness_threshold=self._fuzziness,
-                                                                  search_language_script=self._target_language_script)
+        if all(text in self._prefetched_variants_to_values for text in texts):
+            _variants_to_values_list = [self._prefetched_variants_to_values[text] for text in texts]
+        else:
+            # Texts with no token that could match any variant of the entity are not searched at all
+            may_match = self.db.may_match(entity_name=self.entity_name, texts=texts,
+                                          fuzziness_threshold=self._fuzziness)
+            search_texts = [text for text, text_may_match in zip(texts, may_match) if text_may_match]
+            search_results = iter([])
+            if search_texts:
+                search_results = iter(self.db.get_similar_dictionary(
+                    entity_name=self.entity_name,
+                    texts=search_texts,
+                    fuzziness_threshold=self._fuzziness,
+                    search_language_script=self._target_language_script))
+            _variants_to_values_list = [next(search_results) if text_may_match else collections.OrderedDict()
+                                        for text_may_match in may_match]
         for index, _variants_to_values in enumerate(_variants_to_values_list):
             original_final_list = []
             value_final_list = []
@@ -384,78 +429,102 @@ class TextDetector(BaseDetector):
                     variant = variant.decode('utf-8')
 
                 variants_to_values[variant] = value
-            variants_list = variants_to_values.keys()
+            variants_tokens = dict((variant, TOKENIZER.tokenize(variant)) for variant in variants_to_values)
 
             # Length based ordering, this reorders the results from datastore
             # that are already sorted by some relevance scoring
 
             exact_matches, fuzzy_variants = [], []
-            _text = texts
-            for variant in variants_list:
-                if u' '.join(TOKENIZER.tokenize(variant)) in _text[index]:
+            for variant in variants_to_values:
+                if u' '.join(variants_tokens[variant]) in texts[index]:
                     exact_matches.append(variant)
                 else:
                     fuzzy_variants.append(variant)
-            exact_matches.sort(key=lambda s: len(TOKENIZER.tokenize(s)), reverse=True)
-            fuzzy_variants.sort(key=lambda s: len(TOKENIZER.tokenize(s)), reverse=True)
+            exact_matches.sort(key=lambda s: len(variants_tokens[s]), reverse=True)
+            fuzzy_variants.sort(key=lambda s: len(variants_tokens[s]), reverse=True)
             variants_list = exact_matches + fuzzy_variants
 
+            processed_text = self.__processed_texts[index]
+            text_tokens, text_spans = self._get_tokens_and_spans(processed_text)
+            # Tokens already covered by a longer or earlier variant can not be matched again, this is what replacing
+            # them with the tag did before tagging was moved to a single pass
+            claimed = [False] * len(text_tokens)
+            tagged_token_ranges = []
             for variant in variants_list:
-
-                original_text = self._get_entity_substring_from_text(self.__processed_texts[index], variant)
-                if original_text:
-                    value_final_list.append(variants_to_values[variant])
-                    original_final_list.append(original_text)
-                    _pattern = re.compile(r'\b%s\b' % re.escape(original_text), re.UNICODE)
-                    self.__tagged_texts[index] = _pattern.sub(self.tag, self.__tagged_texts[index])
-                    # Instead of dropping completely like in other entities,
-                    # we replace with tag to avoid matching non contiguous segments
-                    self.__processed_texts[index] = _pattern.sub(self.tag, self.__processed_texts[index])
+                variant_tokens = variants_tokens[variant]
+                if not variant_tokens:
+                    continue
+                token_range = self._get_entity_token_range(text_tokens, variant_tokens, claimed)
+                if token_range is None:
+                    continue
+
+                first, last = token_range
+                value_final_list.append(variants_to_values[variant])
+                original_final_list.append(processed_text[text_spans[first][0]:text_spans[last][1]])
+                # Like the regex substitution it replaces, tag all other free occurrences of the same tokens too
+                matched_tokens = text_tokens[first:last + 1]
+                for start in range(len(text_tokens) - len(matched_tokens) + 1):
+                    end = start + len(matched_tokens)
+                    if text_tokens[start:end] == matched_tokens and not any(claimed[start:end]):
+                        claimed[start:end] = [True] * len(matched_tokens)
+                        tagged_token_ranges.append((start, end - 1))
+
+            tagged_text = self._tag_token_ranges(processed_text, text_spans, tagged_token_ranges)
+            self.__tagged_texts[index] = tagged_text
+            # Instead of dropping completely like in other entities,
+            # we replace with tag to avoid matching non contiguous segments
+            self.__processed_texts[index] = tagged_text
             value_final_list_.append(value_final_list)
             original_final_list_.append(original_final_list)
 
         return value_final_list_, original_final_list_
 
-    def _get_entity_substring_from_text(self, text, variant):
+    def _get_entity_token_range(self, text_tokens, variant_tokens, claimed):
         """
-        Check ngrams of the text for similarity against the variant (can be a ngram) using Levenshtein distance
-        and return the closest substring in the text that matches the variant
+        Find the first run of text tokens, none of them claimed, that matches variant tokens one to one either exactly
+        or within the fuzziness threshold
 
         Args:
-            variant(str or unicode): string, ngram of variant to fuzzy detect in the text using Levenshtein distance
-            text(str or unicode): sentence from self.processed on which detection is being done
+            text_tokens (list): tokens of the text, see _get_tokens_and_spans
+            variant_tokens (list): non empty list of tokens of the variant
+            claimed (list of bool): True for text tokens that are already part of some detected entity
 
         Returns:
-            str or unicode or None: part of the given text that was detected as entity given the variant,
-                                    None otherwise
-
-        Example:
-            >>> text_detector = TextDetector('city')
-            >>> text = 'Come to Chennai, Tamil Nadu,  I will visit Delehi next year'.lower()
-            >>> text_detector.detect_entity(text)
-            >>> text_detector._get_entity_substring_from_text(variant='chennai')
-            'chennai'
-            >>> text_detector._get_entity_substring_from_text(variant='delhi')
-            'delehi'
-
+            tuple or None: indices of first and last matched text token, None if variant was not found
         """
-        variant_tokens = TOKENIZER.tokenize(variant)
-        text_tokens = TOKENIZER.tokenize(text)
-        original_text_tokens = []
         variant_token_i = 0
-        for text_token in text_tokens:
+        for text_token_i, text_token in enumerate(text_tokens):
             variant_token = variant_tokens[variant_token_i]
-            same = variant_token == text_token
-            ft = self._get_fuzziness_threshold_for_token(text_token)
-            if same or (len(text_token) > self._min_token_size_for_fuzziness
-                        and edit_distance(string1=variant_token,
-                                          string2=text_token,
-                                          max_distance=ft + 1) <= ft):
-                original_text_tokens.append(text_token)
+            if not claimed[text_token_i] and (
+                    variant_token == text_token or
+                    (len(text_token) > self._min_token_size_for_fuzziness and
+                     edit_distance(string1=variant_token, string2=text_token,
+                                   max_distance=self._get_fuzziness_threshold_for_token(text_token) + 1)
+                     <= self._get_fuzziness_threshold_for_token(text_token))):
                 variant_token_i += 1
                 if variant_token_i == len(variant_tokens):
-                    return self._get_substring_from_processed_text(text, original_text_tokens)
+                    return text_token_i - variant_token_i + 1, text_token_i
             else:
-                original_text_tokens = []
                 variant_token_i = 0
         return None
+
+    def _tag_token_ranges(self, text, spans, token_ranges):
+        """
+        Replace the parts of text covered by each of the token ranges with self.tag in a single pass
+
+        Args:
+            text (str or unicode): processed text
+            spans (list): start and end positions of tokens of text, see _get_tokens_and_spans
+            token_ranges (list): non overlapping (first, last) token index pairs
+
+        Returns:
+            str or unicode: text with all token ranges replaced by the tag
+        """
+        parts = []
+        position = 0
+        for first, last in sorted(token_ranges):
+            parts.append(text[position:spans[first][0]])
+            parts.append(self.tag)
+            position = spans[last][1]
+        parts.append(text[position:])
+        return u''.join(parts)
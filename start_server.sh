@@ -30,6 +30,7 @@ test -d $RUNDIR || mkdir -p $RUNDIR
 exec gunicorn ${DJANGO_WSGI_MODULE}:application \
   -b 0.0.0.0:$PORT \
   --name $NAME \
+  --config chatbot_ner/gunicorn_config.py \
   --workers $NUM_WORKERS \
   --user=$USER --group=$GROUP \
   --log-level=debug \